@@ -15,6 +15,7 @@ import webbrowser
 # Whisper Manager 통합
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from whisper_manager import WhisperManager
+from media_probe import get_duration
 from whisper_installer_ui import WhisperInstallerDialog
 from custom_widgets import RoundedButton
 
@@ -578,12 +579,12 @@ class ModernMP4Converter:
                 messagebox.showwarning("STT 불가", f"{model_name.upper()} 모델이 설치되지 않았습니다.\nSTT 없이 변환을 진행합니다.")
                 self.enable_stt.set(False)
             else:
-                # 모델 미리 로드
-                try:
-                    self.status_label.config(text=f"{model_name.upper()} 모델 로딩 중...")
-                    self.whisper_model = self.whisper_manager.load_model(model_name)
-                except Exception as e:
-                    messagebox.showwarning("모델 로드 실패", f"AI 모델을 로드할 수 없습니다.\n{e}")
+                # 전용 venv의 상주 작업자에 모델 미리 로드 (배치 동안 재사용)
+                self.status_label.config(text=f"{model_name.upper()} 모델 로딩 중...")
+                self.whisper_model = self.whisper_manager.start_worker(model_name)
+                if self.whisper_model is None:
+                    messagebox.showwarning("모델 로드 실패",
+                                           f"AI 모델을 로드할 수 없습니다.\n{self.whisper_manager.get_last_error()[:300]}")
                     self.enable_stt.set(False)
         
         # UI update
@@ -601,27 +602,8 @@ class ModernMP4Converter:
         thread.start()
     
     def get_file_duration(self, file_path):
-        """Get duration of media file in seconds"""
-        try:
-            cmd = [
-                self.ffmpeg_path or 'ffmpeg',
-                '-i', file_path,
-                '-f', 'null',
-                '-'
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            # Parse duration from stderr
-            import re
-            duration_match = re.search(r'Duration: (\d{2}):(\d{2}):(\d{2})\.\d+', result.stderr)
-            if duration_match:
-                hours = int(duration_match.group(1))
-                minutes = int(duration_match.group(2))
-                seconds = int(duration_match.group(3))
-                return hours * 3600 + minutes * 60 + seconds
-        except:
-            pass
-        return 0
+        """Get duration of media file in seconds (header probe, no decode)"""
+        return get_duration(file_path, self.ffmpeg_path)
     
     def check_ffmpeg(self):
         # Check for embedded ffmpeg
@@ -742,7 +724,8 @@ class ModernMP4Converter:
     
     def conversion_complete(self):
         self.is_converting = False
-        self.whisper_model = None  # 모델 메모리 해제
+        self.whisper_model = None
+        self.whisper_manager.stop_worker()  # 모델 메모리 해제
         messagebox.showinfo("완료", "모든 파일 변환이 완료되었습니다!")
         self.clear_files()
 
@@ -35,6 +35,11 @@ class WhisperManager:
         
         self.config_file = self.app_dir / 'config.json'
         self.last_error = ""
+        # venv/whisper 확인 결과 (파일마다 파이썬을 다시 띄우지 않도록 한 번 확인한 뒤 보관)
+        self._venv_ready = False
+        self._whisper_ok = None
+        # 상주 전사 작업자 (whisper_worker.WhisperWorker)
+        self.worker = None
         self.load_config()
     
     def load_config(self):
@@ -65,7 +70,9 @@ class WhisperManager:
             return p3 if p3.exists() else p
 
     def ensure_venv(self, progress_callback=None) -> bool:
-        """전용 venv 생성 및 기본 업그레이드"""
+        """전용 venv 생성 및 기본 업그레이드 (이미 확인했으면 바로 반환)"""
+        if self._venv_ready and self.venv_python.exists():
+            return True
         try:
             if not self.venv_dir.exists() or not self.venv_python.exists():
                 if progress_callback:
@@ -83,6 +90,7 @@ class WhisperManager:
             if up.returncode != 0:
                 # 치명적이지 않음 - 계속 진행
                 self.last_error = up.stderr or up.stdout or ''
+            self._venv_ready = True
             return True
         except Exception as e:
             self.last_error = str(e)
@@ -92,8 +100,11 @@ class WhisperManager:
         """Whisper 라이브러리 설치 확인 (전용 venv 기준)"""
         if not self.venv_python.exists():
             return False
+        if self._whisper_ok:
+            return True
         result = subprocess.run([str(self.venv_python), '-c', 'import whisper,sys;print("ok")'], capture_output=True, text=True)
-        return result.returncode == 0 and 'ok' in (result.stdout or '')
+        self._whisper_ok = result.returncode == 0 and 'ok' in (result.stdout or '')
+        return self._whisper_ok
     
     def install_whisper_minimal(self, progress_callback=None):
         """Whisper + Torch(CPU) 사용자 영역에 설치. 권한 문제 최소화/안정성 향상."""
@@ -142,6 +153,7 @@ class WhisperManager:
                 progress_callback(90, "마무리 중...")
             self.config['whisper_installed'] = True
             self.save_config()
+            self._whisper_ok = None
             self.last_error = ""
             if progress_callback:
                 progress_callback(100, "설치 완료!")
@@ -260,8 +272,47 @@ class WhisperManager:
             # 자동 다운로드 (Whisper 기본)
             return whisper.load_model(model_name)
 
+    def start_worker(self, model_name: str = 'small'):
+        """전용 venv에서 상주 전사 작업자를 띄워 모델을 올림 → WhisperWorker (실패하면 None)
+
+        같은 모델의 작업자가 이미 떠 있으면 그대로 쓰고, 다른 모델이면 교체한다.
+        """
+        from whisper_worker import WhisperWorker, WorkerError
+        if self.worker is not None and self.worker.model == model_name and self.worker.alive:
+            return self.worker
+        self.stop_worker()
+        if not self.ensure_venv():
+            return None
+        if not self.is_whisper_installed():
+            if not self.install_whisper_minimal():
+                return None
+        worker = WhisperWorker(self.venv_python, model_name, self.models_dir / f"{model_name}.pt")
+        try:
+            self.worker = worker.start()
+        except WorkerError as e:
+            self.last_error = str(e)
+            return None
+        return self.worker
+
+    def stop_worker(self):
+        """상주 작업자 종료 (모델 메모리 해제)"""
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+
     def transcribe_cli(self, audio_path: str, model_name: str = 'small', language: str = 'ko', output_dir: str = None) -> str:
-        """전용 venv의 whisper CLI로 전사 수행. txt 내용을 반환."""
+        """전용 venv에서 전사 수행 후 텍스트 반환.
+
+        상주 작업자(모델을 한 번만 올림)를 쓰고, 작업자를 띄울 수 없을 때만 파일마다 whisper CLI를 실행한다.
+        """
+        from whisper_worker import WorkerError
+        worker = self.start_worker(model_name)
+        if worker is not None:
+            try:
+                return worker.transcribe(audio_path, language)
+            except WorkerError as e:
+                self.last_error = str(e)
+                return ''
         try:
             if not self.ensure_venv():
                 return ''
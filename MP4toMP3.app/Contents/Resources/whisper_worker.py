@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+상주 Whisper 작업자 - 전용 venv 안에서 모델을 한 번만 올려 두고 파이프로 전사 요청을 받는다.
+
+파일마다 `python -m whisper`를 띄우면 매번 torch를 import하고 모델을 디스크에서 다시 읽는다.
+앱은 작업자를 한 번 띄우고 (WhisperWorker), 작업자는 모델을 올린 뒤 요청을 기다린다.
+
+프로토콜 (stdin/stdout): 프레임 = 4바이트 빅엔디언 길이 + UTF-8 JSON
+    요청  {"op": "ping"} | {"op": "transcribe", "audio": 경로, "language": "ko"} | {"op": "shutdown"}
+    응답  {"ok": true, ...} | {"ok": false, "error": 메시지}
+작업자는 준비가 끝나면 {"ok": true, "ready": true, ...}를 먼저 보낸다.
+whisper/torch가 stdout에 찍는 출력이 프레임을 깨지 않도록 작업자 안에서는 stdout을 stderr로 돌린다.
+
+앱 쪽(WhisperWorker)은 표준 라이브러리만 쓰므로 앱 파이썬에서 import해도 된다.
+"""
+
+import os
+import sys
+import json
+import time
+import select
+import struct
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+
+HEADER = struct.Struct('>I')
+# 프레임 하나의 최대 크기 (깨진 스트림에서 엄청난 길이를 읽고 멈추지 않도록)
+MAX_FRAME = 64 << 20
+# 모델 로드(작업자 준비)와 상태 확인 응답 제한 시간 (초)
+READY_TIMEOUT = 600
+PING_TIMEOUT = 10
+# 요청 하나당 시도 횟수 (작업자가 죽으면 다시 띄워 한 번 더 보냄, 같은 파일로 계속 죽으면 포기)
+MAX_ATTEMPTS = 2
+
+
+class WorkerError(Exception):
+    """작업자가 죽었거나 응답하지 않음 (전사 자체의 오류는 응답의 error로 온다)"""
+
+
+def write_frame(stream, message):
+    data = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    stream.write(HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _read_exact(stream, size, deadline=None):
+    """size바이트 읽기 - EOF거나 deadline을 넘기면 WorkerError"""
+    chunks = []
+    fd = stream.fileno()
+    while size:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise WorkerError('작업자 응답 시간 초과')
+        chunk = os.read(fd, size)
+        if not chunk:
+            raise WorkerError('작업자 파이프가 닫혔습니다')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_frame(stream, timeout=None):
+    deadline = time.monotonic() + timeout if timeout else None
+    (size,) = HEADER.unpack(_read_exact(stream, HEADER.size, deadline))
+    if size > MAX_FRAME:
+        raise WorkerError(f'잘못된 프레임 길이: {size}')
+    return json.loads(_read_exact(stream, size, deadline).decode('utf-8'))
+
+
+class WhisperWorker:
+    """앱 쪽 작업자 핸들 - 필요할 때 띄우고, 죽으면 다시 띄워 요청을 한 번 더 보낸다"""
+
+    def __init__(self, python, model, model_file=None):
+        self.python = str(python)
+        self.model = model
+        self.model_file = model_file
+        self.process = None
+        self.lock = threading.Lock()
+        self.info = {}
+        # 통계: 작업자를 띄운 횟수, 처리한 전사 수
+        self.starts = 0
+        self.served = 0
+        self.last_error = ''
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _spawn(self):
+        cmd = [self.python, os.path.abspath(__file__), '--model', self.model]
+        if self.model_file:
+            cmd += ['--model-file', str(self.model_file)]
+        # stderr는 버리지 않고 앱 콘솔로 (whisper 경고/추적 정보)
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self.starts += 1
+        try:
+            ready = read_frame(self.process.stdout, READY_TIMEOUT)
+        except (WorkerError, ValueError) as e:
+            self._kill()
+            raise WorkerError(f'작업자 시작 실패: {e}')
+        if not ready.get('ok'):
+            self._kill()
+            raise WorkerError(f"작업자 시작 실패: {ready.get('error', '')}")
+        self.info = ready
+
+    def _kill(self):
+        if self.process is None:
+            return
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        self.process = None
+
+    def _request(self, message, timeout=None):
+        """요청 하나 → 응답 (작업자가 죽었으면 다시 띄워 재시도)"""
+        with self.lock:
+            for attempt in range(MAX_ATTEMPTS):
+                try:
+                    if not self.alive:
+                        self._spawn()
+                    write_frame(self.process.stdin, message)
+                    return read_frame(self.process.stdout, timeout)
+                except (WorkerError, OSError, ValueError) as e:
+                    self.last_error = str(e)
+                    print(f"Whisper 작업자 오류 ({attempt + 1}/{MAX_ATTEMPTS}): {e}")
+                    self._kill()
+            raise WorkerError(self.last_error)
+
+    def start(self):
+        """작업자를 미리 띄워 모델을 올림 (모델 로드 오류를 배치 시작 전에 알리기 위해)"""
+        with self.lock:
+            if not self.alive:
+                self._spawn()
+        return self
+
+    def ping(self):
+        """상태 확인 → 작업자 상태 dict (응답이 없으면 다시 띄운다)"""
+        return self._request({'op': 'ping'}, PING_TIMEOUT)
+
+    def healthy(self):
+        if not self.alive:
+            return False
+        try:
+            return bool(self.ping().get('ok'))
+        except WorkerError:
+            return False
+
+    def transcribe(self, audio_path, language='ko'):
+        """오디오 파일 → 텍스트 (전사 오류면 WorkerError)"""
+        reply = self._request({'op': 'transcribe', 'audio': str(audio_path), 'language': language})
+        if not reply.get('ok'):
+            raise WorkerError(reply.get('error', '전사 실패'))
+        self.served += 1
+        return reply.get('text', '')
+
+    def stop(self):
+        with self.lock:
+            if not self.alive:
+                self.process = None
+                return
+            try:
+                write_frame(self.process.stdin, {'op': 'shutdown'})
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            self._kill()
+
+
+def serve(model_name, model_file=None):
+    """작업자 본체 (전용 venv 파이썬에서 실행)"""
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb', buffering=0)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    protocol_in = sys.stdin.buffer
+    started = time.monotonic()
+    try:
+        import whisper
+        model = whisper.load_model(str(model_file) if model_file and Path(model_file).exists() else model_name)
+    except Exception as e:
+        write_frame(protocol_out, {'ok': False, 'error': f'모델 로드 실패: {e}'})
+        return 1
+    write_frame(protocol_out, {'ok': True, 'ready': True, 'pid': os.getpid(), 'model': model_name,
+                               'load_seconds': round(time.monotonic() - started, 2)})
+    served = 0
+    while True:
+        try:
+            request = read_frame(protocol_in)
+        except WorkerError:
+            # 앱이 종료됨
+            return 0
+        op = request.get('op')
+        if op == 'shutdown':
+            write_frame(protocol_out, {'ok': True})
+            return 0
+        if op == 'ping':
+            write_frame(protocol_out, {'ok': True, 'pid': os.getpid(), 'model': model_name, 'served': served,
+                                       'uptime': round(time.monotonic() - started, 1)})
+        elif op == 'transcribe':
+            try:
+                result = model.transcribe(request['audio'], language=request.get('language') or None, fp16=False)
+                served += 1
+                write_frame(protocol_out, {'ok': True, 'text': result.get('text', '').strip()})
+            except Exception as e:
+                write_frame(protocol_out, {'ok': False, 'error': str(e)})
+        else:
+            write_frame(protocol_out, {'ok': False, 'error': f'알 수 없는 요청: {op}'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='상주 Whisper 작업자 (앱이 실행)')
+    parser.add_argument('--model', default='small')
+    parser.add_argument('--model-file')
+    args = parser.parse_args()
+    sys.exit(serve(args.model, args.model_file))
+
+
+if __name__ == '__main__':
+    main()
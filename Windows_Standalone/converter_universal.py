@@ -15,6 +15,7 @@ import webbrowser
 # Whisper Manager 통합
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from whisper_manager import WhisperManager
+from media_probe import get_duration
 try:
     from custom_widgets import RoundedButton
 except ImportError:
@@ -627,27 +628,8 @@ class ModernMP4Converter:
         thread.start()
     
     def get_file_duration(self, file_path):
-        """Get duration of media file in seconds"""
-        try:
-            cmd = [
-                self.ffmpeg_path or 'ffmpeg',
-                '-i', file_path,
-                '-f', 'null',
-                '-'
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            # Parse duration from stderr
-            import re
-            duration_match = re.search(r'Duration: (\d{2}):(\d{2}):(\d{2})\.\d+', result.stderr)
-            if duration_match:
-                hours = int(duration_match.group(1))
-                minutes = int(duration_match.group(2))
-                seconds = int(duration_match.group(3))
-                return hours * 3600 + minutes * 60 + seconds
-        except:
-            pass
-        return 0
+        """Get duration of media file in seconds (header probe, no decode)"""
+        return get_duration(file_path, self.ffmpeg_path)
     
     def check_ffmpeg(self):
         # Check for embedded ffmpeg
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+미디어 메타데이터 프로브 - 디코딩 없이 컨테이너 헤더만 읽음
+
+순서:
+1. MP4/M4A/MOV: moov/mvhd 아톰을 파이썬에서 직접 파싱 (프로세스 생성 없음)
+2. ffprobe JSON (ffmpeg 옆 또는 PATH에 있을 때)
+3. `ffmpeg -i` 헤더 출력 (출력 파일 없이 실행하므로 디코딩하지 않음)
+"""
+
+import os
+import re
+import json
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+
+MP4_EXTENSIONS = ('.mp4', '.m4a', '.m4v', '.mov', '.3gp')
+
+# stsd 샘플 엔트리 → ffprobe 코덱 이름
+SAMPLE_ENTRY_CODECS = {
+    b'.mp3': 'mp3',
+    b'alac': 'alac',
+    b'Opus': 'opus',
+    b'fLaC': 'flac',
+    b'ac-3': 'ac3',
+    b'ec-3': 'eac3',
+    b'samr': 'amr_nb',
+    b'sawb': 'amr_wb',
+    b'lpcm': 'pcm_s16le',
+    b'sowt': 'pcm_s16le',
+    b'twos': 'pcm_s16be',
+}
+
+# 채널 수 → 기본 채널 레이아웃
+DEFAULT_CHANNEL_LAYOUTS = {1: 'mono', 2: 'stereo', 3: '2.1', 4: 'quad', 6: '5.1', 8: '7.1'}
+
+# hdlr 핸들러 → 스트림 종류
+HANDLER_TYPES = {b'soun': 'audio', b'vide': 'video', b'sbtl': 'subtitle', b'text': 'subtitle', b'subt': 'subtitle'}
+
+# esds objectTypeIndication → 코덱 이름
+OBJECT_TYPE_CODECS = {
+    0x40: 'aac',
+    0x66: 'aac',
+    0x67: 'aac',
+    0x68: 'aac',
+    0x69: 'mp3',
+    0x6B: 'mp3',
+    0xA5: 'ac3',
+    0xA6: 'eac3',
+}
+
+
+class ProbeError(Exception):
+    """메타데이터를 읽을 수 없음"""
+
+
+class MediaInfo:
+    """프로브 결과 (길이는 초 단위 실수)"""
+
+    FIELDS = ('duration', 'audio_codec', 'sample_rate', 'channels', 'channel_layout', 'bit_rate',
+              'stream_count', 'audio_stream_count', 'streams', 'source')
+
+    def __init__(self, duration=0.0, audio_codec=None, sample_rate=0, channels=0, channel_layout=None,
+                 bit_rate=0, stream_count=0, audio_stream_count=0, streams=None, source=''):
+        self.duration = duration
+        self.audio_codec = audio_codec
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.channel_layout = channel_layout
+        self.bit_rate = bit_rate
+        self.stream_count = stream_count
+        self.audio_stream_count = audio_stream_count
+        # 스트림 맵: [{'index': 0, 'type': 'video', 'codec': 'h264'}, ...]
+        self.streams = streams if streams is not None else []
+        self.source = source
+
+    @property
+    def has_audio(self):
+        return self.audio_stream_count > 0
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+
+    def __repr__(self):
+        return (f"MediaInfo(duration={self.duration:.3f}, audio_codec={self.audio_codec}, "
+                f"sample_rate={self.sample_rate}, channels={self.channels}, bit_rate={self.bit_rate}, "
+                f"streams={self.stream_count}, source={self.source})")
+
+
+# ---------------------------------------------------------------------------
+# MP4 아톰 파서
+# ---------------------------------------------------------------------------
+
+def _iter_boxes(data, offset=0, end=None):
+    """메모리 버퍼 안의 박스 (type, payload_start, box_end) 순회"""
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _find_box(data, box_type, start, end):
+    for found_type, payload, box_end in _iter_boxes(data, start, end):
+        if found_type == box_type:
+            return payload, box_end
+    return None
+
+
+def _read_moov(f, file_size):
+    """최상위 박스를 건너뛰며 moov 박스 내용만 읽기 (mdat는 읽지 않음)"""
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        if len(header) < 8:
+            break
+        size, box_type = struct.unpack_from('>I4s', header, 0)
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                break
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            break
+        if box_type == b'moov':
+            f.seek(offset + header_size)
+            return f.read(size - header_size)
+        offset += size
+    return None
+
+
+def _parse_descriptor_length(data, offset):
+    length = 0
+    for _ in range(4):
+        byte = data[offset]
+        offset += 1
+        length = (length << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return length, offset
+
+
+def _parse_esds(data, start, end):
+    """esds → (objectTypeIndication, avgBitrate)"""
+    offset = start + 4  # version/flags
+    try:
+        if data[offset] != 0x03:
+            return None, 0
+        _, offset = _parse_descriptor_length(data, offset + 1)
+        flags = data[offset + 2]
+        offset += 3
+        if flags & 0x80:
+            offset += 2
+        if flags & 0x40:
+            offset += 1 + data[offset]
+        if flags & 0x20:
+            offset += 2
+        if data[offset] != 0x04:
+            return None, 0
+        _, offset = _parse_descriptor_length(data, offset + 1)
+        object_type = data[offset]
+        avg_bitrate = struct.unpack_from('>I', data, offset + 9)[0]
+        return object_type, avg_bitrate
+    except (IndexError, struct.error):
+        return None, 0
+
+
+def _parse_audio_entry(data, start, end):
+    """stsd 안의 오디오 샘플 엔트리 → (codec, channels, sample_rate, bit_rate)"""
+    entries = list(_iter_boxes(data, start + 8, end))  # version/flags + entry_count
+    if not entries:
+        return None, 0, 0, 0
+    entry_type, payload, entry_end = entries[0]
+    # SampleEntry(8) + version(2) + revision(2) + vendor(4) + channels(2) + bits(2) + ...
+    version = struct.unpack_from('>H', data, payload + 8)[0]
+    channels = struct.unpack_from('>H', data, payload + 16)[0]
+    sample_rate = struct.unpack_from('>I', data, payload + 24)[0] >> 16
+    child_start = payload + 28
+    if version == 1:
+        child_start += 16
+    elif version == 2:
+        sample_rate = int(struct.unpack_from('>d', data, payload + 32)[0])
+        channels = struct.unpack_from('>I', data, payload + 40)[0]
+        child_start += 36
+
+    codec = SAMPLE_ENTRY_CODECS.get(entry_type)
+    bit_rate = 0
+    if entry_type == b'mp4a':
+        codec = 'aac'
+        for child_type, child_payload, child_end in _iter_boxes(data, child_start, entry_end):
+            if child_type == b'esds':
+                object_type, bit_rate = _parse_esds(data, child_payload, child_end)
+                codec = OBJECT_TYPE_CODECS.get(object_type, 'aac')
+                break
+    elif codec is None:
+        codec = entry_type.decode('latin-1').strip()
+    return codec, channels, sample_rate, bit_rate
+
+
+def _parse_track(data, start, end):
+    """trak → (handler, codec, channels, sample_rate, bit_rate, duration)"""
+    mdia = _find_box(data, b'mdia', start, end)
+    if not mdia:
+        return None
+    handler = None
+    duration = 0.0
+    hdlr = _find_box(data, b'hdlr', *mdia)
+    if hdlr:
+        handler = data[hdlr[0] + 8:hdlr[0] + 12]
+    mdhd = _find_box(data, b'mdhd', *mdia)
+    if mdhd:
+        version = data[mdhd[0]]
+        if version == 1:
+            timescale, track_duration = struct.unpack_from('>IQ', data, mdhd[0] + 20)
+        else:
+            timescale, track_duration = struct.unpack_from('>II', data, mdhd[0] + 12)
+        if timescale:
+            duration = track_duration / timescale
+    codec, channels, sample_rate, bit_rate = None, 0, 0, 0
+    if handler == b'soun':
+        minf = _find_box(data, b'minf', *mdia)
+        stbl = _find_box(data, b'stbl', *minf) if minf else None
+        stsd = _find_box(data, b'stsd', *stbl) if stbl else None
+        if stsd:
+            codec, channels, sample_rate, bit_rate = _parse_audio_entry(data, *stsd)
+    return handler, codec, channels, sample_rate, bit_rate, duration
+
+
+def probe_mp4(file_path):
+    """MP4 moov 아톰 직접 파싱"""
+    file_size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        moov = _read_moov(f, file_size)
+    if not moov:
+        raise ProbeError('moov 아톰이 없습니다')
+
+    try:
+        info = MediaInfo(source='mp4')
+        mvhd = _find_box(moov, b'mvhd', 0, len(moov))
+        if mvhd:
+            version = moov[mvhd[0]]
+            if version == 1:
+                timescale, duration = struct.unpack_from('>IQ', moov, mvhd[0] + 20)
+            else:
+                timescale, duration = struct.unpack_from('>II', moov, mvhd[0] + 12)
+            if timescale:
+                info.duration = duration / timescale
+
+        for box_type, payload, box_end in _iter_boxes(moov):
+            if box_type != b'trak':
+                continue
+            track = _parse_track(moov, payload, box_end)
+            if not track:
+                continue
+            handler, codec, channels, sample_rate, bit_rate, duration = track
+            info.streams.append({
+                'index': info.stream_count,
+                'type': HANDLER_TYPES.get(handler, 'data'),
+                'codec': codec,
+            })
+            info.stream_count += 1
+            if handler == b'soun':
+                info.audio_stream_count += 1
+                if info.audio_codec is None:
+                    info.audio_codec = codec
+                    info.channels = channels
+                    info.channel_layout = DEFAULT_CHANNEL_LAYOUTS.get(channels)
+                    info.sample_rate = sample_rate
+                    info.bit_rate = bit_rate
+                    if not info.duration:
+                        info.duration = duration
+    except (IndexError, struct.error) as e:
+        raise ProbeError(f'MP4 헤더 파싱 실패: {e}')
+    return info
+
+
+# ---------------------------------------------------------------------------
+# ffprobe / ffmpeg 헤더
+# ---------------------------------------------------------------------------
+
+def find_ffprobe(ffmpeg_path=None):
+    """ffmpeg와 같은 폴더 또는 PATH에서 ffprobe 찾기"""
+    if ffmpeg_path:
+        ffmpeg_path = Path(ffmpeg_path)
+        candidate = ffmpeg_path.with_name(ffmpeg_path.name.replace('ffmpeg', 'ffprobe'))
+        if candidate != ffmpeg_path and candidate.exists():
+            return str(candidate)
+    return shutil.which('ffprobe')
+
+
+def _safe_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def ffprobe_command(file_path, ffprobe_path):
+    return [
+        ffprobe_path, '-v', 'error',
+        '-print_format', 'json',
+        '-show_format', '-show_streams',
+        str(file_path)
+    ]
+
+
+def probe_ffprobe(file_path, ffprobe_path):
+    """ffprobe JSON 출력 파싱"""
+    result = subprocess.run(ffprobe_command(file_path, ffprobe_path), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ProbeError((result.stderr or '').strip() or 'ffprobe 실패')
+    return parse_ffprobe_output(result.stdout)
+
+
+def parse_ffprobe_output(stdout):
+    """ffprobe -print_format json 출력 → MediaInfo"""
+    data = json.loads(stdout or '{}')
+
+    streams = data.get('streams', [])
+    fmt = data.get('format', {})
+    audio = [s for s in streams if s.get('codec_type') == 'audio']
+    info = MediaInfo(
+        duration=float(fmt.get('duration') or 0),
+        stream_count=len(streams),
+        audio_stream_count=len(audio),
+        streams=[{
+            'index': _safe_int(s.get('index')),
+            'type': s.get('codec_type') or 'data',
+            'codec': s.get('codec_name'),
+        } for s in streams],
+        source='ffprobe'
+    )
+    if audio:
+        first = audio[0]
+        info.audio_codec = first.get('codec_name')
+        info.sample_rate = _safe_int(first.get('sample_rate'))
+        info.channels = _safe_int(first.get('channels'))
+        info.channel_layout = first.get('channel_layout') or DEFAULT_CHANNEL_LAYOUTS.get(info.channels)
+        info.bit_rate = _safe_int(first.get('bit_rate'))
+        if not info.duration:
+            info.duration = float(first.get('duration') or 0)
+    return info
+
+
+DURATION_RE = re.compile(r'Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+STREAM_RE = re.compile(r'Stream #\d+:\d+.*?: (Audio|Video|Subtitle|Data|Attachment): (.*)')
+HEADER_CHANNEL_LAYOUTS = {'mono': 1, 'stereo': 2, '2.1': 3, 'quad': 4, '5.0': 5, '5.1': 6, '7.1': 8}
+
+
+def ffmpeg_header_command(file_path, ffmpeg_path):
+    return [ffmpeg_path, '-hide_banner', '-nostdin', '-i', str(file_path)]
+
+
+def probe_ffmpeg_header(file_path, ffmpeg_path):
+    """`ffmpeg -i` 헤더 출력 파싱 (출력 파일이 없으므로 디코딩 없이 종료)"""
+    result = subprocess.run(ffmpeg_header_command(file_path, ffmpeg_path), capture_output=True, text=True)
+    return parse_ffmpeg_header(result.stderr or '')
+
+
+def parse_ffmpeg_header(stderr):
+    """`ffmpeg -i` stderr → MediaInfo"""
+    match = DURATION_RE.search(stderr)
+    if not match:
+        raise ProbeError(stderr.strip().splitlines()[-1] if stderr.strip() else 'Duration 정보 없음')
+
+    info = MediaInfo(
+        duration=int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3)),
+        source='ffmpeg'
+    )
+    for kind, detail in STREAM_RE.findall(stderr):
+        parts = [p.strip() for p in detail.split(',')]
+        codec = parts[0].split()[0] if parts and parts[0] else None
+        info.streams.append({'index': info.stream_count, 'type': kind.lower(), 'codec': codec})
+        info.stream_count += 1
+        if kind != 'Audio':
+            continue
+        info.audio_stream_count += 1
+        if info.audio_codec is None:
+            info.audio_codec = codec
+            for part in parts[1:]:
+                if part.endswith(' Hz'):
+                    info.sample_rate = _safe_int(part.split()[0])
+                elif ' kb/s' in part:
+                    info.bit_rate = _safe_int(part.split()[0]) * 1000
+                elif part.endswith('channels'):
+                    info.channels = _safe_int(part.split()[0])
+                elif part.split('(')[0] in HEADER_CHANNEL_LAYOUTS:
+                    info.channel_layout = part
+                    info.channels = HEADER_CHANNEL_LAYOUTS[part.split('(')[0]]
+            if info.channel_layout is None:
+                info.channel_layout = DEFAULT_CHANNEL_LAYOUTS.get(info.channels)
+    return info
+
+
+def probe_media(file_path, ffmpeg_path=None):
+    """가장 빠른 방법부터 시도하여 MediaInfo 반환
+
+    모든 방법이 실패하면 ProbeError 발생.
+    """
+    file_path = Path(file_path)
+    errors = []
+
+    if file_path.suffix.lower() in MP4_EXTENSIONS:
+        try:
+            info = probe_mp4(file_path)
+            if info.duration > 0:
+                return info
+        except (OSError, ProbeError) as e:
+            errors.append(f'mp4: {e}')
+
+    ffprobe_path = find_ffprobe(ffmpeg_path)
+    if ffprobe_path:
+        try:
+            return probe_ffprobe(file_path, ffprobe_path)
+        except (OSError, ValueError, ProbeError) as e:
+            errors.append(f'ffprobe: {e}')
+
+    if ffmpeg_path:
+        try:
+            return probe_ffmpeg_header(file_path, ffmpeg_path)
+        except (OSError, ProbeError) as e:
+            errors.append(f'ffmpeg: {e}')
+
+    raise ProbeError('; '.join(errors) or '사용 가능한 프로브 방법이 없습니다')
+
+
+def get_duration(file_path, ffmpeg_path=None):
+    """길이(초)만 필요할 때 - 실패 시 0"""
+    try:
+        return probe_media(file_path, ffmpeg_path).duration
+    except ProbeError:
+        return 0
+
+
+if __name__ == "__main__":
+    import sys
+    for arg in sys.argv[1:]:
+        try:
+            print(arg, probe_media(arg, shutil.which('ffmpeg')))
+        except ProbeError as e:
+            print(arg, f"실패: {e}")
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+asyncio 변환 오케스트레이터 - asyncio.create_subprocess_exec로 프로브/인코딩을 실행하고
+단계별 세마포어로 동시 실행 수를 제한한다.
+
+스레드마다 readline()으로 블록하는 방식은 수백 개의 프로브/인코딩을 동시에 돌리기 어렵다.
+여기서는 한 이벤트 루프가 모든 프로세스의 파이프를 읽는다. STT와 SQLite 캐시처럼 블록되는
+작업만 실행기 스레드로 넘긴다.
+
+사용 예:
+    async for result in convert_many(paths, workers=8):
+        print(result)
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+
+from media_probe import (
+    ProbeError, MP4_EXTENSIONS, probe_mp4, find_ffprobe, ffprobe_command, parse_ffprobe_output,
+    ffmpeg_header_command, parse_ffmpeg_header
+)
+from process_runner import (
+    STDERR_LINES, BINARY_READ_SIZE, ERROR_NONE, ERROR_CANCELLED, ERROR_EXEC, ERROR_TIMEOUT,
+    is_progress_line, progress_seconds, classify_ffmpeg_error
+)
+from batch_converter import (
+    BatchConverter, ConversionResult, build_encode_command, copy_suffix_for, duration_mismatch
+)
+
+DEFAULT_PROBE_CONCURRENCY = 32
+DEFAULT_STT_CONCURRENCY = 1
+
+
+async def run_process_async(cmd, stdout_handler=None, stderr_handler=None, binary_stdout=False, timeout=None,
+                            stderr_lines=STDERR_LINES):
+    """process_runner.run_process의 asyncio 버전 → (returncode, 오류 코드, 메시지, stderr 줄)
+
+    작업이 취소되면 프로세스를 죽이고 CancelledError를 다시 올린다.
+    """
+    ring = deque(maxlen=stderr_lines)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+    except OSError as e:
+        return None, ERROR_EXEC, str(e), []
+
+    async def drain_stdout():
+        if binary_stdout:
+            while True:
+                chunk = await process.stdout.read(BINARY_READ_SIZE)
+                if not chunk:
+                    break
+                if stdout_handler:
+                    stdout_handler(chunk)
+        else:
+            async for raw in process.stdout:
+                if stdout_handler:
+                    stdout_handler(raw.decode('utf-8', 'replace').strip())
+
+    async def drain_stderr():
+        async for raw in process.stderr:
+            line = raw.decode('utf-8', 'replace').strip()
+            if stderr_handler:
+                stderr_handler(line)
+            if line and not is_progress_line(line):
+                ring.append(line)
+
+    async def communicate():
+        await asyncio.gather(drain_stdout(), drain_stderr())
+        return await process.wait()
+
+    try:
+        returncode = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        _kill(process)
+        await process.wait()
+        return process.returncode, ERROR_TIMEOUT, f'제한 시간 초과 ({timeout:.0f}s)', list(ring)
+    except asyncio.CancelledError:
+        _kill(process)
+        raise
+    lines = list(ring)
+    if returncode != 0:
+        code, message = classify_ffmpeg_error(lines, returncode)
+        return returncode, code, message, lines
+    return returncode, ERROR_NONE, '', lines
+
+
+def _kill(process):
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def probe_media_async(file_path, ffmpeg_path=None):
+    """media_probe.probe_media의 asyncio 버전 (실패 시 ProbeError)"""
+    loop = asyncio.get_running_loop()
+    file_path = Path(file_path)
+    errors = []
+
+    if file_path.suffix.lower() in MP4_EXTENSIONS:
+        try:
+            # 헤더 몇 KB만 읽는 순수 파이썬 파서 - 실행기 스레드에서
+            info = await loop.run_in_executor(None, probe_mp4, file_path)
+            if info.duration > 0:
+                return info
+        except (OSError, ProbeError) as e:
+            errors.append(f'mp4: {e}')
+
+    ffprobe_path = find_ffprobe(ffmpeg_path)
+    if ffprobe_path:
+        try:
+            stdout, stderr, returncode = await _capture(ffprobe_command(file_path, ffprobe_path))
+            if returncode != 0:
+                raise ProbeError(stderr.strip() or 'ffprobe 실패')
+            return parse_ffprobe_output(stdout)
+        except (OSError, ValueError, ProbeError) as e:
+            errors.append(f'ffprobe: {e}')
+
+    if ffmpeg_path:
+        try:
+            _, stderr, _ = await _capture(ffmpeg_header_command(file_path, ffmpeg_path))
+            return parse_ffmpeg_header(stderr)
+        except (OSError, ProbeError) as e:
+            errors.append(f'ffmpeg: {e}')
+
+    raise ProbeError('; '.join(errors) or '사용 가능한 프로브 방법이 없습니다')
+
+
+async def _capture(cmd):
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        _kill(process)
+        raise
+    return stdout.decode('utf-8', 'replace'), stderr.decode('utf-8', 'replace'), process.returncode
+
+
+class AsyncBatchConverter(BatchConverter):
+    """asyncio 기반 일괄 변환기 - 출력 경로/캐시/전사 규칙은 BatchConverter와 같다
+
+    probe_concurrency, workers(인코딩), stt_concurrency로 단계별 동시 실행 수를 제한한다.
+    """
+
+    def __init__(self, *args, probe_concurrency=DEFAULT_PROBE_CONCURRENCY,
+                 stt_concurrency=DEFAULT_STT_CONCURRENCY, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.probe_concurrency = probe_concurrency
+        self.stt_concurrency = stt_concurrency
+        self._semaphores = None
+        self._tasks = []
+        self._loop = None
+
+    def cancel(self):
+        """진행 중인 변환 취소 (다른 스레드에서 호출 가능)"""
+        super().cancel()
+        if self._loop is not None and not self._loop.is_closed():
+            for task in self._tasks:
+                self._loop.call_soon_threadsafe(task.cancel)
+
+    def semaphores(self):
+        """현재 이벤트 루프용 (프로브, 인코딩, STT) 세마포어"""
+        if self._semaphores is None:
+            if self.encode_limit:
+                # 조절기/장치 한도와 같은 ffmpeg 슬롯을 쓴다 (조절기의 한도는 실행 중에 바뀐다)
+                self._semaphores = (asyncio.Semaphore(self.probe_concurrency), self.encode_limit,
+                                    self.controller.stt if self.controller else
+                                    asyncio.Semaphore(self.stt_concurrency))
+            else:
+                self._semaphores = (asyncio.Semaphore(self.probe_concurrency),
+                                    asyncio.Semaphore(self.workers),
+                                    asyncio.Semaphore(self.stt_concurrency))
+        return self._semaphores
+
+    def hold_devices(self, paths):
+        """입력/출력 장치 슬롯 (장치 한도가 없으면 아무것도 잡지 않음)"""
+        return self.device_limits.hold_async(paths) if self.device_limits else nullcontext()
+
+    async def run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def probe_async(self, input_path, cached=None):
+        """입력 파일 프로브 (캐시 우선) - 실패 시 None"""
+        if cached is not None:
+            return cached
+        if self.probe_cache:
+            info = await self.run_blocking(self.probe_cache.get, input_path)
+            if info is not None:
+                return info
+        try:
+            info = await probe_media_async(input_path, self.ffmpeg_path)
+        except ProbeError:
+            return None
+        if self.probe_cache:
+            await self.run_blocking(self.probe_cache.put, input_path, info)
+        return info
+
+    async def encode_async(self, input_path, output_path, copy_suffix, callback, timeout):
+        """ffmpeg 인코딩 → (ConversionResult, PCM 배열 또는 None)"""
+        pcm_output = bool(self.transcriber)
+        cmd = build_encode_command(self.ffmpeg_path, input_path, output_path, self.bitrate,
+                                   bool(copy_suffix), pcm_output=pcm_output)
+        pcm = bytearray()
+
+        def on_progress(line):
+            seconds = progress_seconds(line)
+            if seconds is not None and callback:
+                callback(seconds)
+
+        start = time.time()
+        if pcm_output:
+            returncode, code, message, lines = await run_process_async(
+                cmd, pcm.extend, on_progress, binary_stdout=True, timeout=timeout)
+        else:
+            returncode, code, message, lines = await run_process_async(cmd, on_progress, timeout=timeout)
+        result = ConversionResult(input_path, output_path, code == ERROR_NONE, message, time.time() - start)
+        result.error_code = code
+        result.stderr_tail = lines
+        if not result.ok or not pcm_output:
+            return result, None
+        import numpy as np
+        usable = len(pcm) - len(pcm) % 4
+        return result, np.frombuffer(memoryview(pcm)[:usable], dtype=np.float32)
+
+    async def verify_async(self, output_path, expected_duration):
+        """batch_converter.verify_output의 asyncio 버전"""
+        try:
+            if os.path.getsize(output_path) == 0:
+                return '출력 파일이 비어 있습니다'
+        except OSError:
+            return '출력 파일이 없습니다'
+        if expected_duration <= 0:
+            return ''
+        try:
+            duration = (await probe_media_async(output_path, self.ffmpeg_path)).duration
+        except ProbeError as e:
+            return f'출력 파일을 읽을 수 없습니다: {e}'
+        return duration_mismatch(duration, expected_duration)
+
+    async def convert_one_async(self, input_path, progress_callback=None, info=None):
+        """파일 하나 변환 (프로브 → 캐시 확인 → 인코딩 → 검증 → STT)"""
+        input_path = Path(input_path)
+        try:
+            result = await self._convert_one_async(input_path, progress_callback, info)
+        except asyncio.CancelledError:
+            result = ConversionResult(input_path, self.output_path_for(input_path), False, '취소됨')
+            result.error_code = ERROR_CANCELLED
+            self.publish_result(result)
+            if self.cancel_event.is_set():
+                # cancel()에 의한 취소는 결과로 돌려준다
+                return result
+            raise
+        except Exception as e:
+            result = ConversionResult(input_path, self.output_path_for(input_path), False, str(e))
+        self.publish_result(result)
+        return result
+
+    async def _convert_one_async(self, input_path, progress_callback, info):
+        probe_semaphore, encode_semaphore, stt_semaphore = self.semaphores()
+        async with probe_semaphore:
+            self.notify_state(input_path, 'probing')
+            info = await self.probe_async(input_path, info)
+        duration = info.duration if info else 0.0
+        copy_suffix = copy_suffix_for(info, self.copy_mp3, self.copy_aac)
+        callback = self.progress_reporter(input_path, duration, progress_callback)
+        output_path = self.output_path_for(input_path, copy_suffix or '.mp3')
+        segmented = self.use_segments(info, copy_suffix)
+        params = self.encode_params(copy_suffix, segmented)
+        cached_result = await self.run_blocking(self.lookup_cached, input_path, output_path, params, duration)
+        if cached_result:
+            return cached_result
+        if self.output_dir:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        # 스테이징 복사가 끝나기를 기다릴 수 있으므로 실행기 스레드에서
+        source = await self.run_blocking(self.stager.acquire, input_path) if self.stager else input_path
+        try:
+            async with self.hold_devices([source, output_path]), encode_semaphore:
+                self.notify_state(input_path, 'encoding')
+                timeout = self.timeout_for(duration)
+                if segmented:
+                    # 구간 인코딩은 자체 프로세스 풀을 쓰므로 실행기 스레드에서
+                    from segment_encoder import encode_segmented
+                    result = await self.run_blocking(
+                        lambda: encode_segmented(self.ffmpeg_path, source, output_path, self.segments,
+                                                 self.bitrate, callback, self.cancel_event, info=info,
+                                                 timeout=timeout))
+                    audio = None
+                else:
+                    result, audio = await self.encode_async(source, output_path, copy_suffix, callback, timeout)
+        finally:
+            if self.stager:
+                self.stager.release(input_path)
+        result.input_path = Path(input_path)
+        result.duration = duration
+        result.stream_copy = bool(copy_suffix)
+        result.job_kind = self.job_kind(copy_suffix, segmented)
+        if result.ok:
+            async with probe_semaphore:
+                error = await self.verify_async(output_path, duration)
+            if error:
+                result.ok = False
+                result.error = error
+        if result.ok and self.transcriber:
+            async with stt_semaphore:
+                self.notify_state(input_path, 'transcribing')
+                await self.run_blocking(self.write_transcript, result, audio)
+            if self.controller:
+                self.controller.add_work('stt', duration)
+        await self.run_blocking(self.record_cached, result, params)
+        await self.run_blocking(self.record_history, result)
+        return result
+
+    async def convert_many(self, paths, progress_callback=None):
+        """여러 파일을 동시에 변환하며 끝나는 순서대로 ConversionResult를 내보내는 비동기 제너레이터
+
+        제너레이터를 중간에 닫으면 남은 작업은 취소된다.
+        """
+        if not self.ffmpeg_path:
+            raise RuntimeError('ffmpeg를 찾을 수 없습니다')
+        self.cancel_event.clear()
+        self._semaphores = None
+        self._loop = asyncio.get_running_loop()
+        paths = [Path(p) for p in paths]
+        cached = await self.run_blocking(self.probe_cache.get_many, paths) if self.probe_cache else {}
+        units = await self.run_blocking(self.plan_jobs, paths, cached)
+        start = time.monotonic()
+
+        async def run(indexes):
+            if len(indexes) > 1:
+                return await self.convert_group_async([paths[i] for i in indexes], cached, progress_callback)
+            path = paths[indexes[0]]
+            return [await self.convert_one_async(path, progress_callback, cached.get(os.path.abspath(path)))]
+
+        # 세마포어는 기다린 순서대로 열리므로 작업 생성 순서가 곧 (대략의) 인코딩 순서다
+        self._tasks = tasks = [asyncio.ensure_future(run(unit)) for unit in units]
+        if self.controller:
+            self.controller.start()
+        if self.stager:
+            self.stager.plan([paths[i] for unit in units for i in unit], self.progress_bus)
+        try:
+            for future in asyncio.as_completed(tasks):
+                for result in await future:
+                    yield result
+            if self.last_schedule:
+                self.last_schedule.finish(time.monotonic() - start)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.controller:
+                self.controller.stop()
+            if self.stager:
+                await self.run_blocking(self.stager.finish)
+
+    async def convert_group_async(self, paths, infos, progress_callback=None):
+        """짧은 파일 묶음을 인코딩 슬롯 하나에서 ffmpeg 한 번으로 변환 → 결과 목록"""
+        try:
+            if self.encode_limit:
+                # convert_group이 실행기 스레드에서 장치/ffmpeg 슬롯을 직접 잡는다
+                return await self.run_blocking(self.convert_group, paths, infos, progress_callback)
+            async with self.semaphores()[1]:
+                return await self.run_blocking(self.convert_group, paths, infos, progress_callback)
+        except asyncio.CancelledError:
+            if not self.cancel_event.is_set():
+                raise
+            results = []
+            for path in paths:
+                result = ConversionResult(path, self.output_path_for(path), False, '취소됨')
+                result.error_code = ERROR_CANCELLED
+                self.publish_result(result)
+                results.append(result)
+            return results
+        except Exception as e:
+            results = [ConversionResult(path, self.output_path_for(path), False, str(e)) for path in paths]
+            for result in results:
+                self.publish_result(result)
+            return results
+
+
+async def convert_many(paths, progress_callback=None, **options):
+    """AsyncBatchConverter(**options).convert_many(paths)의 단축형"""
+    converter = AsyncBatchConverter(**options)
+    async for result in converter.convert_many(paths, progress_callback):
+        yield result
+
+
+class EventLoopThread:
+    """전용 스레드에서 도는 asyncio 이벤트 루프 - Tk 같은 동기 프런트엔드용"""
+
+    def __init__(self, name='mp4tomp3-asyncio'):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """코루틴을 루프에 넣고 concurrent.futures.Future 반환 (어느 스레드에서나 호출 가능)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
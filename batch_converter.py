@@ -0,0 +1,959 @@
+#!/usr/bin/env python3
+"""
+헤드리스 일괄 변환 엔진 - Tk 없이 ffmpeg 프로세스 풀로 MP4 → MP3 변환
+"""
+
+import os
+import sys
+import glob
+import time
+import shutil
+import platform
+import threading
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from media_probe import probe_media, ProbeError
+from process_runner import run_process, progress_seconds, ERROR_CANCELLED
+from job_scheduler import ScheduleReport, simulate_makespan, order_units, interleave
+
+DEFAULT_BITRATE = '192k'
+DEFAULT_EXTENSIONS = ('.mp4',)
+
+# Whisper 입력 형식 (16 kHz 모노 float32)
+WHISPER_SAMPLE_RATE = 16000
+
+# 파일별 ffmpeg 제한 시간 자동 계산: max(최소값, 입력 길이 × 배수)
+MIN_TIMEOUT = 300
+TIMEOUT_PER_SECOND = 1.0
+
+# 짧은 파일 묶음 변환: ffmpeg 한 번에 넣는 최대 파일 수, 대상이 되는 최대 길이(초)
+DEFAULT_GROUP_SIZE = 32
+GROUP_MAX_DURATION = 30.0
+
+# 인코딩은 끝났고 전사를 기다리는 파일 수 한도 (파일마다 PCM 전체를 메모리에 들고 있음)
+DEFAULT_STT_QUEUE = 2
+
+# 장치 한도를 쓸 때 작업자 스레드 수 배율 (장치를 기다리는 스레드 몫)
+DEVICE_WAIT_THREADS = 4
+
+# 구간 병렬 인코딩을 적용할 최소 길이 (초)
+SEGMENT_MIN_DURATION = 20 * 60
+
+# 스트림 복사(재인코딩 없음)가 가능한 원본 코덱 → 출력 확장자
+COPY_SUFFIXES = {
+    'mp3': '.mp3',
+    'aac': '.m4a',
+}
+
+
+def find_ffmpeg():
+    """ffmpeg 경로 확인 (번들 → 시스템 순서)"""
+    if getattr(sys, 'frozen', False):
+        app_dir = Path(getattr(sys, '_MEIPASS', os.path.dirname(sys.executable)))
+    else:
+        app_dir = Path(__file__).resolve().parent
+
+    exe_name = 'ffmpeg.exe' if platform.system() == 'Windows' else 'ffmpeg'
+    possible_paths = [
+        app_dir / exe_name,
+        app_dir.parent / 'MacOS' / exe_name,
+    ]
+    if platform.system() == 'Darwin':
+        possible_paths += [Path('/opt/homebrew/bin/ffmpeg'), Path('/usr/local/bin/ffmpeg')]
+
+    for path in possible_paths:
+        if path.exists():
+            return str(path)
+
+    return shutil.which('ffmpeg')
+
+
+def expand_inputs(patterns, extensions=DEFAULT_EXTENSIONS, recursive=False):
+    """파일/폴더/글롭 패턴을 입력 파일 목록으로 확장 (중복 제거, 순서 유지)"""
+    extensions = tuple(ext.lower() for ext in extensions)
+    found = []
+    seen = set()
+
+    def add(path):
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            found.append(Path(path))
+
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            walker = path.rglob('*') if recursive else path.iterdir()
+            for child in sorted(walker):
+                if child.is_file() and child.suffix.lower() in extensions:
+                    add(child)
+        elif path.is_file():
+            add(path)
+        else:
+            for match in sorted(glob.glob(pattern, recursive=recursive)):
+                if os.path.isfile(match) and Path(match).suffix.lower() in extensions:
+                    add(match)
+    return found
+
+
+def default_workers():
+    """기본 작업자 수 (CPU 코어 수)"""
+    return os.cpu_count() or 1
+
+
+def build_encode_command(ffmpeg_path, input_path, output_path, bitrate=DEFAULT_BITRATE, stream_copy=False,
+                         pcm_output=False):
+    """libmp3lame 인코딩 명령 생성
+
+    stream_copy면 첫 오디오 스트림을 그대로 리먹스한다.
+    pcm_output이면 같은 디코딩 결과로 Whisper용 16 kHz 모노 float32 PCM을 stdout에
+    두 번째 출력으로 내보내고, 진행률은 stderr로 보낸다.
+    """
+    if stream_copy:
+        codec_args = ['-map', '0:a:0', '-c:a', 'copy']
+    else:
+        codec_args = ['-acodec', 'libmp3lame', '-ab', bitrate]
+    cmd = [
+        ffmpeg_path,
+        '-hide_banner',
+        '-loglevel', 'error',
+        '-nostdin',
+        '-i', str(input_path),
+        '-vn',
+        *codec_args,
+        '-y',
+        '-progress', 'pipe:2' if pcm_output else 'pipe:1',
+        str(output_path)
+    ]
+    if pcm_output:
+        cmd += [
+            '-map', '0:a:0',
+            '-vn',
+            '-ac', '1',
+            '-ar', str(WHISPER_SAMPLE_RATE),
+            '-acodec', 'pcm_f32le',
+            '-f', 'f32le',
+            'pipe:1'
+        ]
+    return cmd
+
+
+def copy_suffix_for(info, copy_mp3=False, copy_aac=False):
+    """프로브 결과로 스트림 복사 가능 여부 판단 → 출력 확장자 또는 None"""
+    if info is None or not info.has_audio:
+        return None
+    if info.audio_codec == 'mp3' and copy_mp3:
+        return COPY_SUFFIXES['mp3']
+    if info.audio_codec == 'aac' and copy_aac:
+        return COPY_SUFFIXES['aac']
+    return None
+
+
+class ConversionResult:
+    """파일 하나의 변환 결과"""
+
+    def __init__(self, input_path, output_path, ok, error='', elapsed=0.0, duration=0.0):
+        self.input_path = Path(input_path)
+        self.output_path = Path(output_path)
+        self.ok = ok
+        self.error = error
+        self.elapsed = elapsed
+        self.duration = duration
+        self.stream_copy = False
+        self.transcript_path = None
+        # 변환 캐시에서 유효한 결과를 찾아 건너뜀
+        self.skipped = False
+        # 실패 원인 분류 (process_runner.ERROR_*)와 ffmpeg stderr 마지막 줄들
+        self.error_code = ''
+        self.stderr_tail = []
+        # 인코딩 방식 (job_scheduler 속도 기록 키: subprocess, pyav, copy, segmented, group, ...+stt)
+        self.job_kind = ''
+
+    @property
+    def speed(self):
+        """실시간 대비 처리 속도 (배속)"""
+        return self.duration / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        status = ('skipped' if self.skipped else 'ok') if self.ok else f'failed: {self.error}'
+        return f"ConversionResult({self.input_path.name}, {status})"
+
+
+class ConversionJob:
+    """파이프라인(프로브 → 인코딩 → STT)을 지나는 실행 단위 - 단독 파일 하나 또는 짧은 파일 묶음"""
+
+    def __init__(self, paths, progress_callback=None, info=None, indexes=None):
+        self.paths = [Path(p) for p in paths]
+        self.indexes = indexes
+        self.progress_callback = progress_callback
+        # 단독 파일이면 MediaInfo(없으면 프로브 단계에서 채움), 묶음이면 {절대경로: MediaInfo}
+        self.info = info
+        # 단독 파일의 인코딩 설정 (프로브 단계에서 채움)
+        self.copy_suffix = None
+        self.segmented = False
+        self.params = None
+        self.output_path = None
+        self.callback = None
+        # 인코딩 결과와 전사할 PCM (STT 단계에서 비움)
+        self.audio = None
+        self.results = []
+
+    @property
+    def grouped(self):
+        return len(self.paths) > 1
+
+
+def run_ffmpeg(cmd, input_path, output_path, progress_callback=None, cancel_event=None, timeout=None):
+    """-progress pipe:1 로 실행되는 ffmpeg 명령 실행 → ConversionResult
+
+    progress_callback(seconds)는 ffmpeg가 보고한 출력 시간(초)으로 호출된다.
+    timeout(초)이 지나면 프로세스를 죽이고 실패로 처리한다.
+    """
+    def on_stdout(line):
+        seconds = progress_seconds(line)
+        if seconds is not None and progress_callback:
+            progress_callback(seconds)
+
+    process = run_process(cmd, on_stdout, timeout=timeout, cancel_event=cancel_event)
+    return conversion_result(input_path, output_path, process)
+
+
+def build_group_command(ffmpeg_path, jobs, bitrate=DEFAULT_BITRATE):
+    """여러 입력을 한 ffmpeg 프로세스에서 각자의 MP3로 변환하는 명령
+
+    jobs: [(입력 경로, 출력 경로)] - 입력 i의 첫 오디오 스트림이 출력 i로 간다.
+    """
+    cmd = [
+        ffmpeg_path,
+        '-hide_banner',
+        '-loglevel', 'error',
+        '-nostdin',
+        '-y',
+        '-progress', 'pipe:1',
+    ]
+    for input_path, _ in jobs:
+        cmd += ['-i', str(input_path)]
+    for index, (_, output_path) in enumerate(jobs):
+        cmd += ['-map', f'{index}:a:0', '-acodec', 'libmp3lame', '-ab', bitrate, str(output_path)]
+    return cmd
+
+
+def encode_group(ffmpeg_path, jobs, bitrate=DEFAULT_BITRATE, progress_callback=None, cancel_event=None,
+                 timeout=None):
+    """짧은 파일 여러 개를 ffmpeg 한 번으로 변환 → ProcessResult
+
+    progress_callback(seconds)에는 출력들이 공통으로 진행한 시간(초)이 전달된다.
+    입력 하나라도 열 수 없으면 전체가 실패하므로, 호출자가 파일별로 다시 시도해야 한다.
+    """
+    def on_stdout(line):
+        seconds = progress_seconds(line)
+        if seconds is not None and progress_callback:
+            progress_callback(seconds)
+
+    return run_process(build_group_command(ffmpeg_path, jobs, bitrate), on_stdout,
+                       timeout=timeout, cancel_event=cancel_event)
+
+
+def conversion_result(input_path, output_path, process):
+    """ProcessResult → ConversionResult"""
+    result = ConversionResult(input_path, output_path, process.ok, process.message, process.elapsed)
+    result.error_code = process.error_code
+    result.stderr_tail = process.stderr_lines
+    return result
+
+
+def encode_file(ffmpeg_path, input_path, output_path, bitrate=DEFAULT_BITRATE,
+                progress_callback=None, cancel_event=None, stream_copy=False, timeout=None):
+    """ffmpeg 한 프로세스로 파일 하나 변환"""
+    cmd = build_encode_command(ffmpeg_path, input_path, output_path, bitrate, stream_copy)
+    return run_ffmpeg(cmd, input_path, output_path, progress_callback, cancel_event, timeout)
+
+
+def encode_with_pcm(ffmpeg_path, input_path, output_path, bitrate=DEFAULT_BITRATE,
+                    progress_callback=None, cancel_event=None, stream_copy=False, timeout=None):
+    """한 번의 디코딩으로 MP3 파일과 Whisper용 PCM 배열을 함께 생성
+
+    (ConversionResult, numpy.ndarray 또는 None) 반환.
+    """
+    import numpy as np
+
+    cmd = build_encode_command(ffmpeg_path, input_path, output_path, bitrate, stream_copy, pcm_output=True)
+    pcm = bytearray()
+
+    def on_stderr(line):
+        # 진행률(key=value)과 오류 메시지가 함께 들어온다
+        seconds = progress_seconds(line)
+        if seconds is not None and progress_callback:
+            progress_callback(seconds)
+
+    process = run_process(cmd, pcm.extend, on_stderr, binary_stdout=True,
+                          timeout=timeout, cancel_event=cancel_event)
+    result = conversion_result(input_path, output_path, process)
+    if not result.ok:
+        return result, None
+    usable = len(pcm) - len(pcm) % 4
+    # bytearray를 잘라 복사하면 긴 파일에서 최대 메모리가 두 배가 되므로 memoryview로
+    audio = np.frombuffer(memoryview(pcm)[:usable], dtype=np.float32)
+    return result, audio
+
+
+def verify_output(output_path, expected_duration=0.0, ffmpeg_path=None):
+    """출력 파일 검증 - 문제가 있으면 오류 메시지, 정상이면 ''
+
+    파일이 있고 비어 있지 않으며, 입력 길이를 알면 출력 길이가 그와 맞는지 확인한다.
+    """
+    try:
+        if os.path.getsize(output_path) == 0:
+            return '출력 파일이 비어 있습니다'
+    except OSError:
+        return '출력 파일이 없습니다'
+    if expected_duration <= 0:
+        return ''
+    try:
+        duration = probe_media(output_path, ffmpeg_path).duration
+    except ProbeError as e:
+        return f'출력 파일을 읽을 수 없습니다: {e}'
+    return duration_mismatch(duration, expected_duration)
+
+
+def duration_mismatch(duration, expected_duration):
+    """출력 길이가 원본과 허용 오차(1초 또는 1%) 이상 다르면 오류 메시지, 아니면 ''"""
+    tolerance = max(1.0, expected_duration * 0.01)
+    if abs(duration - expected_duration) > tolerance:
+        return f'출력 길이 불일치 ({duration:.1f}s / 원본 {expected_duration:.1f}s)'
+    return ''
+
+
+def whisper_transcriber(model, language='ko'):
+    """로드된 Whisper 모델로 PCM 배열을 전사하는 함수 생성 (작업자 간 직렬화)"""
+    lock = threading.Lock()
+
+    def transcribe(audio):
+        with lock:
+            result = model.transcribe(audio, language=language, fp16=False)
+        return result.get('text', '').strip()
+
+    return transcribe
+
+
+class BatchConverter:
+    """ffmpeg 프로세스 풀 기반 일괄 변환기"""
+
+    def __init__(self, ffmpeg_path=None, workers=None, bitrate=DEFAULT_BITRATE, output_dir=None,
+                 probe_cache=None, copy_mp3=False, copy_aac=False, transcriber=None,
+                 conversion_cache=None, force=False, state_callback=None, segments=0,
+                 segment_min_duration=None, progress_bus=None, timeout=None, backend='subprocess',
+                 group_size=0, group_max_duration=GROUP_MAX_DURATION, schedule=None, history=None,
+                 controller=None, device_limits=None, stager=None, stt_workers=1, stt_queue=DEFAULT_STT_QUEUE,
+                 stt_params=None):
+        self.ffmpeg_path = ffmpeg_path or find_ffmpeg()
+        self.workers = max(1, workers or default_workers())
+        self.bitrate = bitrate
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.probe_cache = probe_cache
+        # 재인코딩 없이 스트림 복사 (MP3 원본 → .mp3, AAC 원본 → .m4a)
+        self.copy_mp3 = copy_mp3
+        self.copy_aac = copy_aac
+        # transcriber(audio) → text, 설정되면 인코딩과 같은 디코딩에서 PCM을 받아 전사
+        self.transcriber = transcriber
+        # 전사 결과를 바꾸는 설정 (모델 이름/파일 해시, 언어, 방식) - 변환 캐시 키에 들어간다
+        self.stt_params = stt_params
+        # 파이프라인 STT 단계 작업자 수(조절기가 있으면 조절기 최대값)와 전사를 기다릴 수 있는 파일 수
+        self.stt_workers = max(1, stt_workers or 1)
+        self.stt_queue = max(1, stt_queue)
+        self.last_pipeline = None
+        # 같은 입력/파라미터의 유효한 출력이 있으면 건너뜀 (force면 항상 변환)
+        self.conversion_cache = conversion_cache
+        self.force = force
+        # state_callback(input_path, state)로 probing/encoding/transcribing 단계 통지
+        self.state_callback = state_callback
+        # segments > 1이면 segment_min_duration(초) 이상인 파일을 구간 병렬 인코딩
+        self.segments = segments
+        self.segment_min_duration = SEGMENT_MIN_DURATION if segment_min_duration is None else segment_min_duration
+        # ProgressBus가 있으면 단계/진행률 이벤트를 발행 (job_id는 입력 경로 문자열)
+        self.progress_bus = progress_bus
+        # 파일별 ffmpeg 제한 시간(초) - None이면 입력 길이로 계산, 0이면 제한 없음
+        self.timeout = timeout
+        # 'subprocess'(ffmpeg 실행 파일) 또는 'pyav'(작업자 프로세스 안에서 libav 호출)
+        self.backend = backend
+        self.pyav_encoder = None
+        # 여러 작업자 스레드가 동시에 첫 PyAV 인코딩을 시작해도 작업자 풀은 하나만
+        self.pyav_lock = threading.Lock()
+        # group_size > 1이면 group_max_duration초 이하 파일을 길이순으로 묶어 ffmpeg 한 번에 변환
+        self.group_size = group_size
+        self.group_max_duration = group_max_duration
+        # schedule('lpt', 'spt', 'fifo')이 있으면 예상 소요 시간으로 작업 순서를 정하고,
+        # history(job_scheduler.EncodeHistory)에 실제 속도를 기록해 다음 예측에 쓴다
+        self.schedule = schedule
+        self.history = history
+        self.last_schedule = None
+        # controller(concurrency_controller.ConcurrencyController)가 있으면 workers 대신
+        # 조절기가 ffmpeg/STT 동시 실행 수를 정한다
+        self.controller = controller
+        # device_limits(device_limits.DeviceLimiter)가 있으면 입력/출력 장치별 동시 작업 수도 제한한다.
+        # 장치를 기다리는 작업이 ffmpeg 슬롯을 붙잡지 않도록 작업자 스레드는 넉넉히 두고
+        # ffmpeg 동시 실행 수는 encode_limit으로 따로 센다
+        self.device_limits = device_limits
+        if controller:
+            self.encode_limit = controller.encode
+        elif device_limits:
+            from concurrency_controller import AdjustableLimit
+            self.encode_limit = AdjustableLimit('encode', self.workers)
+        else:
+            self.encode_limit = None
+        # stager(prefetch_stager.PrefetchStager)가 있으면 느린 마운트의 입력을 미리 로컬로 복사해 읽는다
+        self.stager = stager
+        self.cancel_event = threading.Event()
+
+    def output_path_for(self, input_path, suffix='.mp3'):
+        """입력 파일에 대응하는 출력 경로"""
+        input_path = Path(input_path)
+        if self.output_dir:
+            return self.output_dir / input_path.with_suffix(suffix).name
+        return input_path.with_suffix(suffix)
+
+    def cancel(self):
+        """진행 중인 변환 취소"""
+        self.cancel_event.set()
+
+    def close(self):
+        """PyAV 작업자 프로세스 종료"""
+        with self.pyav_lock:
+            encoder, self.pyav_encoder = self.pyav_encoder, None
+        if encoder:
+            encoder.close()
+
+    def encode_pyav(self, input_path, output_path, progress_callback=None, timeout=None):
+        """PyAV 백엔드 인코딩 → (ConversionResult, PCM 배열 또는 None, 출력 길이)"""
+        from pyav_backend import PyAVEncoder
+        with self.pyav_lock:
+            if self.pyav_encoder is None:
+                self.pyav_encoder = PyAVEncoder(self.workers)
+            encoder = self.pyav_encoder
+        outcome = encoder.encode(input_path, output_path, self.bitrate, bool(self.transcriber),
+                                 progress_callback, self.cancel_event, timeout)
+        result = ConversionResult(input_path, output_path, outcome['ok'], outcome['error'], outcome['elapsed'])
+        result.error_code = outcome['error_code']
+        return result, outcome['pcm'], outcome['output_duration']
+
+    def notify_state(self, input_path, state):
+        if self.state_callback:
+            self.state_callback(input_path, state)
+        if self.progress_bus:
+            self.progress_bus.publish(str(input_path), state)
+
+    def publish_result(self, result):
+        if self.progress_bus:
+            self.progress_bus.publish(str(result.input_path), 'done' if result.ok else 'failed',
+                                      fraction=1.0 if result.ok else None, message=result.error)
+
+    def probe(self, input_path, cached=None):
+        """입력 파일 프로브 (캐시 우선) - 실패 시 None"""
+        if cached is not None:
+            return cached
+        try:
+            if self.probe_cache:
+                return self.probe_cache.probe(input_path, self.ffmpeg_path)
+            return probe_media(input_path, self.ffmpeg_path)
+        except ProbeError:
+            return None
+
+    def encode_params(self, copy_suffix, segmented=False):
+        """변환 캐시 키에 들어가는 인코딩 파라미터"""
+        params = {
+            'codec': 'copy' if copy_suffix else 'libmp3lame',
+            'bitrate': None if copy_suffix else self.bitrate,
+            'suffix': copy_suffix or '.mp3',
+            # 모델/언어/방식이 바뀌면 변환 캐시를 건너뛰고 전사 캐시에서 다시 찾는다
+            'stt': (self.stt_params or True) if self.transcriber else False,
+        }
+        if segmented:
+            # 구간 인코딩은 비트 저장소를 끄므로 출력이 단일 인코딩과 다르다
+            params['segmented'] = True
+        return params
+
+    def timeout_for(self, duration):
+        """파일 하나의 ffmpeg 제한 시간 (None이면 제한 없음)"""
+        if self.timeout is None:
+            return max(MIN_TIMEOUT, duration * TIMEOUT_PER_SECOND)
+        return self.timeout or None
+
+    def use_segments(self, info, copy_suffix):
+        """구간 병렬 인코딩 대상인지 (STT는 PCM을 한 번에 받아야 하므로 제외)"""
+        return (self.segments > 1 and not copy_suffix and not self.transcriber
+                and info is not None and info.duration >= self.segment_min_duration)
+
+    @contextmanager
+    def staged_inputs(self, paths):
+        """ffmpeg가 읽을 경로 목록 (스테이징된 복사본 또는 원본) - 끝나면 복사본 정리"""
+        if not self.stager:
+            yield list(paths)
+            return
+        sources = []
+        try:
+            for path in paths:
+                sources.append(self.stager.acquire(path))
+            yield sources
+        finally:
+            for path in paths[:len(sources)]:
+                self.stager.release(path)
+
+    @contextmanager
+    def encode_slot(self, paths):
+        """paths(입력/출력)가 걸친 장치 슬롯 → ffmpeg 실행 슬롯 순으로 잡음
+
+        encode_limit이 없으면 작업자 스레드 수가 곧 ffmpeg 한도다.
+        """
+        with self.device_limits.hold(paths) if self.device_limits else nullcontext():
+            with self.encode_limit or nullcontext():
+                yield
+
+    def stt_slot(self):
+        return self.controller.stt if self.controller else nullcontext()
+
+    def job_kind(self, copy_suffix, segmented=False, grouped=False):
+        """인코딩 방식 → 속도 기록 키"""
+        if copy_suffix:
+            kind = 'copy'
+        elif grouped:
+            kind = 'group'
+        elif segmented:
+            kind = 'segmented'
+        else:
+            kind = self.backend
+        return kind + '+stt' if self.transcriber else kind
+
+    def estimate_seconds(self, info, grouped=False):
+        """파일 하나의 예상 소요 시간 (기록이 없으면 기본 속도)"""
+        from job_scheduler import EncodeHistory
+
+        copy_suffix = copy_suffix_for(info, self.copy_mp3, self.copy_aac)
+        kind = self.job_kind(copy_suffix, self.use_segments(info, copy_suffix), grouped)
+        duration = info.duration if info else 0.0
+        if self.history is None:
+            self.history = EncodeHistory()
+        return self.history.estimate(kind, duration)
+
+    def record_history(self, result):
+        """실제로 인코딩한 결과의 속도 기록"""
+        if self.history is None or not result.ok or result.skipped or not result.job_kind:
+            return
+        try:
+            self.history.record(result.job_kind, result.duration, result.elapsed)
+        except Exception as e:
+            print(f"인코딩 속도 기록 실패: {e}")
+
+    def probe_all(self, paths, infos):
+        """infos({절대경로: MediaInfo})에 없는 파일을 작업자 수만큼 동시에 프로브해 채움"""
+        missing = [path for path in paths if os.path.abspath(path) not in infos]
+        if not missing:
+            return infos
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for path, info in zip(missing, executor.map(self.probe, missing)):
+                if info is not None:
+                    infos[os.path.abspath(path)] = info
+        return infos
+
+    def plan_jobs(self, paths, infos):
+        """실행 단위(paths 인덱스 목록)를 실행 순서대로 반환
+
+        묶음 변환이나 스케줄이 켜져 있으면 모든 파일을 먼저 프로브한다. 스케줄이 있으면
+        예상 makespan을 담은 ScheduleReport를 last_schedule에 남긴다. 장치 한도가 있으면
+        한 장치의 작업이 작업자를 모두 차지하지 않도록 장치별로 번갈아 배치한다.
+        """
+        self.last_schedule = None
+        if self.group_size > 1:
+            groups, singles = self.plan_groups(paths, infos)
+        elif self.schedule:
+            self.probe_all(paths, infos)
+            groups, singles = [], list(range(len(paths)))
+        else:
+            groups, singles = [], list(range(len(paths)))
+        # 입력 순서 (묶음은 첫 파일 위치)
+        units = sorted([[index] for index in singles] + groups, key=min)
+        if self.schedule:
+            units = self.schedule_units(paths, infos, units)
+        if self.device_limits:
+            units = interleave(units, lambda unit: self.device_limits.device_key(paths[unit[0]]))
+        return units
+
+    def schedule_units(self, paths, infos, units):
+        """예상 소요 시간으로 실행 단위 정렬 + last_schedule 기록"""
+
+        def estimate(unit):
+            grouped = len(unit) > 1
+            return sum(self.estimate_seconds(infos.get(os.path.abspath(paths[i])), grouped) for i in unit)
+
+        estimated = [(unit, estimate(unit)) for unit in units]
+        ordered = order_units(estimated, self.schedule)
+        self.last_schedule = ScheduleReport(
+            self.schedule, self.workers, len(units),
+            simulate_makespan([seconds for _, seconds in ordered], self.workers),
+            simulate_makespan([seconds for _, seconds in estimated], self.workers)
+        )
+        return [unit for unit, _ in ordered]
+
+    def groupable(self, info, copy_suffix):
+        """묶음 변환 대상인지 (재인코딩하는 짧은 오디오 파일, STT 없음)"""
+        return (self.group_size > 1 and self.backend == 'subprocess' and not copy_suffix
+                and not self.transcriber and info is not None and info.has_audio
+                and 0 < info.duration <= self.group_max_duration)
+
+    def plan_groups(self, paths, infos):
+        """짧은 파일을 길이순으로 group_size개씩 묶음 → (묶음 목록, 단독 변환 목록)
+
+        둘 다 paths의 인덱스 목록이다. infos({절대경로: MediaInfo})에 없는 파일은 여기서
+        프로브해 채워 넣는다.
+        """
+        small = []
+        singles = []
+        self.probe_all(paths, infos)
+        for index, path in enumerate(paths):
+            info = infos.get(os.path.abspath(path))
+            if self.groupable(info, copy_suffix_for(info, self.copy_mp3, self.copy_aac)):
+                small.append((info.duration, index))
+            else:
+                singles.append(index)
+        small.sort()
+        groups = [[index for _, index in small[i:i + self.group_size]]
+                  for i in range(0, len(small), self.group_size)]
+        # 한 파일뿐인 묶음은 단독 변환
+        singles += [group[0] for group in groups if len(group) == 1]
+        return [group for group in groups if len(group) > 1], singles
+
+    def convert_group(self, paths, infos, progress_callback=None):
+        """짧은 파일 묶음을 ffmpeg 한 번으로 변환하고 입력 순서대로 결과 반환
+
+        묶음 실행이 실패하면 원인 파일을 가리기 위해 파일별로 다시 변환한다.
+        """
+        from segment_encoder import mp3_duration
+
+        paths = [Path(p) for p in paths]
+        results = {}
+        jobs = []
+        for path in paths:
+            self.notify_state(path, 'probing')
+            info = self.probe(path, infos.get(os.path.abspath(path)))
+            copy_suffix = copy_suffix_for(info, self.copy_mp3, self.copy_aac)
+            if not self.groupable(info, copy_suffix):
+                results[path] = self._convert_one(path, progress_callback, info)
+                continue
+            output_path = self.output_path_for(path)
+            params = self.encode_params(None)
+            cached_result = self.lookup_cached(path, output_path, params, info.duration)
+            if cached_result:
+                results[path] = cached_result
+                continue
+            jobs.append((path, output_path, info, params))
+
+        if jobs:
+            if self.output_dir:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+            reporters = []
+            for path, _, info, _ in jobs:
+                self.notify_state(path, 'encoding')
+                reporters.append((self.progress_reporter(path, info.duration, progress_callback), info.duration))
+
+            def report(seconds):
+                for reporter, duration in reporters:
+                    if reporter:
+                        reporter(min(seconds, duration))
+
+            total = sum(info.duration for _, _, info, _ in jobs)
+            with self.staged_inputs([job[0] for job in jobs]) as sources:
+                outputs = [output_path for _, output_path, _, _ in jobs]
+                with self.encode_slot(sources + outputs):
+                    process = encode_group(self.ffmpeg_path, list(zip(sources, outputs)),
+                                           self.bitrate, report, self.cancel_event, self.timeout_for(total))
+            for path, output_path, info, params in jobs:
+                if process.error_code == ERROR_CANCELLED:
+                    result = conversion_result(path, output_path, process)
+                elif not process.ok:
+                    result = self._convert_one(path, progress_callback, info)
+                else:
+                    # 파일별 소요 시간은 길이 비율로 나눈다
+                    result = ConversionResult(path, output_path, True, '', process.elapsed * info.duration / total,
+                                              info.duration)
+                    result.job_kind = self.job_kind(None, grouped=True)
+                    try:
+                        # 프레임 헤더로 길이 확인 (파일마다 ffprobe를 띄우지 않음)
+                        error = duration_mismatch(mp3_duration(output_path), info.duration)
+                    except OSError as e:
+                        error = str(e)
+                    if error:
+                        result.ok = False
+                        result.error = error
+                    self.record_cached(result, params)
+                results[path] = result
+
+        ordered = [results[path] for path in paths]
+        for result in ordered:
+            self.record_history(result)
+            self.publish_result(result)
+        return ordered
+
+    def lookup_cached(self, input_path, output_path, params, duration):
+        """유효한 캐시 결과가 있으면 건너뛴 ConversionResult, 없으면 None"""
+        if not self.conversion_cache or self.force:
+            return None
+        outputs = self.conversion_cache.lookup(input_path, params, [output_path])
+        if outputs is None:
+            return None
+        result = ConversionResult(input_path, output_path, True, duration=duration)
+        result.skipped = True
+        result.stream_copy = params['codec'] == 'copy'
+        transcripts = [p for p in outputs if p.endswith('.txt')]
+        if transcripts:
+            result.transcript_path = Path(transcripts[0])
+        return result
+
+    def record_cached(self, result, params):
+        """성공한 변환의 출력 파일을 캐시에 기록"""
+        if not self.conversion_cache or not result.ok:
+            return
+        outputs = [result.output_path]
+        if result.transcript_path:
+            outputs.append(result.transcript_path)
+        try:
+            self.conversion_cache.record(result.input_path, params, outputs)
+        except OSError as e:
+            print(f"변환 캐시 기록 실패: {e}")
+
+    def write_transcript(self, result, audio):
+        """PCM 배열 전사 후 출력 파일 옆에 .txt 저장
+
+        전사 시간은 result.elapsed에 더한다 ('+stt' 속도 기록이 인코딩+전사 시간을 배우도록).
+        """
+        start = time.monotonic()
+        try:
+            text = self.transcriber(audio) if audio is not None and len(audio) else ''
+        except Exception as e:
+            result.ok = False
+            result.error = f'STT 오류: {e}'
+            return
+        finally:
+            result.elapsed += time.monotonic() - start
+        if text:
+            result.transcript_path = result.output_path.with_suffix('.txt')
+            with open(result.transcript_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+    def progress_reporter(self, input_path, duration, progress_callback=None):
+        """ffmpeg 진행 시간(초) 콜백 생성 - progress_callback 호출 + 버스 발행"""
+        if not progress_callback and not self.progress_bus and not self.controller:
+            return None
+        job_id = str(input_path)
+        try:
+            size = os.path.getsize(input_path)
+        except OSError:
+            size = 0
+        start = time.monotonic()
+        reported = [0.0]
+
+        def report(seconds):
+            if self.controller and seconds > reported[0]:
+                self.controller.add_work('encode', seconds - reported[0])
+                reported[0] = seconds
+            if progress_callback:
+                progress_callback(input_path, seconds, duration)
+            if self.progress_bus and duration > 0:
+                fraction = min(seconds / duration, 1.0)
+                elapsed = time.monotonic() - start
+                self.progress_bus.publish(job_id, 'encoding', fraction, int(size * fraction),
+                                          seconds / elapsed if elapsed > 0 else None)
+        return report
+
+    def convert_one(self, input_path, progress_callback=None, info=None):
+        """파일 하나 변환 (프로브 → 캐시 확인 → 인코딩 → STT)
+
+        progress_callback(input_path, seconds, duration)는 호출한 스레드에서 실행된다.
+        """
+        result = self._convert_one(Path(input_path), progress_callback, info)
+        self.record_history(result)
+        self.publish_result(result)
+        return result
+
+    def _convert_one(self, input_path, progress_callback, info):
+        job = ConversionJob([input_path], progress_callback, info)
+        if self.prepare_job(job) and self.encode_job(job):
+            self.transcribe_job(job)
+        return job.results[0]
+
+    def prepare_job(self, job):
+        """프로브 단계: 출력 경로/인코딩 설정 결정, 캐시 확인 → 인코딩이 필요하면 True
+
+        묶음은 계획할 때 이미 프로브했으므로 그대로 넘긴다.
+        """
+        if job.grouped:
+            return True
+        input_path = job.paths[0]
+        self.notify_state(input_path, 'probing')
+        job.info = info = self.probe(input_path, job.info)
+        duration = info.duration if info else 0.0
+        job.copy_suffix = copy_suffix_for(info, self.copy_mp3, self.copy_aac)
+        job.callback = self.progress_reporter(input_path, duration, job.progress_callback)
+        job.output_path = self.output_path_for(input_path, job.copy_suffix or '.mp3')
+        job.segmented = self.use_segments(info, job.copy_suffix)
+        job.params = self.encode_params(job.copy_suffix, job.segmented)
+        cached_result = self.lookup_cached(input_path, job.output_path, job.params, duration)
+        if cached_result:
+            job.results = [cached_result]
+            return False
+        return True
+
+    def encode_job(self, job):
+        """인코딩 단계: 인코딩과 출력 검증 → 전사가 남았으면 True (PCM은 job.audio에)"""
+        if job.grouped:
+            job.results = self.convert_group(job.paths, job.info or {}, job.progress_callback)
+            return False
+        input_path, output_path, info = job.paths[0], job.output_path, job.info
+        copy_suffix, segmented, callback = job.copy_suffix, job.segmented, job.callback
+        duration = info.duration if info else 0.0
+        if self.output_dir:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        audio = None
+        with self.staged_inputs([input_path]) as (source,), self.encode_slot([source, output_path]):
+            self.notify_state(input_path, 'encoding')
+            timeout = self.timeout_for(duration)
+            output_duration = None
+            if self.backend == 'pyav' and not copy_suffix and not segmented:
+                result, audio, output_duration = self.encode_pyav(source, output_path, callback, timeout)
+            elif self.transcriber:
+                result, audio = encode_with_pcm(
+                    self.ffmpeg_path, source, output_path,
+                    self.bitrate, callback, self.cancel_event, stream_copy=bool(copy_suffix), timeout=timeout
+                )
+            elif segmented:
+                from segment_encoder import encode_segmented
+                result = encode_segmented(
+                    self.ffmpeg_path, source, output_path, self.segments,
+                    self.bitrate, callback, self.cancel_event, info=info, timeout=timeout
+                )
+            else:
+                result = encode_file(
+                    self.ffmpeg_path, source, output_path,
+                    self.bitrate, callback, self.cancel_event, stream_copy=bool(copy_suffix), timeout=timeout
+                )
+        # 결과는 스테이징 복사본이 아니라 원래 입력 기준
+        result.input_path = Path(input_path)
+        result.duration = duration
+        result.stream_copy = bool(copy_suffix)
+        result.job_kind = self.job_kind(copy_suffix, segmented)
+        if result.ok:
+            if output_duration is not None:
+                # PyAV 작업자가 이미 출력 길이를 읽었으므로 ffprobe를 띄우지 않는다
+                error = duration_mismatch(output_duration, duration) if duration > 0 else ''
+            else:
+                error = verify_output(output_path, duration, self.ffmpeg_path)
+            if error:
+                result.ok = False
+                result.error = error
+        job.results = [result]
+        if result.ok and self.transcriber:
+            job.audio = audio
+            return True
+        self.record_cached(result, job.params)
+        return False
+
+    def transcribe_job(self, job):
+        """STT 단계: 인코딩 때 받아 둔 PCM 전사 후 캐시 기록"""
+        result = job.results[0]
+        audio, job.audio = job.audio, None
+        if self.cancel_event.is_set():
+            result.ok = False
+            result.error = '취소됨'
+            result.error_code = ERROR_CANCELLED
+            return False
+        with self.stt_slot():
+            self.notify_state(result.input_path, 'transcribing')
+            self.write_transcript(result, audio)
+        if self.controller:
+            self.controller.add_work('stt', result.duration)
+        self.record_cached(result, job.params)
+        return False
+
+    def build_pipeline(self, result_callback=None):
+        """프로브 → 인코딩 → STT 단계 파이프라인 (항목은 ConversionJob)
+
+        인코딩 단계는 STT가 도는 동안에도 다음 파일로 넘어가고, 전사를 기다리는 파일이
+        stt_queue개를 넘으면 인코딩 작업자가 기다린다 (PCM이 메모리에 쌓이지 않도록).
+        끝난 작업마다 result_callback(result)이 작업자 스레드에서 호출된다.
+        """
+        from stage_pipeline import Pipeline, Stage
+
+        encode_workers = self.controller.encode.maximum if self.controller else self.workers
+        if self.device_limits:
+            # 장치 한도를 기다리는 스레드가 ffmpeg 자리를 차지하지 않도록 넉넉히
+            encode_workers *= DEVICE_WAIT_THREADS
+        stages = [
+            Stage('probe', self.prepare_job, self.workers),
+            Stage('encode', self.encode_job, encode_workers, capacity=encode_workers * 2),
+        ]
+        if self.transcriber:
+            stt_workers = self.controller.stt.maximum if self.controller else self.stt_workers
+            stages.append(Stage('stt', self.transcribe_job, stt_workers, capacity=self.stt_queue))
+
+        def on_error(job, e):
+            job.audio = None
+            job.results = [ConversionResult(path, self.output_path_for(path), False, str(e)) for path in job.paths]
+            if job.grouped:
+                for result in job.results:
+                    self.publish_result(result)
+
+        def on_done(job):
+            if not job.grouped:
+                # 묶음은 convert_group이 기록/발행한다
+                self.record_history(job.results[0])
+                self.publish_result(job.results[0])
+            if result_callback:
+                for result in job.results:
+                    result_callback(result)
+
+        return Pipeline(stages, on_done, on_error, name='convert')
+
+    def convert(self, paths, progress_callback=None, result_callback=None):
+        """여러 파일을 병렬 변환하고 입력 순서대로 결과 반환
+
+        progress_callback(input_path, seconds, duration), result_callback(result)는
+        작업자 스레드에서 호출된다.
+        """
+        if not self.ffmpeg_path:
+            raise RuntimeError('ffmpeg를 찾을 수 없습니다')
+        self.cancel_event.clear()
+
+        paths = [Path(p) for p in paths]
+        results = [None] * len(paths)
+        # 캐시된 프로브 결과는 한 번의 쿼리로 미리 가져온다
+        cached = self.probe_cache.get_many(paths) if self.probe_cache else {}
+        units = self.plan_jobs(paths, cached)
+        start = time.monotonic()
+
+        def job_for(indexes):
+            if len(indexes) > 1:
+                return ConversionJob([paths[i] for i in indexes], progress_callback, cached, indexes)
+            input_path = paths[indexes[0]]
+            return ConversionJob([input_path], progress_callback, cached.get(os.path.abspath(input_path)), indexes)
+
+        pipeline = self.build_pipeline(result_callback)
+        self.last_pipeline = pipeline
+        if self.controller:
+            self.controller.start()
+        if self.stager:
+            self.stager.plan([paths[i] for unit in units for i in unit], self.progress_bus)
+        jobs = [job_for(unit) for unit in units]
+        try:
+            # 넣은 순서대로 작업자가 가져가므로 plan_jobs의 순서가 곧 실행 순서다
+            pipeline.run(jobs)
+        finally:
+            if self.controller:
+                self.controller.stop()
+            if self.stager:
+                self.stager.finish()
+        for job in jobs:
+            for index, result in zip(job.indexes, job.results):
+                results[index] = result
+        if self.last_schedule:
+            self.last_schedule.finish(time.monotonic() - start)
+        return results
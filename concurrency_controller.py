@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+적응형 동시 실행 수 조절기 - 배치가 도는 동안 처리량을 재며 ffmpeg/STT 작업 수를 AIMD로 조절한다.
+
+고정된 작업 수는 8코어 노트북과 64코어 서버 모두에서 맞지 않고, Whisper가 같은 CPU를
+쓰면 더 어긋난다. 조절기는 interval초마다 한 풀을 골라
+- 그 풀의 처리량(오디오 초/벽시계 초)이 직전 증가 후 오히려 줄었거나 CPU가 포화 상태면
+  작업 수를 곱셈으로 줄이고 (×0.7),
+- 일감이 밀려 있고 CPU에 여유가 있으면 하나 늘린다.
+처리량은 작업이 끝날 때 몰려 보고되므로(STT는 파일 하나가 끝나야 보고된다) 보고가 없던 주기는
+다음 주기와 합쳐 재고, 주기별 값은 지수 이동 평균으로 다듬어 비교한다.
+결정은 decisions 목록과 ~/.mp4tomp3/concurrency.log (JSON 줄, LOG_MAX_BYTES를 넘으면 .1로 교체)에 남는다.
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from pathlib import Path
+
+DEFAULT_LOG_PATH = Path.home() / '.mp4tomp3' / 'concurrency.log'
+DEFAULT_INTERVAL = 5.0
+# 기록 파일이 이보다 커지면 concurrency.log.1로 옮기고 새로 쓴다 (이전 .1은 지움)
+LOG_MAX_BYTES = 1 << 20
+# 처리량 지수 이동 평균에서 새 주기 값의 비중
+RATE_SMOOTHING = 0.5
+
+# 곱셈 감소 비율, 처리량 하락으로 보는 비율
+DECREASE_FACTOR = 0.7
+THROUGHPUT_TOLERANCE = 0.05
+# CPU 사용률이 이 이상이면 더 늘리지 않고, 부하 평균/코어 수까지 이 이상이면 포화로 보고 줄인다
+CPU_BUSY = 0.9
+LOAD_OVERLOADED = 1.5
+
+INCREASE = 'increase'
+DECREASE = 'decrease'
+HOLD = 'hold'
+
+
+class AdjustableLimit:
+    """실행 중에 한도를 바꿀 수 있는 세마포어 (스레드/asyncio 공용, 들어온 순서대로 슬롯 배정)"""
+
+    def __init__(self, name, limit, minimum=1, maximum=None):
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum or limit)
+        self.limit = min(max(limit, self.minimum), self.maximum)
+        self.active = 0
+        self.lock = threading.Lock()
+        # 깨우기 함수 목록 - 호출되는 시점에 이미 슬롯이 배정되어 있다
+        self.waiters = deque()
+
+    @property
+    def waiting(self):
+        return len(self.waiters)
+
+    def _wake(self):
+        while self.waiters and self.active < self.limit:
+            self.active += 1
+            self.waiters.popleft()()
+
+    def set_limit(self, limit):
+        """새 한도 (최소/최대로 자름) - 줄일 때는 실행 중인 작업이 끝나면서 반영된다"""
+        with self.lock:
+            self.limit = min(max(int(limit), self.minimum), self.maximum)
+            self._wake()
+            return self.limit
+
+    def acquire(self):
+        with self.lock:
+            if self.active < self.limit and not self.waiters:
+                self.active += 1
+                return
+            granted = threading.Event()
+            self.waiters.append(granted.set)
+        granted.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if self.active < self.limit and not self.waiters:
+                self.active += 1
+                return
+            future = loop.create_future()
+
+            def grant():
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+            self.waiters.append(grant)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self.lock:
+                if grant in self.waiters:
+                    self.waiters.remove(grant)
+                    raise
+            # 취소 직전에 슬롯을 받았으면 돌려준다
+            self.release()
+            raise
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+            self._wake()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+    def __repr__(self):
+        return f"AdjustableLimit({self.name}, {self.active}/{self.limit}, waiting={self.waiting})"
+
+
+class CpuSampler:
+    """직전 호출 이후 전체 CPU 사용률 (0.0~1.0) - psutil 또는 /proc/stat, 둘 다 없으면 None"""
+
+    def __init__(self):
+        try:
+            import psutil
+            psutil.cpu_percent()
+            self.psutil = psutil
+        except ImportError:
+            self.psutil = None
+        self.previous = self._read_proc_stat()
+
+    @staticmethod
+    def _read_proc_stat():
+        try:
+            with open('/proc/stat') as f:
+                values = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        # idle + iowait
+        return sum(values), values[3] + (values[4] if len(values) > 4 else 0)
+
+    def utilisation(self):
+        if self.psutil is not None:
+            return self.psutil.cpu_percent() / 100
+        current = self._read_proc_stat()
+        if current is None or self.previous is None:
+            return None
+        total = current[0] - self.previous[0]
+        idle = current[1] - self.previous[1]
+        self.previous = current
+        return 1.0 - idle / total if total > 0 else None
+
+
+def load_ratio():
+    """1분 부하 평균 / 코어 수 (Windows 등 지원하지 않으면 None)"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class ConcurrencyController:
+    """ffmpeg(encode)/STT(stt) 풀의 한도를 주기적으로 조절"""
+
+    def __init__(self, encode_workers=None, stt_workers=1, max_encode=None, max_stt=None,
+                 interval=DEFAULT_INTERVAL, log_path=DEFAULT_LOG_PATH):
+        cpus = os.cpu_count() or 1
+        self.encode = AdjustableLimit('encode', encode_workers or cpus, 1, max_encode or cpus * 2)
+        self.stt = AdjustableLimit('stt', stt_workers, 1, max_stt or max(1, cpus // 4))
+        self.pools = (self.encode, self.stt)
+        self.interval = interval
+        self.log_path = Path(log_path) if log_path else None
+        self.decisions = []
+        self.lock = threading.Lock()
+        # 풀별: 마지막 평가 이후 처리한 오디오 초, 마지막 평가 시각, 직전 처리량(이동 평균), 직전 결정
+        self.work = {pool.name: 0.0 for pool in self.pools}
+        self.state = {pool.name: {'since': time.monotonic(), 'rate': None, 'action': HOLD} for pool in self.pools}
+        self.total_work = 0.0
+        self.started = None
+        self.turn = 0
+        self.sampler = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def max_threads(self):
+        """모든 풀이 최대일 때 필요한 작업자 스레드 수"""
+        return self.encode.maximum + self.stt.maximum
+
+    def add_work(self, pool_name, seconds):
+        """처리한 오디오 길이(초) 보고 (작업자 스레드에서 호출)"""
+        if seconds <= 0:
+            return
+        with self.lock:
+            self.work[pool_name] += seconds
+            self.total_work += seconds
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.sampler = CpuSampler()
+        self.started = time.monotonic()
+        for state in self.state.values():
+            state.update(since=self.started, rate=None, action=HOLD)
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(self.interval):
+                self.tick()
+
+        self._thread = threading.Thread(target=run, name='concurrency-controller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def tick(self):
+        """한 주기 - 일이 있는 풀 하나를 돌아가며 평가 (변경 효과를 풀별로 구분하기 위해)"""
+        cpu = self.sampler.utilisation() if self.sampler else None
+        load = load_ratio()
+        busy = [pool for pool in self.pools if pool.active or pool.waiting]
+        if not busy:
+            return None
+        pool = busy[self.turn % len(busy)]
+        self.turn += 1
+
+        now = time.monotonic()
+        state = self.state[pool.name]
+        with self.lock:
+            work = self.work[pool.name]
+            sampled = work > 0 or not pool.active
+            if sampled:
+                self.work[pool.name] = 0.0
+        previous = state['rate']
+        if sampled:
+            sample = work / (now - state['since']) if now > state['since'] else 0.0
+            rate = sample if previous is None else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * previous
+        else:
+            # 실행 중인 작업이 아직 아무것도 보고하지 않음 - 처리량을 0으로 보지 않고 다음 주기와 합쳐 잰다
+            rate = previous
+
+        action, reason = HOLD, ''
+        overloaded = cpu is not None and cpu >= CPU_BUSY and load is not None and load >= LOAD_OVERLOADED
+        if sampled and state['action'] == INCREASE and previous and rate < previous * (1 - THROUGHPUT_TOLERANCE):
+            action, reason = DECREASE, 'throughput_drop'
+        elif overloaded and pool.limit > pool.minimum:
+            action, reason = DECREASE, 'overloaded'
+        elif pool.waiting and pool.active >= pool.limit and pool.limit < pool.maximum:
+            if cpu is None or cpu < CPU_BUSY:
+                action, reason = INCREASE, 'backlog'
+            else:
+                reason = 'cpu_busy'
+
+        before = pool.limit
+        if action == INCREASE:
+            pool.set_limit(before + 1)
+        elif action == DECREASE:
+            pool.set_limit(max(pool.minimum, int(before * DECREASE_FACTOR)))
+        if sampled:
+            state.update(since=now, rate=rate, action=action)
+        elif action != HOLD:
+            state['action'] = action
+
+        decision = {
+            'time': time.time(),
+            'pool': pool.name,
+            'action': action,
+            'reason': reason,
+            'limit': [before, pool.limit],
+            'rate': None if rate is None else round(rate, 2),
+            'cpu': None if cpu is None else round(cpu, 3),
+            'load': None if load is None else round(load, 3),
+            'active': pool.active,
+            'waiting': pool.waiting,
+        }
+        self.decisions.append(decision)
+        self._log(decision)
+        return decision
+
+    def _log(self, decision):
+        if not self.log_path:
+            return
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.log_path.exists() and self.log_path.stat().st_size >= LOG_MAX_BYTES:
+                os.replace(self.log_path, self.log_path.with_name(self.log_path.name + '.1'))
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(decision) + '\n')
+        except OSError as e:
+            print(f"동시 실행 조절 기록 실패: {e}")
+
+    def summary(self):
+        """한 줄 요약 - 풀별 한도 변화와 전체 처리 배속"""
+        parts = []
+        for pool in self.pools:
+            limits = [d['limit'] for d in self.decisions if d['pool'] == pool.name]
+            if limits:
+                parts.append(f"{pool.name} {limits[0][0]}→{pool.limit} (최대 {max(l[1] for l in limits)})")
+        text = '동시 실행 조절: ' + (', '.join(parts) if parts else '변경 없음')
+        if self.started:
+            elapsed = time.monotonic() - self.started
+            if elapsed > 0:
+                text += f", 처리 {self.total_work / elapsed:.0f}x"
+        changes = sum(1 for d in self.decisions if d['action'] != HOLD)
+        return text + f" (결정 {len(self.decisions)}회, 변경 {changes}회)"
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+변환 결과 캐시 (SQLite 매니페스트, ~/.mp4tomp3/conversions.db)
+
+입력 파일의 내용 지문 + 인코딩 파라미터가 같고 기록된 출력 파일이 그대로 남아 있으면
+변환을 건너뛴다.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+from fingerprint import get_fingerprinter
+
+DEFAULT_DB_PATH = Path.home() / '.mp4tomp3' / 'conversions.db'
+
+
+def params_key(params):
+    """인코딩 파라미터(dict) → 정규화된 문자열"""
+    return json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+
+class ConversionCache:
+    """입력 지문 + 파라미터 → 출력 파일 매니페스트"""
+
+    def __init__(self, db_path=None, fingerprint=None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.fingerprint = fingerprint or get_fingerprinter()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS conversions (
+                input_hash TEXT NOT NULL,
+                params TEXT NOT NULL,
+                input_path TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (input_hash, params)
+            )
+        ''')
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _outputs_valid(self, outputs):
+        """기록된 출력 파일이 모두 존재하고 크기/지문이 같은지 확인"""
+        for output in outputs:
+            path = output['path']
+            try:
+                if os.path.getsize(path) != output['size']:
+                    return False
+                if self.fingerprint(path) != output['hash']:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def lookup(self, input_path, params, output_paths=None):
+        """유효한 캐시 항목이 있으면 출력 경로 목록, 없으면 None
+
+        output_paths를 주면 그 경로들이 모두 기록된 출력에 포함될 때만 유효하다.
+        """
+        try:
+            input_hash = self.fingerprint(input_path)
+        except OSError:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT outputs FROM conversions WHERE input_hash = ? AND params = ?",
+                (input_hash, params_key(params))
+            ).fetchone()
+        if not row:
+            return None
+        outputs = json.loads(row[0])
+        paths = [output['path'] for output in outputs]
+        if output_paths is not None and not {os.path.abspath(p) for p in output_paths} <= set(paths):
+            return None
+        if not self._outputs_valid(outputs):
+            return None
+        return paths
+
+    def record(self, input_path, params, output_paths):
+        """변환 성공 후 출력 파일 지문 기록"""
+        outputs = []
+        for path in output_paths:
+            path = os.path.abspath(path)
+            outputs.append({'path': path, 'size': os.path.getsize(path), 'hash': self.fingerprint(path)})
+        input_hash = self.fingerprint(input_path)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO conversions (input_hash, params, input_path, outputs, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (input_hash, params_key(params), os.path.abspath(input_path), json.dumps(outputs), time.time())
+            )
+            self.conn.commit()
+
+    def forget(self, input_path, params):
+        """캐시 항목 삭제"""
+        try:
+            input_hash = self.fingerprint(input_path)
+        except OSError:
+            return
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM conversions WHERE input_hash = ? AND params = ?",
+                (input_hash, params_key(params))
+            )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM conversions")
+            self.conn.commit()
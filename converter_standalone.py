@@ -21,9 +21,12 @@ from tkinter import filedialog, messagebox, ttk
 import subprocess
 import threading
 import platform
-import re
 import time
 
+from media_probe import get_duration
+from batch_converter import encode_file, encode_with_pcm
+from progress_bus import ProgressBus, DONE, FAILED
+
 # Whisper lazy import
 WHISPER_AVAILABLE = False
 whisper = None
@@ -80,6 +83,11 @@ class MP4ConverterBundled:
         self.enable_stt = tk.BooleanVar(value=False)
         self.is_converting = False
         
+        # 변환 스레드는 진행률을 버스에 넣고, UI는 10 Hz로 모아서 갱신
+        self.progress_bus = ProgressBus()
+        self.progress_bus.subscribe(self.on_progress_events)
+        self.progress_bus.attach_tk(self.root)
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -429,31 +437,12 @@ class MP4ConverterBundled:
         return None
     
     def get_file_duration(self, file_path):
-        """파일 길이 확인"""
-        try:
-            cmd = [
-                self.ffmpeg_path,
-                '-i', file_path,
-                '-f', 'null',
-                '-'
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            duration_match = re.search(r'Duration: (\d{2}):(\d{2}):(\d{2})\.\d+', result.stderr)
-            if duration_match:
-                hours = int(duration_match.group(1))
-                minutes = int(duration_match.group(2))
-                seconds = int(duration_match.group(3))
-                return hours * 3600 + minutes * 60 + seconds
-        except:
-            pass
-        return 0
+        """파일 길이 확인 (헤더만 읽음, 디코딩 없음)"""
+        return get_duration(file_path, self.ffmpeg_path)
     
     def convert_files(self):
         """파일 변환 실행"""
-        total = len(self.files_to_convert)
-        
-        for i, file_path in enumerate(self.files_to_convert):
+        for file_path in self.files_to_convert:
             if not self.is_converting:
                 break
             
@@ -463,49 +452,43 @@ class MP4ConverterBundled:
             # 파일 길이 확인
             duration = self.get_file_duration(str(input_path))
             
+            job_id = str(file_path)
+            encode_start = time.time()
+            
+            def report_progress(current_seconds, job_id=job_id, duration=duration, encode_start=encode_start):
+                if duration > 0:
+                    elapsed = time.time() - encode_start
+                    self.progress_bus.publish(job_id, 'encoding', min(current_seconds / duration, 1.0),
+                                              speed=current_seconds / elapsed if elapsed > 0 else None)
+            
+            use_stt = self.enable_stt.get() and self.whisper_model
+            audio = None
+            
             try:
-                # MP3 변환
-                cmd = [
-                    self.ffmpeg_path,
-                    '-i', str(input_path),
-                    '-vn',
-                    '-acodec', 'libmp3lame',
-                    '-ab', '192k',
-                    '-y',
-                    '-progress', 'pipe:1',
-                    str(output_path)
-                ]
-                
-                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-                
-                # 진행률 업데이트
-                while True:
-                    line = process.stdout.readline()
-                    if not line:
-                        break
-                    
-                    if 'out_time_ms=' in line:
-                        try:
-                            time_ms = int(line.split('=')[1])
-                            current_seconds = time_ms / 1000000
-                            if duration > 0:
-                                file_percent = min(int((current_seconds / duration) * 100), 100)
-                                overall_percent = int(((i + file_percent/100) / total) * 100)
-                                self.root.after(0, self.update_progress, input_path.name, overall_percent)
-                        except:
-                            pass
-                
-                process.wait()
+                if use_stt:
+                    # 한 번의 디코딩으로 MP3와 Whisper 입력(16kHz PCM)을 함께 생성
+                    result, audio = encode_with_pcm(
+                        self.ffmpeg_path, input_path, output_path,
+                        progress_callback=report_progress
+                    )
+                else:
+                    # MP3 변환
+                    result = encode_file(
+                        self.ffmpeg_path, input_path, output_path,
+                        progress_callback=report_progress
+                    )
+                if not result.ok:
+                    print(f"변환 오류: {result.error}")
+                    self.progress_bus.publish(job_id, FAILED, message=result.error)
+                    continue
                 
                 # STT 실행
-                if self.enable_stt.get() and self.whisper_model:
-                    self.root.after(0, lambda name=input_path.name: self.status_label.config(
-                        text=f"음성 인식 중: {name}"
-                    ))
+                if use_stt and audio is not None:
+                    self.progress_bus.publish(job_id, 'transcribing', message=f"음성 인식 중: {input_path.name}")
                     
                     try:
                         result = self.whisper_model.transcribe(
-                            str(output_path),
+                            audio,
                             language='ko',
                             fp16=False
                         )
@@ -516,18 +499,36 @@ class MP4ConverterBundled:
                             with open(txt_path, 'w', encoding='utf-8') as f:
                                 f.write(text)
                             
-                            self.root.after(0, lambda name=txt_path.name: self.status_label.config(
-                                text=f"텍스트 파일 생성: {name}"
-                            ))
+                            self.progress_bus.publish(job_id, 'transcribing', 1.0,
+                                                      message=f"텍스트 파일 생성: {txt_path.name}")
                     except Exception as e:
                         print(f"STT 오류: {e}")
                 
+                self.progress_bus.publish(job_id, DONE, 1.0)
             except Exception as e:
                 print(f"변환 오류: {e}")
+                self.progress_bus.publish(job_id, FAILED, message=str(e))
         
         # 완료
         self.root.after(0, self.conversion_complete)
     
+    def on_progress_events(self, events):
+        """진행률 버스 구독자 (Tk 스레드, 10 Hz)"""
+        total = len(self.files_to_convert)
+        if not total:
+            return
+        indexes = {str(path): index for index, path in enumerate(self.files_to_convert)}
+        for event in events:
+            if event.message and event.stage != FAILED:
+                self.status_label.config(text=event.message)
+            if event.stage != 'encoding' or event.fraction is None:
+                continue
+            index = indexes.get(event.job_id)
+            if index is None:
+                continue
+            overall_percent = int(((index + event.fraction) / total) * 100)
+            self.update_progress(Path(event.job_id).name, overall_percent)
+    
     def update_progress(self, filename, percent):
         """진행률 업데이트"""
         self.current_file_label.config(text=f"변환 중: {filename}")
@@ -8,13 +8,22 @@ from pathlib import Path
 import sys
 import time
 import platform
-import re
 import urllib.request
 import webbrowser
 
 # Whisper Manager 통합
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from whisper_manager import WhisperManager
+from media_probe import ProbeError
+from probe_cache import ProbeCache
+from job_scheduler import EncodeHistory, POLICY_LPT
+from concurrency_controller import ConcurrencyController
+from device_limits import DeviceLimiter, parse_device_jobs
+from whisper_pool import WhisperModelPool
+from transcript_cache import TranscriptCache, DEFAULT_QUOTA_MB
+from batch_converter import BatchConverter
+from job_journal import JobJournal, ENCODING, TRANSCRIBING, DONE, FAILED
+from progress_bus import ProgressBus
 try:
     from custom_widgets import RoundedButton
 except ImportError:
@@ -49,15 +58,32 @@ class ModernMP4Converter:
         
         # Whisper Manager 초기화
         self.whisper_manager = WhisperManager()
-        self.whisper_model = None
+        self.whisper_pool = None
         self.whisper_available = self.whisper_manager.is_whisper_installed()
+        self.probe_cache = ProbeCache()
+        self.encode_history = EncodeHistory()
+        # 같은 오디오를 다시 고르면 Whisper를 다시 돌리지 않음
+        self.transcript_cache = TranscriptCache(
+            quota_mb=self.whisper_manager.config.get('transcript_cache_mb', DEFAULT_QUOTA_MB))
         
         self.files_to_convert = []
         self.current_file_index = 0
         self.start_time = None
         self.is_converting = False
         
+        # 작업 저널 (중단된 배치 이어서 변환)
+        self.journal = JobJournal()
+        self.batch_id = None
+        
+        # 변환 스레드는 진행률을 버스에 넣고, UI는 10 Hz로 모아서 갱신
+        self.progress_bus = ProgressBus()
+        self.progress_bus.subscribe(self.on_progress_events)
+        self.progress_bus.attach_tk(self.root)
+        self.job_fractions = {}
+        
+        
         self.setup_modern_ui()
+        self.root.after(300, self.offer_resume)
         
     def setup_modern_ui(self):
         # Configure styles
@@ -562,7 +588,29 @@ class ModernMP4Converter:
         if files:
             self.add_files(files)
     
+    def offer_resume(self):
+        """이전에 중단된 배치가 있으면 이어서 변환할지 묻기"""
+        batch_id = self.journal.latest_unfinished_batch(source='gui')
+        if not batch_id:
+            return
+        remaining = [str(p) for p in self.journal.unfinished_jobs(batch_id) if p.exists()]
+        if remaining and messagebox.askyesno(
+            "이어서 변환",
+            f"이전 변환이 중단되었습니다.\n남은 {len(remaining)}개 파일을 이어서 변환할까요?"
+        ):
+            self.add_files(remaining)
+            self.batch_id = batch_id
+        else:
+            self.journal.finish_batch(batch_id)
+    
+    def discard_batch(self):
+        """선택 목록을 버릴 때 저널의 배치도 종료 처리"""
+        if self.batch_id and not self.is_converting:
+            self.journal.finish_batch(self.batch_id)
+            self.batch_id = None
+    
     def add_files(self, files):
+        self.discard_batch()
         self.files_to_convert = list(files)
         count = len(self.files_to_convert)
         
@@ -575,6 +623,7 @@ class ModernMP4Converter:
             self.clear_button.config(state=tk.NORMAL, cursor='hand2')
     
     def clear_files(self):
+        self.discard_batch()
         self.files_to_convert = []
         self.drop_label.config(
             text="드래그 앤 드롭 또는 클릭하여 파일 선택",
@@ -607,7 +656,10 @@ class ModernMP4Converter:
                 # 모델 미리 로드
                 try:
                     self.status_label.config(text=f"{model_name.upper()} 모델 로딩 중...")
-                    self.whisper_model = self.whisper_manager.load_model(model_name)
+                    # 복제본은 사용 가능 메모리가 허락할 때만 늘어난다
+                    # (이전 배치에서 반납한 모델이 상주해 있으면 다시 로드하지 않음)
+                    self.whisper_pool = WhisperModelPool(self.whisper_manager, model_name)
+                    self.whisper_pool.load_first()
                 except Exception as e:
                     messagebox.showwarning("모델 로드 실패", f"AI 모델을 로드할 수 없습니다.\n{e}")
                     self.enable_stt.set(False)
@@ -621,33 +673,19 @@ class ModernMP4Converter:
         self.clear_button.config(state=tk.DISABLED)
         
         # Start conversion
+        if not self.batch_id:
+            self.batch_id = self.journal.start_batch(self.files_to_convert, source='gui')
         self.is_converting = True
-        thread = threading.Thread(target=self.convert_files)
-        thread.daemon = True
-        thread.start()
+        self.job_fractions = {}
+        # 변환은 작업자 스레드에서 실행 (Tk 메인 루프는 UI만 처리)
+        threading.Thread(target=self.convert_files, daemon=True).start()
     
     def get_file_duration(self, file_path):
-        """Get duration of media file in seconds"""
+        """Get duration of media file in seconds (header probe, no decode)"""
         try:
-            cmd = [
-                self.ffmpeg_path or 'ffmpeg',
-                '-i', file_path,
-                '-f', 'null',
-                '-'
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            # Parse duration from stderr
-            import re
-            duration_match = re.search(r'Duration: (\d{2}):(\d{2}):(\d{2})\.\d+', result.stderr)
-            if duration_match:
-                hours = int(duration_match.group(1))
-                minutes = int(duration_match.group(2))
-                seconds = int(duration_match.group(3))
-                return hours * 3600 + minutes * 60 + seconds
-        except:
-            pass
-        return 0
+            return self.probe_cache.probe(file_path, self.ffmpeg_path).duration
+        except ProbeError:
+            return 0
     
     def check_ffmpeg(self):
         # Check for embedded ffmpeg
@@ -684,94 +722,106 @@ class ModernMP4Converter:
         
         return None
     
+    def device_limiter(self):
+        """config.json의 device_jobs(--device-jobs와 같은 값 목록)가 있으면 장치별 동시 작업 제한"""
+        device_jobs = self.whisper_manager.config.get('device_jobs')
+        if not device_jobs:
+            return None
+        try:
+            return DeviceLimiter(*parse_device_jobs(device_jobs))
+        except ValueError as e:
+            print(f"device_jobs 설정 무시: {e}")
+            return None
+
     def convert_files(self):
-        total = len(self.files_to_convert)
-        
-        for i, file_path in enumerate(self.files_to_convert):
-            if not self.is_converting:
-                break
-            
-            input_path = Path(file_path)
-            output_path = input_path.with_suffix('.mp3')
-            
-            # Get file duration first
-            duration = self.get_file_duration(str(input_path))
-            
-            try:
-                # Convert to MP3 with real-time progress
-                cmd = [
-                    self.ffmpeg_path,
-                    '-i', str(input_path),
-                    '-vn',
-                    '-acodec', 'libmp3lame',
-                    '-ab', '192k',
-                    '-y',
-                    '-progress', 'pipe:1',  # Output progress to stdout
-                    str(output_path)
-                ]
-                
-                # Use Popen for real-time progress
-                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-                
-                # Read progress
-                while True:
-                    line = process.stdout.readline()
-                    if not line:
-                        break
-                    
-                    # Parse progress
-                    if 'out_time_ms=' in line:
-                        try:
-                            time_ms = int(line.split('=')[1])
-                            current_seconds = time_ms / 1000000
-                            if duration > 0:
-                                file_percent = min(int((current_seconds / duration) * 100), 100)
-                                overall_percent = int(((i + file_percent/100) / total) * 100)
-                                self.root.after(0, self.update_progress, input_path.name, overall_percent)
-                        except:
-                            pass
-                
-                process.wait()
-                
-                # STT if enabled
-                if self.enable_stt.get() and self.whisper_model:
-                    self.root.after(0, lambda name=input_path.name: self.status_label.config(
-                        text=f"음성 인식 중: {name}"
-                    ))
-                    
-                    try:
-                        result = self.whisper_model.transcribe(
-                            str(output_path),
-                            language='ko',
-                            fp16=False
-                        )
-                        
-                        text = result.get('text', '').strip()
-                        if text:
-                            txt_path = input_path.with_suffix('.txt')
-                            with open(txt_path, 'w', encoding='utf-8') as f:
-                                f.write(text)
-                            
-                            self.root.after(0, lambda name=txt_path.name: self.status_label.config(
-                                text=f"텍스트 파일 생성: {name}"
-                            ))
-                    except Exception as e:
-                        print(f"STT error: {e}")
-                
-            except Exception as e:
-                print(f"Conversion error: {e}")
+        """작업자 스레드에서 실행 - CLI와 같은 프로브 → 인코딩 → STT 파이프라인으로 변환하고 저널에 기록"""
+        transcriber = None
+        stt_params = None
+        if self.enable_stt.get() and self.whisper_pool:
+            model_name = self.whisper_pool.model_name
+            stt_params = {'model': model_name, 'model_hash': self.whisper_manager.model_file_hash(model_name),
+                          'language': 'ko', 'mode': 'serial'}
+            transcriber = self.transcript_cache.transcriber(
+                self.whisper_pool.transcribe, model_name, stt_params['model_hash'], 'ko')
+        converter = BatchConverter(
+            self.ffmpeg_path,
+            probe_cache=self.probe_cache,
+            transcriber=transcriber,
+            stt_params=stt_params,
+            progress_bus=self.progress_bus,
+            state_callback=lambda path, state: self.journal.set_state(self.batch_id, path, state),
+            schedule=POLICY_LPT,
+            history=self.encode_history,
+            # Whisper와 ffmpeg가 CPU를 나눠 쓰므로 처리량을 보며 동시 실행 수를 조절
+            controller=ConcurrencyController(),
+            device_limits=self.device_limiter(),
+            stt_workers=self.whisper_pool.max_replicas if transcriber else 1
+        )
+
+        def on_result(result):
+            if result.ok:
+                self.journal.set_state(self.batch_id, result.input_path, DONE, output_path=result.output_path)
+                if result.transcript_path:
+                    self.progress_bus.publish(str(result.input_path), DONE, 1.0,
+                                              message=f"텍스트 파일 생성: {result.transcript_path.name}")
+            else:
+                print(f"Conversion error: {result.input_path.name}: {result.error}")
+                self.journal.set_state(self.batch_id, result.input_path, FAILED, result.error)
+
+        try:
+            converter.convert(self.files_to_convert, result_callback=on_result)
+        except Exception as e:
+            print(f"Conversion error: {e}")
+        finally:
+            converter.close()
+        if converter.last_schedule:
+            print(converter.last_schedule)
+        print(converter.controller.summary())
+        if transcriber:
+            if converter.last_pipeline:
+                print(converter.last_pipeline.summary())
+            print(self.whisper_pool.summary())
+            print(self.whisper_manager.residency_summary())
+            print(self.transcript_cache.summary())
         
         # Complete
         self.root.after(0, self.conversion_complete)
     
+    def on_progress_events(self, events):
+        """진행률 버스 구독자 (Tk 스레드, 10 Hz) - 작업별 최신 이벤트로 UI 갱신"""
+        total = len(self.files_to_convert)
+        if not total:
+            return
+        current = None
+        for event in events:
+            name = Path(event.job_id).name
+            if event.message and event.stage != FAILED:
+                self.status_label.config(text=event.message)
+            elif event.stage == TRANSCRIBING:
+                self.status_label.config(text=f"음성 인식 중: {name}")
+            if event.finished:
+                self.job_fractions[event.job_id] = 1.0
+            elif event.stage == ENCODING and event.fraction is not None:
+                self.job_fractions[event.job_id] = event.fraction
+                current = name
+        # 동시에 변환 중인 파일들의 진행률 합으로 전체 진행률 계산
+        overall_percent = int(sum(self.job_fractions.values()) / total * 100)
+        self.update_progress(current, min(overall_percent, 100))
+    
     def update_progress(self, filename, percent):
-        self.current_file_label.config(text=f"변환 중: {filename}")
+        if filename:
+            self.current_file_label.config(text=f"변환 중: {filename}")
         self.progress_bar['value'] = percent
         self.progress_text.config(text=f"{percent}%")
     
     def conversion_complete(self):
         self.is_converting = False
-        self.whisper_model = None  # 모델 메모리 해제
+        self.journal.finish_batch(self.batch_id)
+        self.batch_id = None
+        if self.whisper_pool:
+            # 모델은 관리자에게 반납 - 메모리 한도/유휴 시간 안에서 다음 배치까지 상주
+            self.whisper_pool.close()
+        self.whisper_pool = None
         messagebox.showinfo("완료", "모든 파일 변환이 완료되었습니다!")
         self.clear_files()
 
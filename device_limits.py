@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+장치별 동시 I/O 제한 - 입력/출력 경로의 st_dev마다 따로 동시 작업 수 한도를 둔다.
+
+NAS나 회전식 디스크에서 여러 파일을 동시에 읽고 바로 옆에 쓰면 순차 읽기가 임의 탐색으로
+바뀌어 전체 처리량이 오히려 떨어진다. 장치 한도는 CPU 작업자 수와 별개이며, 켜면(--device-jobs)
+따로 지정하지 않은 장치는 종류로 정한다 (회전식 디스크/네트워크 파일 시스템 2개, SSD/tmpfs 제한 없음).
+"""
+
+import os
+import argparse
+import threading
+from contextlib import contextmanager, asynccontextmanager, ExitStack, AsyncExitStack
+from pathlib import Path
+
+from concurrency_controller import AdjustableLimit
+
+KIND_ROTATIONAL = 'rotational'
+KIND_NETWORK = 'network'
+KIND_SSD = 'ssd'
+KIND_MEMORY = 'memory'
+KIND_UNKNOWN = 'unknown'
+
+# 장치 종류별 기본 동시 작업 수 (None이면 제한 없음)
+AUTO_CAPS = {
+    KIND_ROTATIONAL: 2,
+    KIND_NETWORK: 2,
+    KIND_SSD: None,
+    KIND_MEMORY: None,
+    KIND_UNKNOWN: None,
+}
+
+NETWORK_FILESYSTEMS = ('nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'afpfs', '9p', 'ceph', 'glusterfs',
+                       'fuse.sshfs', 'fuse.rclone', 'davfs', 'fuse.davfs2')
+MEMORY_FILESYSTEMS = ('tmpfs', 'ramfs')
+
+# os.major/os.minor는 Unix 전용 - Windows에서는 장치 종류를 판별하지 않는다 (KIND_UNKNOWN)
+DEVICE_NUMBERS = hasattr(os, 'major')
+
+
+def existing_parent(path):
+    """경로 자신 또는 존재하는 가장 가까운 상위 폴더 (출력 폴더가 아직 없을 때)"""
+    path = Path(path).absolute()
+    for candidate in (path, *path.parents):
+        if candidate.exists():
+            return candidate
+    return path
+
+
+def device_of(path):
+    try:
+        return os.stat(existing_parent(path)).st_dev
+    except OSError:
+        return None
+
+
+def device_name(dev):
+    """로그/한도 이름용 장치 표기 ('주:부', 장치 번호를 나눌 수 없는 플랫폼에서는 st_dev 그대로)"""
+    return f"{os.major(dev)}:{os.minor(dev)}" if DEVICE_NUMBERS else str(dev)
+
+
+def _mount_fstype(dev):
+    """/proc/self/mountinfo에서 장치 번호로 파일 시스템 종류 찾기 (Linux 외에는 None)"""
+    wanted = device_name(dev)
+    try:
+        with open('/proc/self/mountinfo') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == wanted and ' - ' in line:
+                    return line.split(' - ', 1)[1].split()[0]
+    except OSError:
+        pass
+    return None
+
+
+def device_kind(dev):
+    """장치 번호 → 장치 종류"""
+    if not DEVICE_NUMBERS:
+        return KIND_UNKNOWN
+    fstype = _mount_fstype(dev)
+    if fstype in NETWORK_FILESYSTEMS:
+        return KIND_NETWORK
+    if fstype in MEMORY_FILESYSTEMS:
+        return KIND_MEMORY
+    block = Path('/sys/dev/block') / device_name(dev)
+    # 파티션이면 상위 디스크의 queue를 본다
+    for queue in (block / 'queue' / 'rotational', block / '..' / 'queue' / 'rotational'):
+        try:
+            return KIND_ROTATIONAL if queue.read_text().strip() == '1' else KIND_SSD
+        except OSError:
+            continue
+    return KIND_UNKNOWN
+
+
+class DeviceLimiter:
+    """장치별 AdjustableLimit 모음 - 처음 보는 장치는 종류를 판별해 한도를 만든다"""
+
+    def __init__(self, caps=None, overrides=None):
+        # caps: {장치 종류: 한도}로 AUTO_CAPS 일부 변경, overrides: {경로: 한도} 그 경로가 있는 장치에 적용
+        self.caps = dict(AUTO_CAPS)
+        if caps:
+            self.caps.update(caps)
+        self.overrides = {}
+        for path, cap in (overrides or {}).items():
+            dev = device_of(path)
+            if dev is not None:
+                self.overrides[dev] = cap
+        self.lock = threading.Lock()
+        self.limits = {}
+        self.kinds = {}
+
+    def limit_for(self, dev):
+        """장치 한도 (제한 없으면 None)"""
+        with self.lock:
+            if dev not in self.limits:
+                kind = device_kind(dev)
+                cap = self.overrides.get(dev, self.caps.get(kind))
+                self.kinds[dev] = kind
+                self.limits[dev] = AdjustableLimit(device_name(dev), cap) if cap else None
+            return self.limits[dev]
+
+    def limits_for(self, paths):
+        """경로들이 걸친 장치의 한도 목록 (교착을 피하려고 장치 번호 순)"""
+        devices = sorted({dev for dev in map(device_of, paths) if dev is not None})
+        return [limit for limit in map(self.limit_for, devices) if limit is not None]
+
+    def device_key(self, path):
+        """스케줄러가 작업을 장치별로 나눌 때 쓰는 키"""
+        return device_of(path)
+
+    @contextmanager
+    def hold(self, paths):
+        with ExitStack() as stack:
+            for limit in self.limits_for(paths):
+                stack.enter_context(limit)
+            yield
+
+    @asynccontextmanager
+    async def hold_async(self, paths):
+        async with AsyncExitStack() as stack:
+            for limit in self.limits_for(paths):
+                await stack.enter_async_context(limit)
+            yield
+
+    def describe(self):
+        """판별한 장치와 한도 목록 (로그용)"""
+        with self.lock:
+            return [f"{device_name(dev)} {self.kinds[dev]} "
+                    f"{limit.limit if limit else '제한 없음'}" for dev, limit in self.limits.items()]
+
+
+def _parse_cap(value):
+    """'N' 또는 'PATH=N' → (PATH 또는 None, 한도 또는 None) - 형식이 틀리면 ValueError"""
+    path, sep, number = value.rpartition('=')
+    try:
+        cap = int(number)
+    except ValueError:
+        raise ValueError(f"장치 동시 작업 수는 0 이상의 정수여야 합니다: {value!r}") from None
+    if cap < 0 or (sep and not path):
+        raise ValueError(f"장치 동시 작업 수는 N 또는 PATH=N 형식이어야 합니다: {value!r}")
+    return (path if sep else None), cap or None
+
+
+def device_jobs_arg(value):
+    """--device-jobs argparse 타입 - 잘못된 값은 사용법 오류로"""
+    try:
+        _parse_cap(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def parse_device_jobs(values):
+    """--device-jobs 값 목록 → DeviceLimiter 인자 (caps, overrides)
+
+    'N'은 회전식/네트워크 장치의 기본 한도(0이면 제한 없음), 'PATH=N'은 PATH가 있는 장치의 한도.
+    """
+    caps = {}
+    overrides = {}
+    for value in values or ():
+        path, cap = _parse_cap(value)
+        if path is not None:
+            overrides[path] = cap
+        else:
+            caps[KIND_ROTATIONAL] = caps[KIND_NETWORK] = cap
+    return caps, overrides
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+대용량 파일 빠른 지문 - 크기 + 앞/중간/뒤 블록만 해시 (full 모드는 전체 해시)
+
+같은 (장치, inode, mtime_ns, 크기)의 파일은 다시 읽지 않는다. 공유 Fingerprinter는 지문을
+SQLite(~/.mp4tomp3/fingerprints.db)에도 저장해 다음 실행에서도 다시 해시하지 않는다.
+"""
+
+import os
+import mmap
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+BLOCK_SIZE = 1024 * 1024
+MODE_SAMPLED = 'sampled'
+MODE_FULL = 'full'
+DEFAULT_DB_PATH = Path.home() / '.mp4tomp3' / 'fingerprints.db'
+
+
+def _sample_offsets(size, block_size):
+    """앞/중간/뒤 블록 시작 위치 (겹치지 않게)"""
+    if size <= block_size * 3:
+        return [0]
+    return [0, (size - block_size) // 2, size - block_size]
+
+
+def _hash_file(path, mode, block_size):
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(f'{mode}:{size}:'.encode())
+    if size == 0:
+        return digest.hexdigest()
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mode == MODE_FULL:
+                for offset in range(0, size, BLOCK_SIZE * 8):
+                    digest.update(mapped[offset:offset + BLOCK_SIZE * 8])
+            else:
+                offsets = _sample_offsets(size, block_size)
+                length = size if offsets == [0] else block_size
+                for offset in offsets:
+                    digest.update(mapped[offset:offset + length])
+    return digest.hexdigest()
+
+
+class Fingerprinter:
+    """(st_dev, st_ino, mtime_ns, size) 기준으로 지문을 캐시하는 해시기
+
+    db_path를 주면 메모리 캐시에 없는 지문을 SQLite에서 찾고, 새로 해시한 지문을 저장한다.
+    """
+
+    def __init__(self, mode=MODE_SAMPLED, block_size=BLOCK_SIZE, db_path=None):
+        if mode not in (MODE_SAMPLED, MODE_FULL):
+            raise ValueError(f'알 수 없는 지문 모드: {mode}')
+        self.mode = mode
+        self.block_size = block_size
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.conn = None
+        if db_path:
+            self._open(Path(db_path))
+
+    def _open(self, db_path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        # 파일(장치, inode)마다 한 행 - mtime_ns/크기가 바뀌면 다시 해시해 덮어쓴다
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                dev INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                hashed_at REAL NOT NULL,
+                PRIMARY KEY (dev, inode, mode)
+            )
+        ''')
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    @property
+    def _mode_key(self):
+        # 블록 크기가 다르면 샘플 지문도 다르다
+        return self.mode if self.mode == MODE_FULL else f'{self.mode}:{self.block_size}'
+
+    def _stat_key(self, path):
+        st = os.stat(path)
+        return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _load(self, key):
+        """저장된 지문 (lock을 잡은 상태에서 호출, 없거나 stat이 바뀌었으면 None)"""
+        dev, inode, mtime_ns, size = key
+        row = self.conn.execute(
+            "SELECT digest FROM fingerprints WHERE dev = ? AND inode = ? AND mode = ? "
+            "AND mtime_ns = ? AND size = ?", (dev, inode, self._mode_key, mtime_ns, size)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _store(self, key, digest):
+        dev, inode, mtime_ns, size = key
+        self.conn.execute(
+            "INSERT OR REPLACE INTO fingerprints (dev, inode, mode, mtime_ns, size, digest, hashed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", (dev, inode, self._mode_key, mtime_ns, size, digest, time.time())
+        )
+        self.conn.commit()
+
+    def fingerprint(self, path):
+        """파일 지문 (OSError는 호출자에게 전달)"""
+        key = self._stat_key(path)
+        with self.lock:
+            digest = self.cache.get(key)
+            if digest is None and self.conn is not None:
+                digest = self._load(key)
+                if digest is not None:
+                    self.cache[key] = digest
+        if digest is None:
+            digest = _hash_file(path, self.mode, self.block_size)
+            with self.lock:
+                self.cache[key] = digest
+                if self.conn is not None:
+                    try:
+                        self._store(key, digest)
+                    except sqlite3.Error as e:
+                        print(f"지문 캐시 기록 실패: {e}")
+        return digest
+
+    __call__ = fingerprint
+
+    def fingerprint_many(self, paths, workers=None):
+        """여러 파일을 스레드 풀로 해시 → {경로: 지문} (읽을 수 없는 파일은 제외)"""
+        paths = [Path(p) for p in paths]
+
+        def safe(path):
+            try:
+                return self.fingerprint(path)
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 1) * 2)) as executor:
+            digests = list(executor.map(safe, paths))
+        return {path: digest for path, digest in zip(paths, digests) if digest is not None}
+
+    def fingerprint_directory(self, directory, recursive=True, extensions=None, workers=None):
+        """폴더 안의 파일 전체 지문 → {경로: 지문}"""
+        directory = Path(directory)
+        walker = directory.rglob('*') if recursive else directory.iterdir()
+        paths = [p for p in walker if p.is_file()
+                 and (extensions is None or p.suffix.lower() in extensions)]
+        return self.fingerprint_many(paths, workers)
+
+
+_default = {}
+
+
+def get_fingerprinter(mode=MODE_SAMPLED):
+    """모드별 공유 Fingerprinter (프로세스 내 지문 캐시 공유, 지문은 DEFAULT_DB_PATH에 저장)"""
+    if mode not in _default:
+        _default[mode] = Fingerprinter(mode, db_path=DEFAULT_DB_PATH)
+    return _default[mode]
+
+
+def fingerprint(path, mode=MODE_SAMPLED):
+    return get_fingerprinter(mode).fingerprint(path)
+
+
+def fingerprint_directory(directory, mode=MODE_SAMPLED, recursive=True, extensions=None, workers=None):
+    return get_fingerprinter(mode).fingerprint_directory(directory, recursive, extensions, workers)
+
+
+if __name__ == "__main__":
+    import sys
+    mode = MODE_FULL if '--full' in sys.argv else MODE_SAMPLED
+    for arg in [a for a in sys.argv[1:] if a != '--full']:
+        start = time.time()
+        if os.path.isdir(arg):
+            for path, digest in sorted(fingerprint_directory(arg, mode).items()):
+                print(digest[:16], path)
+        else:
+            print(fingerprint(arg, mode)[:16], arg)
+        print(f"({time.time() - start:.3f}s)")
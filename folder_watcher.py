@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+폴더 감시 - 새 MP4 파일이 들어오고 크기가 일정 시간 변하지 않으면 콜백 호출
+
+Linux에서는 inotify(ctypes)로 이벤트를 기다리고, 그 외 플랫폼이나 네트워크 공유처럼
+이벤트가 오지 않는 경우에는 주기적 폴링을 사용한다. 대기 중인 파일이 없으면 inotify
+모드는 이벤트가 올 때까지 블록되므로 CPU를 거의 쓰지 않는다.
+"""
+
+import os
+import sys
+import time
+import struct
+import select
+import threading
+import ctypes
+import ctypes.util
+from pathlib import Path
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')
+
+DEFAULT_STABLE_SECONDS = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+class Inotify:
+    """ctypes 기반 최소 inotify 래퍼 (Linux 전용)"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 실패')
+        self.watches = {}
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch 실패: {path}')
+        self.watches[wd] = Path(path)
+        return wd
+
+    def read_events(self):
+        """대기 중인 이벤트 (디렉터리, 이름, mask) 목록"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                events.append((self.watches.get(wd), os.fsdecode(name), mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def inotify_available():
+    return sys.platform.startswith('linux')
+
+
+class FolderWatcher:
+    """폴더에 새로 도착해 쓰기가 끝난 파일을 on_ready(path)로 전달"""
+
+    def __init__(self, directory, on_ready, stable_seconds=DEFAULT_STABLE_SECONDS,
+                 poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True, recursive=False,
+                 extensions=('.mp4',), include_existing=True):
+        self.directory = Path(directory)
+        self.on_ready = on_ready
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and inotify_available()
+        self.recursive = recursive
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.include_existing = include_existing
+        # path → (size, mtime_ns, 마지막 변경 감지 시각)
+        self.pending = {}
+        # 이미 넘긴 파일 path → (size, mtime_ns)
+        self.dispatched = {}
+        self.stop_event = threading.Event()
+        self._wake_r, self._wake_w = os.pipe() if self.use_inotify else (None, None)
+
+    def stop(self):
+        """다른 스레드에서 감시 종료"""
+        self.stop_event.set()
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b'x')
+            except OSError:
+                pass
+
+    def _matches(self, path):
+        return path.suffix.lower() in self.extensions and not path.name.startswith('.')
+
+    def _scan(self):
+        walker = self.directory.rglob('*') if self.recursive else self.directory.iterdir()
+        for path in walker:
+            if path.is_file() and self._matches(path):
+                self._touch(path)
+
+    def _touch(self, path, now=None):
+        """변경 감지 → 대기 목록 갱신"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.pending.pop(path, None)
+            return
+        key = (st.st_size, st.st_mtime_ns)
+        if self.dispatched.get(path) == key:
+            return
+        previous = self.pending.get(path)
+        if previous is None or previous[:2] != key:
+            self.pending[path] = (key[0], key[1], now or time.monotonic())
+
+    def _check_pending(self):
+        """안정화된 파일을 넘기고 다음 확인까지 남은 시간 반환 (대기 파일 없으면 None)"""
+        now = time.monotonic()
+        next_check = None
+        for path in list(self.pending):
+            size, mtime_ns, since = self.pending[path]
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                self.pending[path] = (st.st_size, st.st_mtime_ns, now)
+                since = now
+            elif now - since >= self.stable_seconds and st.st_size > 0:
+                del self.pending[path]
+                self.dispatched[path] = (size, mtime_ns)
+                self.on_ready(path)
+                continue
+            remaining = max(since + self.stable_seconds - now, 0.05)
+            next_check = remaining if next_check is None else min(next_check, remaining)
+        return next_check
+
+    def _add_watches(self, inotify):
+        inotify.add_watch(self.directory)
+        if self.recursive:
+            for path in self.directory.rglob('*'):
+                if path.is_dir():
+                    inotify.add_watch(path)
+
+    def run(self):
+        """stop()이 호출될 때까지 블록"""
+        if self.include_existing:
+            self._scan()
+        else:
+            for path in (self.directory.rglob('*') if self.recursive else self.directory.iterdir()):
+                if path.is_file() and self._matches(path):
+                    st = path.stat()
+                    self.dispatched[path] = (st.st_size, st.st_mtime_ns)
+        if self.use_inotify:
+            self._run_inotify()
+        else:
+            self._run_polling()
+
+    def _run_polling(self):
+        while not self.stop_event.is_set():
+            self._scan()
+            next_check = self._check_pending()
+            timeout = self.poll_interval if next_check is None else min(next_check, self.poll_interval)
+            self.stop_event.wait(timeout)
+
+    def _run_inotify(self):
+        inotify = Inotify()
+        try:
+            self._add_watches(inotify)
+            # 감시 등록 전에 들어온 파일 반영
+            self._scan()
+            while not self.stop_event.is_set():
+                timeout = self._check_pending()
+                readable, _, _ = select.select([inotify.fd, self._wake_r], [], [], timeout)
+                if self._wake_r in readable:
+                    os.read(self._wake_r, 64)
+                if inotify.fd not in readable:
+                    continue
+                for directory, name, mask in inotify.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        self._scan()
+                        continue
+                    if directory is None or not name:
+                        continue
+                    path = directory / name
+                    if mask & IN_ISDIR:
+                        if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                            inotify.add_watch(path)
+                            self._scan()
+                    elif self._matches(path):
+                        self._touch(path)
+        finally:
+            inotify.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
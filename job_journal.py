@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+작업 저널 (SQLite, ~/.mp4tomp3/jobs.db)
+
+일괄 변환의 파일별 상태를 디스크에 기록해, 프로세스가 죽거나 노트북이 잠든 뒤에도
+끝나지 않은 파일만 이어서 변환할 수 있게 한다.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path.home() / '.mp4tomp3' / 'jobs.db'
+
+QUEUED = 'queued'
+PROBING = 'probing'
+ENCODING = 'encoding'
+TRANSCRIBING = 'transcribing'
+DONE = 'done'
+FAILED = 'failed'
+
+STATES = (QUEUED, PROBING, ENCODING, TRANSCRIBING, DONE, FAILED)
+FINISHED_STATES = (DONE, FAILED)
+
+
+class JobJournal:
+    """일괄 변환 작업 상태 저널"""
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        # 커밋마다 WAL에 동기 기록 - 전원이 나가도 마지막 상태가 남도록
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=FULL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT NOT NULL,
+                options TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                batch_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                input_path TEXT NOT NULL,
+                output_path TEXT,
+                state TEXT NOT NULL,
+                error TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (batch_id, input_path)
+            );
+        ''')
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def start_batch(self, paths, options=None, source='cli'):
+        """새 배치 등록 → batch_id (모든 파일은 queued)"""
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO batches (source, options, created_at) VALUES (?, ?, ?)",
+                (source, json.dumps(options or {}), now)
+            )
+            batch_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (batch_id, seq, input_path, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(batch_id, seq, os.path.abspath(str(path)), QUEUED, now) for seq, path in enumerate(paths)]
+            )
+            self.conn.commit()
+        return batch_id
+
+    def set_state(self, batch_id, input_path, state, error='', output_path=None):
+        """파일 상태 갱신"""
+        if state not in STATES:
+            raise ValueError(f'알 수 없는 상태: {state}')
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, output_path = COALESCE(?, output_path), updated_at = ? "
+                "WHERE batch_id = ? AND input_path = ?",
+                (state, error, str(output_path) if output_path else None, time.time(),
+                 batch_id, os.path.abspath(str(input_path)))
+            )
+            self.conn.commit()
+
+    def finish_batch(self, batch_id):
+        with self.lock:
+            self.conn.execute("UPDATE batches SET finished_at = ? WHERE id = ?", (time.time(), batch_id))
+            self.conn.commit()
+
+    def batch_options(self, batch_id):
+        with self.lock:
+            row = self.conn.execute("SELECT options FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def unfinished_jobs(self, batch_id):
+        """done/failed가 아닌 파일 목록 (등록 순서)"""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT input_path FROM jobs WHERE batch_id = ? AND state NOT IN ({','.join('?' * len(FINISHED_STATES))}) "
+                "ORDER BY seq",
+                (batch_id, *FINISHED_STATES)
+            ).fetchall()
+        return [Path(row[0]) for row in rows]
+
+    def failed_jobs(self, batch_id):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT input_path FROM jobs WHERE batch_id = ? AND state = ? ORDER BY seq", (batch_id, FAILED)
+            ).fetchall()
+        return [Path(row[0]) for row in rows]
+
+    def latest_unfinished_batch(self, source=None):
+        """끝나지 않은 가장 최근 배치 id 또는 None"""
+        query = "SELECT id FROM batches WHERE finished_at IS NULL"
+        params = ()
+        if source:
+            query += " AND source = ?"
+            params = (source,)
+        with self.lock:
+            row = self.conn.execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+        return row[0] if row else None
+
+    def summary(self, batch_id):
+        """상태별 파일 수"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE batch_id = ? GROUP BY state", (batch_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def prune(self, keep_days=30):
+        """오래된 완료 배치 정리"""
+        cutoff = time.time() - keep_days * 86400
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM jobs WHERE batch_id IN (SELECT id FROM batches WHERE finished_at IS NOT NULL AND finished_at < ?)",
+                (cutoff,)
+            )
+            self.conn.execute("DELETE FROM batches WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+            self.conn.commit()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+작업 순서 스케줄러 - 프로브한 길이와 과거 인코딩 속도로 파일별 소요 시간을 예측해 순서를 정한다.
+
+작업자 풀에서는 가장 긴 파일이 마지막에 시작되면 나머지 코어가 모두 놀면서 배치가 끝나기를
+기다린다. 긴 작업부터(LPT) 넣으면 배치 전체 시간(makespan)이 최적의 4/3배 이내로 줄고,
+짧은 작업부터(SPT) 넣으면 첫 결과가 빨리 나와 화면에서 기다리는 시간이 짧다.
+
+인코딩 속도 기록: ~/.mp4tomp3/encode_history.db
+"""
+
+import time
+import heapq
+import sqlite3
+import threading
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path.home() / '.mp4tomp3' / 'encode_history.db'
+
+POLICY_LPT = 'lpt'
+POLICY_SPT = 'spt'
+POLICY_FIFO = 'fifo'
+POLICIES = (POLICY_LPT, POLICY_SPT, POLICY_FIFO)
+
+# 기록이 없을 때 쓰는 작업 종류별 처리 속도 (배속)와 파일당 고정 비용(초)
+DEFAULT_SPEEDS = {
+    'copy': 500.0,
+    'subprocess': 40.0,
+    'pyav': 20.0,
+    'segmented': 150.0,
+    'group': 80.0,
+}
+DEFAULT_STT_SPEED = 3.0
+DEFAULT_OVERHEAD = 0.3
+
+# 오래된 기록일수록 덜 반영 (기록 하나마다 곱하는 감쇠율)
+HISTORY_DECAY = 0.95
+# 짧은 파일과 긴 파일이 모두 이만큼 섞여야 고정 비용과 속도를 따로 추정한다
+MIN_DURATION_SPREAD = 5.0
+
+
+def simulate_makespan(estimates, workers):
+    """주어진 순서대로 가장 먼저 비는 작업자에 넣었을 때 마지막 작업이 끝나는 시각"""
+    finish = [0.0] * max(1, min(workers, len(estimates)))
+    for seconds in estimates:
+        heapq.heapreplace(finish, finish[0] + seconds)
+    return max(finish) if estimates else 0.0
+
+
+def order_units(units, policy):
+    """[(키, 예상 초)] → 정책 순서로 정렬한 새 목록 (같은 값이면 원래 순서 유지)"""
+    if policy == POLICY_LPT:
+        return sorted(units, key=lambda unit: -unit[1])
+    if policy == POLICY_SPT:
+        return sorted(units, key=lambda unit: unit[1])
+    return list(units)
+
+
+def interleave(units, key):
+    """key가 같은 단위끼리의 순서는 유지하면서 key별로 번갈아 배치 (장치별 라운드 로빈)"""
+    queues = {}
+    for unit in units:
+        queues.setdefault(key(unit), []).append(unit)
+    lanes = list(queues.values())
+    result = []
+    for i in range(max(map(len, lanes), default=0)):
+        result += [lane[i] for lane in lanes if i < len(lane)]
+    return result
+
+
+class EncodeHistory:
+    """작업 종류별 (길이 → 소요 시간) 기록 - 감쇠 최소제곱으로 고정 비용과 속도를 추정한다"""
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS speeds (
+                kind TEXT PRIMARY KEY,
+                n REAL NOT NULL,
+                sx REAL NOT NULL,
+                sy REAL NOT NULL,
+                sxx REAL NOT NULL,
+                sxy REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+        self.models = {}
+        for kind, *sums in self.conn.execute('SELECT kind, n, sx, sy, sxx, sxy FROM speeds'):
+            self.models[kind] = sums
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def record(self, kind, duration, elapsed):
+        """변환 하나의 (입력 길이, 소요 시간) 반영"""
+        if duration <= 0 or elapsed <= 0:
+            return
+        with self.lock:
+            n, sx, sy, sxx, sxy = [value * HISTORY_DECAY for value in self.models.get(kind, [0.0] * 5)]
+            sums = [n + 1, sx + duration, sy + elapsed, sxx + duration * duration, sxy + duration * elapsed]
+            self.models[kind] = sums
+            self.conn.execute('INSERT OR REPLACE INTO speeds VALUES (?, ?, ?, ?, ?, ?, ?)',
+                              (kind, *sums, time.time()))
+            self.conn.commit()
+
+    def model(self, kind):
+        """(파일당 고정 비용 초, 처리 속도 배속)"""
+        with self.lock:
+            sums = self.models.get(kind)
+        default_speed = DEFAULT_STT_SPEED if kind.endswith('+stt') else DEFAULT_SPEEDS.get(kind, 40.0)
+        if not sums or sums[0] < 1:
+            return DEFAULT_OVERHEAD, default_speed
+        n, sx, sy, sxx, sxy = sums
+        variance = sxx / n - (sx / n) ** 2
+        if variance >= MIN_DURATION_SPREAD ** 2:
+            slope = (sxy / n - (sx / n) * (sy / n)) / variance
+            overhead = sy / n - slope * sx / n
+            if slope > 0 and overhead >= 0:
+                return overhead, 1.0 / slope
+        # 길이가 비슷한 기록뿐이면 고정 비용은 기본값으로 두고 속도만 맞춘다
+        work = sy - DEFAULT_OVERHEAD * n
+        if work <= 0 or sx <= 0:
+            return min(DEFAULT_OVERHEAD, sy / n), default_speed
+        return DEFAULT_OVERHEAD, sx / work
+
+    def estimate(self, kind, duration):
+        """입력 길이(초) → 예상 소요 시간(초)"""
+        overhead, speed = self.model(kind)
+        return overhead + max(duration, 0.0) / speed
+
+
+class ScheduleReport:
+    """배치 하나의 예상/실제 makespan"""
+
+    def __init__(self, policy, workers, jobs, predicted, baseline):
+        self.policy = policy
+        self.workers = workers
+        self.jobs = jobs
+        # 선택한 순서와 입력 순서로 돌렸을 때의 예상 makespan (초)
+        self.predicted = predicted
+        self.baseline = baseline
+        self.actual = None
+
+    def finish(self, actual):
+        self.actual = actual
+        return self
+
+    @property
+    def error(self):
+        """예측 오차 비율 (실제 기준)"""
+        if not self.actual:
+            return None
+        return (self.predicted - self.actual) / self.actual
+
+    def __str__(self):
+        text = f"스케줄 {self.policy} (작업 {self.jobs}개, 동시 {self.workers}개): 예상 {self.predicted:.1f}s"
+        if self.policy != POLICY_FIFO:
+            text += f" (입력 순서면 {self.baseline:.1f}s)"
+        if self.actual is not None:
+            text += f", 실제 {self.actual:.1f}s ({self.error * 100:+.0f}%)"
+        return text
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+MP4 to MP3 명령줄 도구 (Tk 없이 실행)
+
+사용 예:
+    python mp4tomp3.py convert lectures/ "*.mp4" -j 8
+    python mp4tomp3.py watch /mnt/recorder --stable 10
+    python mp4tomp3.py resume
+"""
+
+import sys
+import os
+import argparse
+import time
+import shutil
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from batch_converter import (BatchConverter, ConversionJob, expand_inputs, find_ffmpeg, default_workers,
+                             DEFAULT_BITRATE, DEFAULT_GROUP_SIZE, GROUP_MAX_DURATION)
+from probe_cache import ProbeCache
+from conversion_cache import ConversionCache
+from job_journal import JobJournal, DONE, FAILED, QUEUED
+from folder_watcher import FolderWatcher, DEFAULT_STABLE_SECONDS, DEFAULT_POLL_INTERVAL
+from progress_bus import ProgressBus
+from job_scheduler import EncodeHistory, POLICIES, POLICY_LPT
+from concurrency_controller import ConcurrencyController
+from device_limits import DeviceLimiter, parse_device_jobs, device_jobs_arg
+from prefetch_stager import PrefetchStager, DEFAULT_BUDGET, DEFAULT_LOOKAHEAD
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+# 저널에 저장해 resume 때 그대로 복원하는 옵션
+ENCODE_OPTION_KEYS = ('jobs', 'bitrate', 'output_dir', 'recursive', 'ffmpeg', 'copy', 'copy_aac', 'stt',
+                      'language', 'force', 'no_cache', 'no_probe_cache', 'segments', 'timeout',
+                      'backend', 'group_size', 'schedule', 'adaptive', 'stt_workers', 'stt_chunked',
+                      'device_jobs', 'stage_ahead', 'stage_dir', 'stage_budget')
+
+
+def print_summary(results, elapsed, stream=sys.stdout):
+    """파일별 결과 요약 출력"""
+    failed = [r for r in results if not r.ok]
+    skipped = [r for r in results if r.skipped]
+    for result in results:
+        status = ('SKIP' if result.skipped else 'OK  ') if result.ok else 'FAIL'
+        line = f"{status} {result.input_path} ({result.elapsed:.1f}s"
+        if result.ok and result.speed and not result.skipped:
+            line += f", {result.speed:.0f}x"
+        if result.stream_copy:
+            line += f", copy → {result.output_path.suffix}"
+        line += ")"
+        if not result.ok:
+            line += f" - {result.error}"
+            if result.error_code:
+                line += f" [{result.error_code}]"
+        print(line, file=stream)
+    print(f"\n총 {len(results)}개, 성공 {len(results) - len(failed)}개 (건너뜀 {len(skipped)}개), "
+          f"실패 {len(failed)}개 ({elapsed:.1f}s)", file=stream)
+
+
+def build_converter(args):
+    """공통 옵션으로 BatchConverter 생성 - 실패 시 오류 메시지 출력 후 None"""
+    ffmpeg_path = args.ffmpeg or find_ffmpeg()
+    if not ffmpeg_path:
+        print("오류: ffmpeg를 찾을 수 없습니다", file=sys.stderr)
+        return None
+
+    transcriber = None
+    whisper_pool = None
+    transcript_cache = None
+    stt_params = None
+    stt_workers = 1
+    if args.stt:
+        chunked = getattr(args, 'stt_chunked', False)
+        try:
+            from whisper_manager import WhisperManager
+            manager = WhisperManager()
+            if chunked:
+                from vad_chunker import ChunkedTranscriber
+                # 작업자 프로세스마다 모델을 올리고 긴 녹음을 무음에서 잘라 나눠 전사
+                whisper_pool = ChunkedTranscriber(args.stt, getattr(args, 'stt_workers', None), manager).start()
+                # 한 파일의 조각이 끝나 가는 동안 다음 파일의 조각이 작업자를 채우도록
+                stt_workers = 2
+            else:
+                from whisper_pool import WhisperModelPool
+                # 복제본은 사용 가능 메모리가 허락할 때만 늘어난다
+                whisper_pool = WhisperModelPool(manager, args.stt, getattr(args, 'stt_workers', None))
+                whisper_pool.load_first()
+                stt_workers = whisper_pool.max_replicas
+        except Exception as e:
+            print(f"오류: Whisper 모델을 로드할 수 없습니다: {e}", file=sys.stderr)
+            return None
+        stt_params = {'model': args.stt, 'model_hash': manager.model_file_hash(args.stt),
+                      'language': args.language, 'mode': 'chunked' if chunked else 'serial'}
+        if args.no_cache:
+            transcriber = whisper_pool.transcriber(args.language)
+        else:
+            from transcript_cache import TranscriptCache, DEFAULT_QUOTA_MB
+            # 같은 오디오 + 모델 + 옵션이면 저장된 전사 결과를 돌려준다 (force면 다시 전사)
+            transcript_cache = TranscriptCache(quota_mb=manager.config.get('transcript_cache_mb', DEFAULT_QUOTA_MB))
+            transcriber = transcript_cache.transcriber(
+                whisper_pool.transcribe, stt_params['model'], stt_params['model_hash'], args.language,
+                mode=stt_params['mode'], refresh=args.force)
+
+    controller = None
+    if getattr(args, 'adaptive', False):
+        # -j는 시작값, 이후 처리량을 보며 조절
+        controller = ConcurrencyController(encode_workers=args.jobs, max_stt=getattr(args, 'stt_workers', None))
+    stager = None
+    stage_ahead = getattr(args, 'stage_ahead', 0)
+    if stage_ahead:
+        stager = PrefetchStager(getattr(args, 'stage_dir', None),
+                                int(getattr(args, 'stage_budget', DEFAULT_BUDGET / (1 << 30)) * (1 << 30)),
+                                stage_ahead)
+    device_limits = None
+    device_jobs = getattr(args, 'device_jobs', None)
+    if device_jobs:
+        # 장치 한도는 --device-jobs를 줄 때만 (NAS에서 -j보다 적게 돌면 이유를 알기 어려우므로)
+        device_limits = DeviceLimiter(*parse_device_jobs(device_jobs))
+    probe_cache = None if args.no_probe_cache else ProbeCache()
+    conversion_cache = None if args.no_cache else ConversionCache()
+    converter = BatchConverter(ffmpeg_path, workers=args.jobs, bitrate=args.bitrate, output_dir=args.output_dir,
+                               probe_cache=probe_cache, copy_mp3=args.copy, copy_aac=args.copy_aac,
+                               transcriber=transcriber, conversion_cache=conversion_cache, force=args.force,
+                               segments=getattr(args, 'segments', 0), timeout=getattr(args, 'timeout', None),
+                               backend=getattr(args, 'backend', 'subprocess'),
+                               group_size=getattr(args, 'group_size', 0),
+                               schedule=getattr(args, 'schedule', POLICY_LPT), history=EncodeHistory(),
+                               controller=controller, device_limits=device_limits, stager=stager,
+                               stt_workers=stt_workers, stt_params=stt_params)
+    # 배치가 끝나면 요약을 출력하기 위해 보관
+    converter.whisper_pool = whisper_pool
+    converter.transcript_cache = transcript_cache
+    return converter
+
+
+class StatusLine:
+    """터미널 한 줄 진행 표시 - ProgressBus 구독자"""
+
+    MAX_JOBS = 3
+
+    def __init__(self, stream=sys.stderr):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.active = {}
+        self.width = 0
+
+    def on_events(self, events):
+        with self.lock:
+            for event in events:
+                if event.finished:
+                    self.active.pop(event.job_id, None)
+                else:
+                    self.active[event.job_id] = event
+            self._draw()
+
+    def _draw(self):
+        parts = []
+        for event in list(self.active.values())[:self.MAX_JOBS]:
+            part = f"{os.path.basename(event.job_id)} "
+            part += f"{event.fraction * 100:.0f}%" if event.fraction is not None else event.stage
+            if event.speed:
+                part += f" {event.speed:.0f}x"
+            parts.append(part)
+        if len(self.active) > self.MAX_JOBS:
+            parts.append(f"+{len(self.active) - self.MAX_JOBS}")
+        text = ' | '.join(parts)[:shutil.get_terminal_size().columns - 1]
+        self.stream.write('\r' + text.ljust(self.width))
+        self.stream.flush()
+        self.width = len(text)
+
+    def print(self, line, job_id=None):
+        """진행 줄을 지우고 한 줄 출력한 뒤 다시 그림 (job_id는 표시에서 제외)"""
+        with self.lock:
+            self.active.pop(job_id, None)
+            if self.width:
+                self.stream.write('\r' + ' ' * self.width + '\r')
+                self.width = 0
+            print(line, file=self.stream)
+            self._draw()
+
+    def clear(self):
+        with self.lock:
+            self.active.clear()
+            if self.width:
+                self.stream.write('\r' + ' ' * self.width + '\r')
+                self.stream.flush()
+                self.width = 0
+
+
+def format_status(result):
+    return ('SKIP' if result.skipped else 'OK') if result.ok else 'FAIL'
+
+
+def run_batch(args, files, journal=None, batch_id=None):
+    """파일 목록 변환 + 저널 기록 + 요약 출력 → 종료 코드"""
+    converter = build_converter(args)
+    if not converter:
+        return EXIT_USAGE
+    if journal:
+        converter.state_callback = lambda path, state: journal.set_state(batch_id, path, state)
+    done = [0]
+    status_line = None
+    if not args.quiet and sys.stderr.isatty():
+        # 진행 중인 파일을 한 줄로 표시 (진행 이벤트는 버스에서 10 Hz로 합쳐 받음)
+        status_line = StatusLine()
+        converter.progress_bus = ProgressBus()
+        converter.progress_bus.subscribe(status_line.on_events)
+        converter.progress_bus.start_ticker()
+
+    def on_result(result):
+        done[0] += 1
+        if journal:
+            journal.set_state(batch_id, result.input_path, DONE if result.ok else FAILED,
+                              result.error, result.output_path)
+        if not args.quiet:
+            line = f"[{done[0]}/{len(files)}] {format_status(result)} {result.input_path.name}"
+            if status_line:
+                status_line.print(line, str(result.input_path))
+            else:
+                print(line, file=sys.stderr)
+
+    start = time.time()
+    results = None
+    stt_summary = None
+    try:
+        results = converter.convert(files, result_callback=on_result)
+    except KeyboardInterrupt:
+        # 진행 중인 ffmpeg를 먼저 멈춘 뒤 풀을 닫는다
+        converter.cancel()
+    finally:
+        converter.close()
+        if converter.whisper_pool:
+            # 닫으면 복제본 수가 0이 되므로 요약을 먼저 만든다
+            stt_summary = converter.whisper_pool.summary()
+            converter.whisper_pool.close()
+        if status_line:
+            converter.progress_bus.stop_ticker()
+            status_line.clear()
+    if results is None:
+        print("\n중단됨", file=sys.stderr)
+        if journal:
+            print(f"이어서 변환: python mp4tomp3.py resume {batch_id}", file=sys.stderr)
+        return EXIT_FAILED
+
+    if journal:
+        journal.finish_batch(batch_id)
+    print_summary(results, time.time() - start)
+    if converter.last_schedule:
+        print(converter.last_schedule)
+    if converter.controller:
+        print(converter.controller.summary())
+    if stt_summary:
+        print(stt_summary)
+        print(converter.last_pipeline.summary())
+    if converter.transcript_cache:
+        print(converter.transcript_cache.summary())
+    if converter.stager and converter.stager.staged_count + converter.stager.direct_count:
+        print(converter.stager.summary())
+    return EXIT_OK if all(r.ok for r in results) else EXIT_FAILED
+
+
+def cmd_convert(args):
+    """convert 하위 명령"""
+    files = expand_inputs(args.inputs, recursive=args.recursive)
+    if not files:
+        print("오류: 변환할 파일이 없습니다", file=sys.stderr)
+        return EXIT_USAGE
+
+    journal = batch_id = None
+    if not args.no_journal:
+        journal = JobJournal()
+        options = {key: getattr(args, key) for key in ENCODE_OPTION_KEYS}
+        batch_id = journal.start_batch(files, options, source='cli')
+    return run_batch(args, files, journal, batch_id)
+
+
+def cmd_resume(args):
+    """resume 하위 명령 - 중단된 배치의 끝나지 않은 파일만 다시 변환"""
+    journal = JobJournal()
+    batch_id = args.batch_id or journal.latest_unfinished_batch(source='cli')
+    options = journal.batch_options(batch_id) if batch_id else None
+    if options is None:
+        print("이어서 변환할 배치가 없습니다", file=sys.stderr)
+        return EXIT_OK
+
+    files = journal.unfinished_jobs(batch_id)
+    if args.retry_failed:
+        files += journal.failed_jobs(batch_id)
+    files = [f for f in files if f.exists()]
+    if not files:
+        journal.finish_batch(batch_id)
+        print(f"배치 {batch_id}: 남은 파일이 없습니다", file=sys.stderr)
+        return EXIT_OK
+    for path in files:
+        journal.set_state(batch_id, path, QUEUED)
+
+    print(f"배치 {batch_id}: {len(files)}개 파일 이어서 변환", file=sys.stderr)
+    batch_args = argparse.Namespace(**options)
+    batch_args.quiet = args.quiet
+    return run_batch(batch_args, files, journal, batch_id)
+
+
+def cmd_watch(args):
+    """watch 하위 명령 - 새로 들어와 쓰기가 끝난 파일을 계속 변환"""
+    if not os.path.isdir(args.directory):
+        print(f"오류: 폴더가 없습니다: {args.directory}", file=sys.stderr)
+        return EXIT_USAGE
+
+    converter = build_converter(args)
+    if not converter:
+        return EXIT_USAGE
+
+    controller = converter.controller
+    if controller:
+        controller.start()
+    lock = threading.Lock()
+    counts = {'ok': 0, 'failed': 0}
+
+    def on_done(result):
+        with lock:
+            counts['ok' if result.ok else 'failed'] += 1
+        line = f"{time.strftime('%H:%M:%S')} {format_status(result)} {result.input_path}"
+        if not result.ok:
+            line += f" - {result.error}"
+        print(line, flush=True)
+
+    # convert와 같은 프로브 → 인코딩 → STT 파이프라인에 들어온 순서대로 넣는다
+    pipeline = converter.build_pipeline(on_done).start()
+
+    def on_ready(path):
+        pipeline.submit(ConversionJob([path]))
+
+    watcher = FolderWatcher(
+        args.directory, on_ready,
+        stable_seconds=args.stable,
+        poll_interval=args.poll_interval,
+        use_inotify=not args.poll,
+        recursive=args.recursive,
+        include_existing=not args.skip_existing
+    )
+    mode = 'inotify' if watcher.use_inotify else f'polling {args.poll_interval}s'
+    print(f"감시 중: {args.directory} ({mode}, 안정화 {args.stable}s, 동시 {converter.workers}개)", file=sys.stderr)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n종료 중...", file=sys.stderr)
+        watcher.stop()
+        converter.cancel()
+    finally:
+        pipeline.close()
+        pipeline.join()
+        converter.close()
+        if converter.whisper_pool:
+            converter.whisper_pool.close()
+        if controller:
+            controller.stop()
+            print(controller.summary(), file=sys.stderr)
+    print(f"성공 {counts['ok']}개, 실패 {counts['failed']}개", file=sys.stderr)
+    return EXIT_OK if counts['failed'] == 0 else EXIT_FAILED
+
+
+def add_encode_arguments(parser):
+    """convert/watch 공통 인코딩 옵션"""
+    parser.add_argument('-j', '--jobs', type=int, default=default_workers(),
+                        help='동시 ffmpeg 프로세스 수 (기본: CPU 코어 수)')
+    parser.add_argument('-b', '--bitrate', default=DEFAULT_BITRATE, help='MP3 비트레이트 (기본: 192k)')
+    parser.add_argument('-o', '--output-dir', help='출력 폴더 (기본: 입력 파일 옆)')
+    parser.add_argument('-r', '--recursive', action='store_true', help='폴더를 하위 폴더까지 탐색')
+    parser.add_argument('--ffmpeg', help='ffmpeg 실행 파일 경로')
+    parser.add_argument('--copy', action='store_true',
+                        help='원본 오디오가 MP3면 재인코딩 없이 스트림 복사')
+    parser.add_argument('--copy-aac', action='store_true',
+                        help='원본 오디오가 AAC면 재인코딩 없이 .m4a로 스트림 복사')
+    parser.add_argument('--stt', metavar='MODEL', help='Whisper 모델로 음성 인식 후 .txt 저장 (예: tiny, small)')
+    parser.add_argument('--language', default='ko', help='음성 인식 언어 (기본: ko)')
+    parser.add_argument('--stt-workers', type=int, metavar='N',
+                        help='동시에 올릴 Whisper 모델 복제본 최대 수 (기본: CPU 코어 수/4, '
+                             '사용 가능 메모리가 모자라면 늘리지 않고 기다림)')
+    parser.add_argument('--stt-chunked', action='store_true',
+                        help='긴 녹음을 무음 구간에서 30초 이상 조각으로 잘라 여러 프로세스에서 병렬 전사 '
+                             '(--stt-workers는 작업자 프로세스 수, 기본: 메모리/코어 기준)')
+    parser.add_argument('-f', '--force', action='store_true', help='변환/전사 캐시를 무시하고 모두 다시 변환')
+    parser.add_argument('--no-cache', action='store_true', help='변환/전사 캐시를 사용/기록하지 않음')
+    parser.add_argument('--no-probe-cache', action='store_true', help='프로브 캐시를 사용하지 않음')
+    parser.add_argument('--segments', type=int, default=0, metavar='N',
+                        help='20분 이상인 파일을 N개 구간으로 나눠 병렬 인코딩 (--stt와 함께 쓰면 무시)')
+    parser.add_argument('--backend', choices=('subprocess', 'pyav'), default='subprocess',
+                        help='인코딩 백엔드 (pyav: 짧은 파일이 많을 때 프로세스 생성 비용 절감, pip install av 필요)')
+    parser.add_argument('--group-size', type=int, default=0, metavar='N',
+                        help=f'{GROUP_MAX_DURATION:.0f}초 이하 파일을 N개씩 묶어 ffmpeg 한 번으로 변환 '
+                             f'(예: {DEFAULT_GROUP_SIZE}, --stt와 함께 쓰면 무시)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='처리량/CPU/부하를 보며 ffmpeg와 STT 동시 실행 수를 자동 조절 (-j는 시작값, '
+                             '결정 기록: ~/.mp4tomp3/concurrency.log)')
+    parser.add_argument('--device-jobs', action='append', type=device_jobs_arg, metavar='N|PATH=N',
+                        help='장치(st_dev)별 동시 작업 수 제한 켜기 (기본: 제한 없음) - N은 회전식 디스크/네트워크 '
+                             '공유 한도(지정하지 않으면 2, 0이면 제한 없음), PATH=N은 PATH가 있는 장치 '
+                             '(여러 번 지정 가능)')
+    parser.add_argument('--stage-ahead', type=int, nargs='?', const=DEFAULT_LOOKAHEAD, default=0, metavar='K',
+                        help=f'네트워크 공유에 있는 입력을 다음 K개까지 로컬 스크래치로 미리 복사 '
+                             f'(기본: 끔, K 없이 주면 {DEFAULT_LOOKAHEAD})')
+    parser.add_argument('--stage-dir', metavar='DIR',
+                        help='스테이징 스크래치 폴더 (기본: 시스템 임시 폴더, /dev/shm을 주면 RAM에 복사 - '
+                             '사용 가능 메모리가 모자라면 원본을 직접 읽음)')
+    parser.add_argument('--stage-budget', type=float, default=DEFAULT_BUDGET / (1 << 30), metavar='GB',
+                        help=f'스크래치에 동시에 둘 복사본 총 크기 (기본 {DEFAULT_BUDGET / (1 << 30):.0f}GB)')
+    parser.add_argument('--schedule', choices=POLICIES, default=POLICY_LPT,
+                        help='작업 순서: lpt=예상 시간이 긴 파일부터 (배치 전체 시간 최소), '
+                             'spt=짧은 파일부터 (첫 결과가 빠름), fifo=입력 순서 (기본: lpt)')
+    parser.add_argument('--timeout', type=float, metavar='SECONDS',
+                        help='파일별 ffmpeg 제한 시간 (기본: 입력 길이와 5분 중 큰 값, 0이면 제한 없음)')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='mp4tomp3', description='MP4 to MP3 Converter')
+    subparsers = parser.add_subparsers(dest='command')
+
+    convert = subparsers.add_parser('convert', help='파일/폴더/글롭을 MP3로 일괄 변환')
+    convert.add_argument('inputs', nargs='+', help='입력 파일, 폴더 또는 글롭 패턴')
+    add_encode_arguments(convert)
+    convert.add_argument('--no-journal', action='store_true', help='작업 저널을 기록하지 않음 (resume 불가)')
+    convert.add_argument('-q', '--quiet', action='store_true', help='파일별 진행 출력 생략')
+    convert.set_defaults(func=cmd_convert)
+
+    resume = subparsers.add_parser('resume', help='중단된 convert 배치를 이어서 변환')
+    resume.add_argument('batch_id', nargs='?', type=int, help='배치 번호 (기본: 가장 최근의 끝나지 않은 배치)')
+    resume.add_argument('--retry-failed', action='store_true', help='실패한 파일도 다시 시도')
+    resume.add_argument('-q', '--quiet', action='store_true', help='파일별 진행 출력 생략')
+    resume.set_defaults(func=cmd_resume)
+
+    watch = subparsers.add_parser('watch', help='폴더를 감시하며 새 파일을 자동 변환')
+    watch.add_argument('directory', help='감시할 폴더')
+    add_encode_arguments(watch)
+    watch.add_argument('--stable', type=float, default=DEFAULT_STABLE_SECONDS,
+                       help='파일 크기가 이 시간(초) 동안 변하지 않으면 변환 (기본: 5)')
+    watch.add_argument('--poll', action='store_true', help='inotify 대신 폴링 사용 (네트워크 공유 등)')
+    watch.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                       help='폴링 간격(초) (기본: 2)')
+    watch.add_argument('--skip-existing', action='store_true', help='시작 시 이미 있는 파일은 건너뜀')
+    watch.set_defaults(func=cmd_watch)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return EXIT_USAGE
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+입력 미리 복사(스테이징) - 느린 마운트(네트워크 공유)에 있는 입력을 로컬 스크래치 폴더로 복사해 둔다.
+
+ffmpeg가 네트워크 공유에서 바로 읽으면 인코더가 I/O를 기다리며 논다. 스테이저는 앞선 작업이
+인코딩하는 동안 대기열에서 다음 K개 입력을 한 파일씩 순서대로 스크래치(tmpfs/SSD)에 복사하고,
+작업이 시작되면 복사본 경로를 내준다. 복사본은 작업이 끝나면 지운다.
+
+- 스크래치에 두는 총 바이트는 budget을 넘지 않는다 (넘으면 앞 작업이 끝나기를 기다림)
+- 파일 하나가 budget보다 크거나 스크래치 디스크 여유 공간이 모자라면 복사하지 않고 원본을 직접 읽는다
+  (스크래치가 tmpfs면 복사본이 RAM을 차지하므로 사용 가능 메모리도 확인한다)
+- 복사가 시작되기 전에 작업 차례가 오면 그 파일도 원본을 직접 읽는다
+- 복사 실패는 진행률 버스에 'staging' 단계 메시지로 알리고 요약에 센다
+
+기본 스크래치는 시스템 임시 폴더다. /dev/shm은 --stage-dir로 고를 때만 쓴다.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from device_limits import device_of, device_kind, KIND_NETWORK, KIND_MEMORY, DEVICE_NUMBERS
+
+DEFAULT_BUDGET = 4 << 30
+DEFAULT_LOOKAHEAD = 2
+# 스크래치 디스크(tmpfs면 메모리)에 남겨 둘 여유 공간
+MIN_FREE_BYTES = 512 << 20
+COPY_CHUNK = 4 << 20
+
+# 항목 상태
+PENDING = 'pending'
+COPYING = 'copying'
+STAGED = 'staged'
+IN_USE = 'in_use'
+DIRECT = 'direct'
+DONE = 'done'
+
+
+# 단계 이름 (진행률 버스)
+STAGE_STAGING = 'staging'
+
+
+def default_scratch_dir():
+    """시스템 임시 폴더 (/dev/shm은 복사본이 RAM을 차지하므로 기본값으로 쓰지 않음)"""
+    return Path(tempfile.gettempdir()) / 'mp4tomp3-staging'
+
+
+class StagedFile:
+    __slots__ = ('source', 'job_id', 'size', 'state', 'staged_path')
+
+    def __init__(self, source, size, job_id=None):
+        self.source = source
+        # 진행률 버스 작업 ID (변환기가 쓰는 입력 경로 문자열)
+        self.job_id = job_id or source
+        self.size = size
+        self.state = PENDING
+        self.staged_path = None
+
+
+class PrefetchStager:
+    """느린 장치의 입력을 다음 lookahead개까지 미리 복사"""
+
+    def __init__(self, scratch_dir=None, budget=DEFAULT_BUDGET, lookahead=DEFAULT_LOOKAHEAD, kinds=(KIND_NETWORK,)):
+        self.scratch_dir = Path(scratch_dir) if scratch_dir else default_scratch_dir()
+        self.budget = budget
+        self.lookahead = max(1, lookahead)
+        # 스테이징할 장치 종류 (device_limits.KIND_*)
+        self.kinds = kinds
+        self.condition = threading.Condition()
+        self.order = []
+        self.entries = {}
+        self.used = 0
+        self.work_dir = None
+        self.in_memory = False
+        self.progress_bus = None
+        self.copies = 0
+        self._thread = None
+        self._stop = False
+        # 통계
+        self.staged_count = 0
+        self.direct_count = 0
+        self.bytes_copied = 0
+        self.copy_seconds = 0.0
+        self.failed_count = 0
+        self.last_error = ''
+
+    def is_slow(self, path):
+        if not DEVICE_NUMBERS:
+            # 장치 종류를 알 수 없는 플랫폼(Windows)에서는 스테이징하지 않고 원본을 직접 읽는다
+            return False
+        dev = device_of(path)
+        return dev is not None and device_kind(dev) in self.kinds
+
+    def plan(self, paths, progress_bus=None):
+        """실행 순서대로 입력 목록 등록 후 복사 스레드 시작 (느린 장치의 파일만 대상)
+
+        progress_bus가 있으면 복사 실패를 그 입력의 'staging' 이벤트로 알린다.
+        """
+        self.progress_bus = progress_bus
+        if not DEVICE_NUMBERS:
+            return
+        kinds = {}
+        entries = []
+        for path in paths:
+            key = os.path.abspath(path)
+            dev = device_of(key)
+            if dev not in kinds:
+                kinds[dev] = dev is not None and device_kind(dev) in self.kinds
+            if not kinds[dev] or key in self.entries:
+                continue
+            try:
+                entries.append(StagedFile(key, os.path.getsize(key), str(path)))
+            except OSError:
+                continue
+        if not entries:
+            return
+        with self.condition:
+            for entry in entries:
+                self.entries[entry.source] = entry
+                self.order.append(entry)
+            self._stop = False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='prefetch-stager', daemon=True)
+                self._thread.start()
+            self.condition.notify_all()
+
+    def _next_candidate(self):
+        """다음에 복사할 항목 - 지금은 복사할 수 없으면 None (condition을 잡은 상태에서 호출)"""
+        ahead = sum(1 for entry in self.order if entry.state in (COPYING, STAGED))
+        if ahead >= self.lookahead:
+            return None
+        for entry in self.order:
+            if entry.state != PENDING:
+                continue
+            if entry.size > self.budget:
+                entry.state = DIRECT
+                continue
+            if self.used + entry.size > self.budget:
+                # 앞 작업의 복사본이 지워질 때까지 기다린다
+                return None
+            return entry
+        return None
+
+    def _has_pending(self):
+        return any(entry.state == PENDING for entry in self.order)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self._stop and self._has_pending() and (entry := self._next_candidate()) is None:
+                    self.condition.wait()
+                if self._stop or not self._has_pending():
+                    self._thread = None
+                    return
+                self.used += entry.size
+                entry.state = COPYING
+            staged = self._copy(entry)
+            with self.condition:
+                if staged is None:
+                    self.used -= entry.size
+                    entry.state = DIRECT
+                else:
+                    entry.staged_path = staged
+                    entry.state = STAGED
+                self.condition.notify_all()
+
+    def _copy(self, entry):
+        """스크래치로 복사 → 복사본 경로, 공간 부족/오류/중지면 None"""
+        try:
+            if self.work_dir is None:
+                self.scratch_dir.mkdir(parents=True, exist_ok=True)
+                self.work_dir = Path(tempfile.mkdtemp(prefix='batch-', dir=self.scratch_dir))
+                self.in_memory = device_kind(device_of(self.work_dir)) == KIND_MEMORY
+            if shutil.disk_usage(self.work_dir).free < entry.size + MIN_FREE_BYTES:
+                return None
+            if self.in_memory and not self._memory_allows(entry.size):
+                return None
+            # 확장자를 유지해야 ffmpeg가 형식을 바로 알아본다
+            self.copies += 1
+            target = self.work_dir / f"{self.copies}_{os.path.basename(entry.source)}"
+            part = target.with_name(target.name + '.part')
+            start = time.monotonic()
+            with open(entry.source, 'rb') as src, open(part, 'wb') as dst:
+                while True:
+                    if self._stop:
+                        dst.close()
+                        part.unlink()
+                        return None
+                    chunk = src.read(COPY_CHUNK)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            os.replace(part, target)
+        except OSError as e:
+            self._report_failure(entry, e)
+            return None
+        self.copy_seconds += time.monotonic() - start
+        self.bytes_copied += entry.size
+        return target
+
+    @staticmethod
+    def _memory_allows(size):
+        """tmpfs 복사본을 둘 만큼 사용 가능 메모리가 있는지 (알 수 없으면 복사하지 않음)"""
+        from whisper_pool import available_memory_mb
+        available = available_memory_mb()
+        return available is not None and available * (1 << 20) >= size + MIN_FREE_BYTES
+
+    def _report_failure(self, entry, error):
+        self.failed_count += 1
+        self.last_error = f"{os.path.basename(entry.source)}: {error}"
+        if self.progress_bus:
+            self.progress_bus.publish(entry.job_id, STAGE_STAGING,
+                                      message=f"스테이징 실패, 원본을 직접 읽습니다: {error}")
+
+    def acquire(self, path):
+        """작업 시작 - 읽을 경로 반환 (복사 중이면 끝날 때까지 기다림, 복사본이 없으면 원본)"""
+        key = os.path.abspath(path)
+        with self.condition:
+            entry = self.entries.get(key)
+            if entry is None:
+                return path
+            if entry.state == PENDING:
+                entry.state = DIRECT
+                self.condition.notify_all()
+            while entry.state == COPYING:
+                self.condition.wait()
+            if entry.state == STAGED:
+                entry.state = IN_USE
+                self.staged_count += 1
+                return entry.staged_path
+            self.direct_count += 1
+            return path
+
+    def release(self, path):
+        """작업 끝 - 복사본 삭제 후 예산 반환"""
+        key = os.path.abspath(path)
+        with self.condition:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            if entry.state == IN_USE:
+                self._remove(entry)
+            entry.state = DONE
+            self.condition.notify_all()
+
+    def _remove(self, entry):
+        try:
+            entry.staged_path.unlink()
+        except OSError:
+            pass
+        self.used -= entry.size
+        entry.staged_path = None
+
+    def finish(self):
+        """배치 종료 - 복사 스레드를 멈추고 남은 복사본과 작업 폴더 삭제"""
+        with self.condition:
+            self._stop = True
+            self.condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        with self.condition:
+            for entry in self.order:
+                if entry.staged_path is not None:
+                    self._remove(entry)
+            self.order.clear()
+            self.entries.clear()
+            self._thread = None
+        if self.work_dir is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+    def summary(self):
+        text = f"스테이징: 복사본 사용 {self.staged_count}개, 원본 직접 읽기 {self.direct_count}개"
+        if self.copy_seconds > 0:
+            text += f", {self.bytes_copied / (1 << 20):.0f}MB 복사 ({self.bytes_copied / (1 << 20) / self.copy_seconds:.0f}MB/s)"
+        if self.failed_count:
+            text += f", 복사 실패 {self.failed_count}개 (마지막: {self.last_error})"
+        return text
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+프로브 결과 영구 캐시 (SQLite, ~/.mp4tomp3/probe_cache.db)
+
+(path, size, mtime_ns, inode)가 같으면 ffmpeg를 실행하지 않고 저장된 결과를 반환한다.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+from media_probe import MediaInfo, probe_media
+
+DEFAULT_DB_PATH = Path.home() / '.mp4tomp3' / 'probe_cache.db'
+
+# SQLite 기본 바인딩 변수 제한(999)보다 작게
+QUERY_CHUNK = 500
+
+
+def _file_key(path):
+    """캐시 비교용 (size, mtime_ns, inode) - 파일이 없으면 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class ProbeCache:
+    """경로별 프로브 결과 캐시"""
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS probes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                info TEXT NOT NULL,
+                probed_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    @staticmethod
+    def _normalize(path):
+        return os.path.abspath(str(path))
+
+    def _delete(self, paths):
+        for i in range(0, len(paths), QUERY_CHUNK):
+            chunk = paths[i:i + QUERY_CHUNK]
+            self.conn.execute(
+                f"DELETE FROM probes WHERE path IN ({','.join('?' * len(chunk))})", chunk
+            )
+
+    def _match_rows(self, rows, keys):
+        """조회 결과 중 파일 상태가 같은 행만 MediaInfo로, 나머지는 삭제"""
+        found = {}
+        stale = []
+        for path, size, mtime_ns, inode, info in rows:
+            if keys.get(path) == (size, mtime_ns, inode):
+                found[path] = MediaInfo.from_dict(json.loads(info))
+            else:
+                stale.append(path)
+        if stale:
+            self._delete(stale)
+            self.conn.commit()
+        return found
+
+    def get(self, path):
+        """캐시된 MediaInfo 또는 None"""
+        return self.get_many([path]).get(self._normalize(path))
+
+    def get_many(self, paths):
+        """여러 파일을 한 번에 조회 → {절대경로: MediaInfo}"""
+        keys = {}
+        for path in paths:
+            path = self._normalize(path)
+            key = _file_key(path)
+            if key:
+                keys[path] = key
+        names = list(keys)
+        rows = []
+        with self.lock:
+            for i in range(0, len(names), QUERY_CHUNK):
+                chunk = names[i:i + QUERY_CHUNK]
+                rows += self.conn.execute(
+                    f"SELECT path, size, mtime_ns, inode, info FROM probes WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+            found = self._match_rows(rows, keys)
+        self.hits += len(found)
+        self.misses += len(names) - len(found)
+        return found
+
+    def lookup_directory(self, directory):
+        """폴더 아래 모든 캐시 항목을 한 쿼리로 조회 → {절대경로: MediaInfo}
+
+        사라지거나 바뀐 파일의 행은 함께 정리된다.
+        """
+        prefix = self._normalize(directory).rstrip(os.sep) + os.sep
+        # 접두사 범위 검색 (LIKE 대신 인덱스 사용)
+        upper = prefix[:-1] + chr(ord(os.sep) + 1)
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT path, size, mtime_ns, inode, info FROM probes WHERE path >= ? AND path < ?",
+                (prefix, upper)
+            ).fetchall()
+            keys = {}
+            for row in rows:
+                key = _file_key(row[0])
+                if key:
+                    keys[row[0]] = key
+            return self._match_rows(rows, keys)
+
+    def put(self, path, info):
+        """프로브 결과 저장"""
+        path = self._normalize(path)
+        key = _file_key(path)
+        if not key:
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO probes (path, size, mtime_ns, inode, info, probed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, key[0], key[1], key[2], json.dumps(info.to_dict()), time.time())
+            )
+            self.conn.commit()
+
+    def probe(self, path, ffmpeg_path=None):
+        """캐시 조회 후 없으면 프로브하고 저장 (실패 시 ProbeError)"""
+        info = self.get(path)
+        if info is None:
+            info = probe_media(path, ffmpeg_path)
+            self.put(path, info)
+        return info
+
+    def evict_stale(self):
+        """바뀌었거나 사라진 파일의 행 전체 정리 → 삭제된 행 수"""
+        with self.lock:
+            rows = self.conn.execute("SELECT path, size, mtime_ns, inode FROM probes").fetchall()
+            stale = [path for path, size, mtime_ns, inode in rows
+                     if _file_key(path) != (size, mtime_ns, inode)]
+            if stale:
+                self._delete(stale)
+                self.conn.commit()
+        return len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM probes")
+            self.conn.commit()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+외부 프로세스 실행기 - stdout/stderr를 동시에 비우고, stderr 마지막 줄들은 고정 크기
+링 버퍼에 보관하며, 벽시계 제한 시간과 취소를 적용한다.
+
+stdout만 읽고 stderr를 나중에 읽으면 출력이 많은 입력에서 stderr 파이프 버퍼가 차서
+ffmpeg가 멈춘다. 두 스트림은 각각 읽기 스레드가 맡는다 (Windows 파이프는 selectors로
+기다릴 수 없으므로 스레드 방식을 쓴다).
+"""
+
+import re
+import time
+import subprocess
+import threading
+from collections import deque
+
+STDERR_LINES = 200
+BINARY_READ_SIZE = 1 << 20
+POLL_INTERVAL = 0.2
+
+# 오류 코드
+ERROR_NONE = ''
+ERROR_TIMEOUT = 'timeout'
+ERROR_CANCELLED = 'cancelled'
+ERROR_EXEC = 'exec_failed'
+ERROR_NOT_FOUND = 'input_not_found'
+ERROR_PERMISSION = 'permission_denied'
+ERROR_INVALID_DATA = 'invalid_data'
+ERROR_NO_AUDIO = 'no_audio_stream'
+ERROR_ENCODER = 'encoder_unavailable'
+ERROR_DISK_FULL = 'disk_full'
+ERROR_UNKNOWN = 'unknown'
+
+# stderr 줄 패턴 → 오류 코드 (먼저 맞는 것 사용)
+FFMPEG_ERROR_PATTERNS = (
+    (ERROR_DISK_FULL, re.compile(r'No space left on device', re.I)),
+    (ERROR_NOT_FOUND, re.compile(r'No such file or directory', re.I)),
+    (ERROR_PERMISSION, re.compile(r'Permission denied|Operation not permitted', re.I)),
+    (ERROR_NO_AUDIO, re.compile(r"matches no streams|does not contain any stream|"
+                                r"Output file .* does not contain", re.I)),
+    (ERROR_ENCODER, re.compile(r'Unknown encoder|Encoder not found|Unrecognized option', re.I)),
+    (ERROR_INVALID_DATA, re.compile(r'Invalid data found|moov atom not found|could not find codec parameters|'
+                                    r'Error while decoding|corrupt', re.I)),
+)
+
+_PROGRESS_LINE = re.compile(r'^[a-z_0-9]+=\S*$')
+# "[mp3 @ 0x55d0c1a2b3c0] " 같은 로그 문맥 접두사
+_LOG_CONTEXT = re.compile(r'^\[[^\]]+ @ 0x[0-9a-f]+\]\s*')
+
+
+def is_progress_line(line):
+    """-progress 출력(key=value) 줄인지"""
+    return bool(_PROGRESS_LINE.match(line))
+
+
+def progress_seconds(line):
+    """out_time_ms= 줄이면 출력 시간(초), 아니면 None"""
+    if line.startswith('out_time_ms='):
+        try:
+            return int(line.split('=', 1)[1]) / 1000000
+        except ValueError:
+            return None
+    return None
+
+
+def classify_ffmpeg_error(lines, returncode):
+    """ffmpeg stderr 줄 → (오류 코드, 메시지)"""
+    for code, pattern in FFMPEG_ERROR_PATTERNS:
+        for line in reversed(lines):
+            if pattern.search(line):
+                return code, _LOG_CONTEXT.sub('', line)
+    if lines:
+        return ERROR_UNKNOWN, _LOG_CONTEXT.sub('', lines[-1])
+    return ERROR_UNKNOWN, f'ffmpeg 종료 코드 {returncode}'
+
+
+class ProcessResult:
+    """프로세스 실행 결과"""
+
+    def __init__(self, returncode=None, stderr_lines=(), elapsed=0.0, error_code=ERROR_NONE, message=''):
+        self.returncode = returncode
+        # stderr 마지막 STDERR_LINES줄 (진행률 줄 제외)
+        self.stderr_lines = list(stderr_lines)
+        self.elapsed = elapsed
+        self.error_code = error_code
+        self.message = message
+
+    @property
+    def ok(self):
+        return self.error_code == ERROR_NONE
+
+    def __repr__(self):
+        return f"ProcessResult({self.returncode}, {self.error_code or 'ok'})"
+
+
+def run_process(cmd, stdout_handler=None, stderr_handler=None, binary_stdout=False, timeout=None,
+                cancel_event=None, stderr_lines=STDERR_LINES, classify=classify_ffmpeg_error):
+    """프로세스 실행 후 종료까지 대기 → ProcessResult
+
+    stdout_handler는 텍스트 줄(binary_stdout면 바이트 덩어리), stderr_handler는 stderr 줄마다
+    읽기 스레드에서 호출된다. timeout(초)이 지나거나 cancel_event가 설정되면 프로세스를 죽인다.
+    """
+    start = time.monotonic()
+    ring = deque(maxlen=stderr_lines)
+    try:
+        process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        return ProcessResult(None, (), time.monotonic() - start, ERROR_EXEC, str(e))
+
+    def drain_stdout():
+        stream = process.stdout
+        try:
+            if binary_stdout:
+                while True:
+                    chunk = stream.read(BINARY_READ_SIZE)
+                    if not chunk:
+                        break
+                    if stdout_handler:
+                        stdout_handler(chunk)
+            else:
+                for raw in stream:
+                    if stdout_handler:
+                        stdout_handler(raw.decode('utf-8', 'replace').strip())
+        except (OSError, ValueError):
+            pass
+
+    def drain_stderr():
+        try:
+            for raw in process.stderr:
+                line = raw.decode('utf-8', 'replace').strip()
+                if stderr_handler:
+                    stderr_handler(line)
+                if line and not is_progress_line(line):
+                    ring.append(line)
+        except (OSError, ValueError):
+            pass
+
+    readers = [threading.Thread(target=drain_stdout, daemon=True),
+               threading.Thread(target=drain_stderr, daemon=True)]
+    for reader in readers:
+        reader.start()
+
+    error_code = ERROR_NONE
+    deadline = start + timeout if timeout else None
+    while True:
+        try:
+            process.wait(POLL_INTERVAL)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        if cancel_event is not None and cancel_event.is_set():
+            error_code = ERROR_CANCELLED
+        elif deadline is not None and time.monotonic() > deadline:
+            error_code = ERROR_TIMEOUT
+        if error_code:
+            process.kill()
+            process.wait()
+            break
+    for reader in readers:
+        reader.join()
+    process.stdout.close()
+    process.stderr.close()
+
+    elapsed = time.monotonic() - start
+    lines = list(ring)
+    if error_code == ERROR_TIMEOUT:
+        return ProcessResult(process.returncode, lines, elapsed, error_code,
+                             f'제한 시간 초과 ({timeout:.0f}s)')
+    if error_code == ERROR_CANCELLED:
+        return ProcessResult(process.returncode, lines, elapsed, error_code, '취소됨')
+    if process.returncode != 0:
+        code, message = classify(lines, process.returncode)
+        return ProcessResult(process.returncode, lines, elapsed, code, message)
+    return ProcessResult(process.returncode, lines, elapsed)
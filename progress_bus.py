@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+진행률 이벤트 버스 - 작업자 스레드는 publish()로 이벤트를 큐에 넣기만 하고,
+UI/CLI는 정해진 주기(기본 10 Hz)로 큐를 비우면서 작업별 최신 상태로 합쳐 받는다.
+
+ffmpeg 진행 줄마다 root.after()를 호출하면 작업자가 여럿일 때 Tk 이벤트 큐가
+넘쳐 창이 끊긴다. 구독자는 주기마다 한 번, 합쳐진 이벤트 목록으로 호출된다.
+"""
+
+import time
+import queue
+import threading
+
+DEFAULT_INTERVAL = 0.1
+
+# 작업 종료 단계 (이후 이벤트는 오지 않음)
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ProgressEvent:
+    """작업 하나의 진행 상태"""
+
+    __slots__ = ('job_id', 'stage', 'fraction', 'bytes_done', 'speed', 'message', 'timestamp')
+
+    def __init__(self, job_id, stage, fraction=None, bytes_done=None, speed=None, message='', timestamp=None):
+        self.job_id = job_id
+        self.stage = stage
+        # 현재 단계 진행률 0.0~1.0 (모르면 None)
+        self.fraction = fraction
+        self.bytes_done = bytes_done
+        # 실시간 대비 처리 속도 (배속)
+        self.speed = speed
+        self.message = message
+        self.timestamp = timestamp or time.monotonic()
+
+    @property
+    def finished(self):
+        return self.stage in (DONE, FAILED)
+
+    def merge(self, newer):
+        """같은 작업의 새 이벤트 반영 - 같은 단계면 None이 아닌 값만 덮어쓴다"""
+        if newer.stage != self.stage:
+            return newer
+        for name in ('fraction', 'bytes_done', 'speed'):
+            value = getattr(newer, name)
+            if value is not None:
+                setattr(self, name, value)
+        if newer.message:
+            self.message = newer.message
+        self.timestamp = newer.timestamp
+        return self
+
+    def __repr__(self):
+        return f"ProgressEvent({self.job_id!r}, {self.stage}, {self.fraction})"
+
+
+class ProgressBus:
+    """스레드 안전 진행률 큐 + 주기적 배포"""
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self._tk_after = None
+        self._ticker = None
+        self._ticker_stop = threading.Event()
+
+    def publish(self, job_id, stage, fraction=None, bytes_done=None, speed=None, message=''):
+        """이벤트 발행 (어느 스레드에서나 호출 가능, 블록되지 않음)"""
+        self.queue.put(ProgressEvent(job_id, stage, fraction, bytes_done, speed, message))
+
+    def subscribe(self, callback):
+        """callback(events) 등록 - events는 작업별로 합쳐진 ProgressEvent 목록"""
+        with self.lock:
+            self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def drain(self):
+        """쌓인 이벤트를 모두 꺼내 작업별 최신 상태로 합침 (처음 등장한 순서)"""
+        merged = {}
+        while True:
+            try:
+                event = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            previous = merged.get(event.job_id)
+            merged[event.job_id] = previous.merge(event) if previous else event
+        return list(merged.values())
+
+    def dispatch(self):
+        """한 주기 처리 - 이벤트가 있으면 구독자에게 전달"""
+        events = self.drain()
+        if events:
+            with self.lock:
+                subscribers = list(self.subscribers)
+            for callback in subscribers:
+                try:
+                    callback(events)
+                except Exception as e:
+                    print(f"진행률 구독자 오류: {e}")
+        return events
+
+    def attach_tk(self, root, interval=DEFAULT_INTERVAL):
+        """Tk 메인 루프에서 interval초마다 dispatch (구독자는 Tk 스레드에서 실행)"""
+        delay = max(1, int(interval * 1000))
+
+        def tick():
+            self.dispatch()
+            self._tk_after = root.after(delay, tick)
+
+        self.detach_tk(root)
+        self._tk_after = root.after(delay, tick)
+
+    def detach_tk(self, root):
+        if self._tk_after is not None:
+            root.after_cancel(self._tk_after)
+            self._tk_after = None
+            self.dispatch()
+
+    def start_ticker(self, interval=DEFAULT_INTERVAL):
+        """Tk가 없는 프런트엔드용 - 백그라운드 스레드에서 interval초마다 dispatch"""
+        if self._ticker is not None:
+            return
+        self._ticker_stop.clear()
+
+        def run():
+            while not self._ticker_stop.wait(interval):
+                self.dispatch()
+
+        self._ticker = threading.Thread(target=run, daemon=True)
+        self._ticker.start()
+
+    def stop_ticker(self):
+        """티커 종료 후 남은 이벤트 전달"""
+        if self._ticker is None:
+            return
+        self._ticker_stop.set()
+        self._ticker.join()
+        self._ticker = None
+        self.dispatch()
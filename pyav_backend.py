@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+PyAV(libav) 인코딩 백엔드 (선택 설치: pip install av)
+
+짧은 클립 수천 개를 변환할 때는 파일마다 ffmpeg/ffprobe 프로세스를 띄우는 비용이 오디오
+처리보다 크다. 이 백엔드는 작업자 프로세스(ProcessPoolExecutor) 안에서 디먹스 → 디코딩 →
+MP3 인코딩 → 출력 길이 확인까지 라이브러리 호출로 처리한다. 작업자는 배치가 끝날 때까지
+재사용되므로 파일당 프로세스 생성이 없다.
+
+작업마다 임시 폴더를 두고 작업자와 주고받는다. 작업자는 디코딩한 시간(progress)을 적고,
+Whisper용 PCM을 파일(pcm.f32)로 쓴다 (큰 PCM을 결과로 피클링해 넘기지 않도록). 호출자가
+취소하거나 제한 시간이 지나면 cancel 파일을 만들고, 작업자는 POLL_INTERVAL마다 이를 확인해
+멈춘다. 그래도 끝나지 않으면 작업자 풀을 통째로 내린다.
+
+긴 파일은 ffmpeg 실행 파일 쪽이 빠를 수 있다 (번들된 libmp3lame 빌드 차이).
+`python pyav_backend.py`로 1초/1분/1시간 입력에서 두 백엔드를 비교할 수 있다.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import av
+except ImportError:
+    av = None
+
+from process_runner import (
+    ERROR_NONE, ERROR_NOT_FOUND, ERROR_PERMISSION, ERROR_INVALID_DATA, ERROR_NO_AUDIO, ERROR_ENCODER,
+    ERROR_DISK_FULL, ERROR_CANCELLED, ERROR_TIMEOUT, ERROR_UNKNOWN
+)
+
+# 인코더를 찾을 수 없을 때 PyAV가 올리는 예외
+ENCODER_ERRORS = (av.error.EncoderNotFoundError, av.codec.codec.UnknownCodecError) if av else ()
+
+BACKEND_SUBPROCESS = 'subprocess'
+BACKEND_PYAV = 'pyav'
+BACKENDS = (BACKEND_SUBPROCESS, BACKEND_PYAV)
+
+WHISPER_SAMPLE_RATE = 16000
+# libmp3lame이 받는 샘플레이트 (MPEG-1/2/2.5)
+MP3_SAMPLE_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+# 작업자가 취소 파일을 확인하고 진행 시간을 적는 간격, 호출자가 결과를 기다리며 깨어나는 간격 (초)
+POLL_INTERVAL = 0.5
+# 취소/제한 시간 신호 후 작업자가 멈추기를 기다리는 시간 - 넘으면 작업자 풀을 내린다 (초)
+STOP_GRACE = 10.0
+# 작업 폴더 안의 파일 이름
+CANCEL_FILE = 'cancel'
+PROGRESS_FILE = 'progress'
+PCM_FILE = 'pcm.f32'
+
+
+def pyav_available():
+    return av is not None
+
+
+def parse_bitrate(bitrate):
+    """'192k' → 192000"""
+    text = str(bitrate).strip().lower()
+    if text.endswith('k'):
+        return int(float(text[:-1]) * 1000)
+    return int(text)
+
+
+def mp3_sample_rate(rate):
+    """원본 샘플레이트 → 가장 가까운 MP3 샘플레이트 (96kHz 등은 ffmpeg처럼 리샘플)"""
+    return min(MP3_SAMPLE_RATES, key=lambda supported: abs(supported - (rate or 44100)))
+
+
+def _error_code(error):
+    """PyAV/OS 예외 → process_runner 오류 코드"""
+    if isinstance(error, FileNotFoundError):
+        return ERROR_NOT_FOUND
+    if isinstance(error, PermissionError):
+        return ERROR_PERMISSION
+    errno = getattr(error, 'errno', None)
+    if errno == 28:
+        return ERROR_DISK_FULL
+    if av is not None and isinstance(error, av.error.InvalidDataError):
+        return ERROR_INVALID_DATA
+    if isinstance(error, ENCODER_ERRORS):
+        return ERROR_ENCODER
+    return ERROR_UNKNOWN
+
+
+def _write_progress(work_dir, seconds):
+    """진행 시간 기록 (호출자가 반쯤 쓴 파일을 읽지 않도록 바꿔치기)"""
+    path = os.path.join(work_dir, PROGRESS_FILE)
+    with open(path + '.tmp', 'w') as f:
+        f.write(f'{seconds:.3f}')
+    os.replace(path + '.tmp', path)
+
+
+def _read_progress(work_dir):
+    try:
+        with open(os.path.join(work_dir, PROGRESS_FILE)) as f:
+            return float(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def encode_in_process(input_path, output_path, bitrate, pcm_output=False, work_dir=None):
+    """현재 프로세스에서 MP3 인코딩 (작업자 프로세스에서 호출)
+
+    work_dir가 있으면 진행 시간을 적고 취소 파일을 확인한다. PCM은 work_dir/pcm.f32에 쓴다
+    (work_dir가 없으면 새 임시 폴더 - 호출자가 지운다).
+    dict 반환: ok, error, error_code, elapsed, duration(입력), output_duration, pcm_path(또는 None)
+    """
+    start = time.time()
+    outcome = {'ok': False, 'error': '', 'error_code': ERROR_NONE, 'elapsed': 0.0,
+               'duration': 0.0, 'output_duration': 0.0, 'pcm_path': None}
+    if pcm_output and not work_dir:
+        work_dir = tempfile.mkdtemp(prefix='mp4tomp3-pyav-')
+    try:
+        with av.open(str(input_path)) as source:
+            if not source.streams.audio:
+                outcome.update(error='오디오 스트림이 없습니다', error_code=ERROR_NO_AUDIO)
+                return outcome
+            stream = source.streams.audio[0]
+            if source.duration:
+                outcome['duration'] = source.duration / av.time_base
+            layout = 'mono' if stream.layout.nb_channels == 1 else 'stereo'
+            pcm_path = os.path.join(work_dir, PCM_FILE) if pcm_output else None
+            with av.open(str(output_path), 'w', format='mp3') as target, \
+                    (open(pcm_path, 'wb') if pcm_path else nullcontext()) as pcm_file:
+                rate = mp3_sample_rate(stream.rate)
+                out_stream = target.add_stream('libmp3lame', rate=rate)
+                out_stream.bit_rate = parse_bitrate(bitrate)
+                out_stream.layout = layout
+                resampler = av.AudioResampler(format=out_stream.format.name, layout=layout, rate=rate)
+                pcm_resampler = None
+                if pcm_output:
+                    pcm_resampler = av.AudioResampler(format='flt', layout='mono', rate=WHISPER_SAMPLE_RATE)
+
+                def write(frames):
+                    for frame in frames:
+                        target.mux(out_stream.encode(frame))
+
+                def collect(frames):
+                    for frame in frames:
+                        pcm_file.write(frame.to_ndarray().tobytes())
+
+                polled = time.monotonic()
+                for frame in source.decode(stream):
+                    write(resampler.resample(frame))
+                    if pcm_resampler:
+                        collect(pcm_resampler.resample(frame))
+                    now = time.monotonic()
+                    if work_dir and now - polled >= POLL_INTERVAL:
+                        polled = now
+                        if os.path.exists(os.path.join(work_dir, CANCEL_FILE)):
+                            outcome.update(error='취소됨', error_code=ERROR_CANCELLED, elapsed=time.time() - start)
+                            return outcome
+                        if frame.time is not None:
+                            _write_progress(work_dir, frame.time)
+                write(resampler.resample(None))
+                if pcm_resampler:
+                    collect(pcm_resampler.resample(None))
+                target.mux(out_stream.encode(None))
+            outcome['pcm_path'] = pcm_path
+        # ffprobe를 띄우지 않고 같은 프로세스에서 출력 길이 확인
+        with av.open(str(output_path)) as written:
+            if written.duration:
+                outcome['output_duration'] = written.duration / av.time_base
+    except Exception as e:
+        outcome.update(error=str(e), error_code=_error_code(e), elapsed=time.time() - start)
+        return outcome
+    outcome.update(ok=True, elapsed=time.time() - start)
+    return outcome
+
+
+class PyAVEncoder:
+    """작업자 프로세스 풀 - BatchConverter의 여러 스레드가 공유한다"""
+
+    def __init__(self, workers=None):
+        if av is None:
+            raise RuntimeError('PyAV가 설치되어 있지 않습니다 (pip install av)')
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def encode(self, input_path, output_path, bitrate, pcm_output=False, progress_callback=None,
+               cancel_event=None, timeout=None):
+        """작업자에서 인코딩 → encode_in_process 결과 dict (pcm_path 대신 pcm: float32 배열 또는 None)
+
+        progress_callback(seconds)는 POLL_INTERVAL마다 호출 스레드에서 불린다.
+        cancel_event가 설정되거나 timeout(초)이 지나면 작업자를 멈추고 실패로 돌려준다.
+        """
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            executor = self.executor
+        work_dir = tempfile.mkdtemp(prefix='mp4tomp3-pyav-')
+        try:
+            future = executor.submit(encode_in_process, str(input_path), str(output_path),
+                                     bitrate, pcm_output, work_dir)
+            outcome = self._wait(executor, future, work_dir, progress_callback, cancel_event, timeout)
+            outcome['pcm'] = None
+            if outcome['ok'] and outcome.get('pcm_path'):
+                import numpy as np
+                outcome['pcm'] = np.fromfile(outcome['pcm_path'], dtype=np.float32)
+            return outcome
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _wait(self, executor, future, work_dir, progress_callback, cancel_event, timeout):
+        """작업 결과를 기다리며 진행률 전달, 취소/제한 시간이면 작업자에 멈춤 신호"""
+        start = time.monotonic()
+        stop = None
+        signalled = None
+        reported = 0.0
+        while True:
+            try:
+                outcome = future.result(timeout=POLL_INTERVAL)
+                break
+            except FutureTimeout:
+                pass
+            except BrokenProcessPool as e:
+                return self._failed(start, stop or (ERROR_UNKNOWN, f'PyAV 작업자 종료: {e}'))
+            seconds = _read_progress(work_dir)
+            if progress_callback and seconds is not None and seconds > reported:
+                reported = seconds
+                progress_callback(seconds)
+            now = time.monotonic()
+            if stop is None:
+                if cancel_event is not None and cancel_event.is_set():
+                    stop = (ERROR_CANCELLED, '취소됨')
+                elif timeout and now - start > timeout:
+                    stop = (ERROR_TIMEOUT, f'제한 시간 초과 ({timeout:.0f}s)')
+                if stop:
+                    open(os.path.join(work_dir, CANCEL_FILE), 'w').close()
+                    signalled = now
+            elif now - signalled > STOP_GRACE:
+                # 디코더 호출 안에서 멈춘 작업자 - 풀을 내리면 다음 인코딩이 새 풀을 만든다
+                self._discard(executor)
+                return self._failed(start, stop)
+        if stop:
+            outcome.update(ok=False, error_code=stop[0], error=stop[1])
+        return outcome
+
+    @staticmethod
+    def _failed(start, stop):
+        code, message = stop
+        return {'ok': False, 'error': message, 'error_code': code, 'elapsed': time.monotonic() - start,
+                'duration': 0.0, 'output_duration': 0.0, 'pcm_path': None}
+
+    def _discard(self, executor):
+        """멈추지 않는 작업자 풀 종료 (같은 풀의 다른 작업은 BrokenProcessPool로 실패)"""
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        terminate = getattr(executor, 'terminate_workers', None)
+        if terminate is not None:
+            terminate()
+        else:
+            for process in list((executor._processes or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def _make_input(ffmpeg_path, path, seconds):
+    subprocess.run([
+        ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-nostdin', '-y',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}:sample_rate=48000',
+        '-c:a', 'aac', '-b:a', '128k', str(path)
+    ], check=True)
+
+
+def benchmark(ffmpeg_path=None, cases=None, workers=None):
+    """1초/1분/1시간 입력에서 subprocess 백엔드와 PyAV 백엔드 소요 시간 비교"""
+    from batch_converter import BatchConverter, find_ffmpeg
+
+    ffmpeg_path = ffmpeg_path or find_ffmpeg()
+    # (입력 길이 초, 파일 수)
+    cases = cases or ((1, 200), (60, 20), (3600, 1))
+    work_dir = Path(tempfile.mkdtemp(prefix='mp4tomp3-backend-'))
+    try:
+        for seconds, count in cases:
+            source = work_dir / f'src_{seconds}.mp4'
+            _make_input(ffmpeg_path, source, seconds)
+            inputs = []
+            for i in range(count):
+                path = work_dir / f'in_{seconds}_{i}.mp4'
+                os.link(source, path)
+                inputs.append(path)
+            line = f"{seconds:>5}초 × {count:>3}개:"
+            for backend in BACKENDS:
+                out_dir = work_dir / backend
+                converter = BatchConverter(ffmpeg_path, workers=workers, output_dir=out_dir, backend=backend)
+                start = time.time()
+                results = converter.convert(inputs)
+                elapsed = time.time() - start
+                converter.close()
+                failed = sum(1 for r in results if not r.ok)
+                line += f"  {backend} {elapsed:7.2f}초 ({count / elapsed:6.1f} 파일/초)"
+                if failed:
+                    line += f" 실패 {failed}"
+                shutil.rmtree(out_dir, ignore_errors=True)
+            print(line, flush=True)
+            for path in inputs + [source]:
+                path.unlink()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if not pyav_available():
+        print("PyAV가 설치되어 있지 않습니다: pip install av")
+        sys.exit(1)
+    quick = '--quick' in sys.argv
+    benchmark(cases=((1, 100), (60, 10)) if quick else None)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+긴 파일 구간 병렬 인코딩 - 입력을 시간 기준 N개 구간으로 나눠 동시에 인코딩하고
+MP3 프레임을 이어 붙여 재인코딩 없이 하나의 파일로 만든다.
+
+libmp3lame는 단일 스레드라 6~10시간짜리 녹음은 코어 하나만 쓴다. 구간 경계는 MP3
+프레임(1152 샘플) 단위로 맞추고, 각 구간은 경계보다 PRE_ROLL_FRAMES 프레임 앞에서
+인코딩을 시작해 앞쪽 프레임을 버린다. 그러면 남긴 프레임 k는 단일 인코딩의 프레임 k와
+같은 입력 샘플을 담게 되어 (인코더 지연과 무관하게) 이음매 없이 연결된다.
+비트 저장소(-reservoir 0)를 끄는 것은 버린 프레임의 데이터를 참조하지 않게 하기 위함이다.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from media_probe import probe_media, ProbeError
+from process_runner import ERROR_CANCELLED
+from batch_converter import (
+    DEFAULT_BITRATE, ConversionResult, find_ffmpeg, run_ffmpeg, encode_file, verify_output
+)
+
+FRAME_SAMPLES = 1152
+# libmp3lame가 1152 샘플 프레임(MPEG-1)을 쓰는 샘플레이트, 그 외는 44.1 kHz로 리샘플
+MPEG1_SAMPLE_RATES = (32000, 44100, 48000)
+FALLBACK_SAMPLE_RATE = 44100
+# 인코더 지연(576) + 디코더 지연(529)과 심리음향 모델 준비에 충분한 앞/뒤 여유 프레임
+PRE_ROLL_FRAMES = 8
+POST_ROLL_FRAMES = 4
+# 이보다 짧은 구간은 나누는 비용이 더 크다
+MIN_SEGMENT_SECONDS = 60.0
+
+MPEG1_L3_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+MPEG2_L3_BITRATES = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+# 헤더 버전 비트 → 샘플레이트 표 (MPEG-1, MPEG-2, MPEG-2.5)
+SAMPLE_RATE_TABLES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def frame_header(data, offset):
+    """offset 위치의 Layer III 프레임 헤더 → (길이, 샘플 수, 샘플레이트) 또는 None"""
+    if data[offset] != 0xFF:
+        return None
+    b1, b2 = data[offset + 1], data[offset + 2]
+    version = (b1 >> 3) & 0x3
+    # 동기 11비트 + Layer III
+    if (b1 & 0xE0) != 0xE0 or (b1 & 0x06) != 0x02 or version == 1:
+        return None
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x3
+    if bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    sample_rate = SAMPLE_RATE_TABLES[version][rate_index]
+    padding = (b2 >> 1) & 0x1
+    if version == 3:
+        bitrate = MPEG1_L3_BITRATES[bitrate_index] * 1000
+        return 144 * bitrate // sample_rate + padding, FRAME_SAMPLES, sample_rate
+    bitrate = MPEG2_L3_BITRATES[bitrate_index] * 1000
+    return 72 * bitrate // sample_rate + padding, FRAME_SAMPLES // 2, sample_rate
+
+
+def _iter_frames(data):
+    """(시작, 길이, 샘플 수, 샘플레이트) - ID3 태그와 잡음은 건너뛴다"""
+    offset = 0
+    if data[:3] == b'ID3' and len(data) >= 10:
+        size = data[6] << 21 | data[7] << 14 | data[8] << 7 | data[9]
+        offset = 10 + size
+    end = len(data)
+    while offset + 4 <= end:
+        header = frame_header(data, offset)
+        if header is None:
+            if data[offset:offset + 3] == b'TAG':
+                break
+            offset += 1
+            continue
+        length, samples, sample_rate = header
+        if offset + length > end:
+            break
+        yield offset, length, samples, sample_rate
+        offset += length
+
+
+def mp3_frames(data):
+    """Layer III 프레임 (시작, 길이) 목록"""
+    return [(offset, length) for offset, length, _, _ in _iter_frames(data)]
+
+
+def mp3_duration(path):
+    """프레임 헤더를 세어 MP3 길이(초) 계산 - ffprobe 없이 출력 검증용"""
+    data = Path(path).read_bytes()
+    return sum(samples / sample_rate for _, _, samples, sample_rate in _iter_frames(data))
+
+
+def output_sample_rate(info):
+    if info and info.sample_rate in MPEG1_SAMPLE_RATES:
+        return info.sample_rate
+    return FALLBACK_SAMPLE_RATE
+
+
+def plan_segments(duration, sample_rate, segments):
+    """구간 경계 (출력 프레임 번호) 목록 → [(시작 프레임, 끝 프레임 또는 None)]"""
+    total_frames = int(duration * sample_rate) // FRAME_SAMPLES
+    segments = max(1, min(segments, int(duration // MIN_SEGMENT_SECONDS) or 1))
+    bounds = [total_frames * i // segments for i in range(segments)]
+    return [(start, bounds[i + 1] if i + 1 < segments else None) for i, start in enumerate(bounds)]
+
+
+def build_segment_command(ffmpeg_path, input_path, output_path, sample_rate, start_frame, end_frame,
+                          bitrate=DEFAULT_BITRATE):
+    """구간 하나의 인코딩 명령 (앞뒤 여유 프레임 포함, Xing/ID3 태그 없음)"""
+    first = max(start_frame - PRE_ROLL_FRAMES, 0)
+    cmd = [
+        ffmpeg_path,
+        '-hide_banner',
+        '-loglevel', 'error',
+        '-nostdin',
+    ]
+    if first:
+        # 입력 앞 -ss: 빠른 탐색 후 정확한 위치까지 디코딩해 버린다 (accurate_seek)
+        cmd += ['-ss', f'{first * FRAME_SAMPLES / sample_rate:.6f}']
+    cmd += ['-i', str(input_path)]
+    if end_frame is not None:
+        frames = end_frame + POST_ROLL_FRAMES - first
+        cmd += ['-t', f'{frames * FRAME_SAMPLES / sample_rate:.6f}']
+    cmd += [
+        '-map', '0:a:0',
+        '-vn',
+        '-ar', str(sample_rate),
+        '-acodec', 'libmp3lame',
+        '-ab', bitrate,
+        '-reservoir', '0',
+        '-write_xing', '0',
+        '-id3v2_version', '0',
+        '-map_metadata', '-1',
+        '-f', 'mp3',
+        '-y',
+        '-progress', 'pipe:1',
+        str(output_path)
+    ]
+    return cmd
+
+
+def join_segments(parts, output_path):
+    """구간 파일들에서 남길 프레임만 골라 출력 파일로 연결
+
+    parts: [(구간 파일, 버릴 앞 프레임 수, 남길 프레임 수 또는 None)]
+    """
+    tmp_path = Path(str(output_path) + '.part')
+    with open(tmp_path, 'wb') as out:
+        for path, skip, keep in parts:
+            data = Path(path).read_bytes()
+            frames = mp3_frames(data)
+            if len(frames) < skip + (keep or 0):
+                raise ValueError(f'구간 프레임 부족: {Path(path).name} ({len(frames)}개)')
+            frames = frames[skip:skip + keep] if keep is not None else frames[skip:]
+            if frames:
+                start = frames[0][0]
+                last_offset, last_length = frames[-1]
+                # 프레임은 연속되어 있으므로 한 번에 잘라 쓴다
+                out.write(data[start:last_offset + last_length])
+    os.replace(tmp_path, output_path)
+
+
+def encode_segmented(ffmpeg_path, input_path, output_path, segments, bitrate=DEFAULT_BITRATE,
+                     progress_callback=None, cancel_event=None, info=None, timeout=None):
+    """입력을 segments개 구간으로 나눠 병렬 인코딩 → ConversionResult
+
+    progress_callback(seconds)에는 구간별 진행 시간의 합이 전달된다.
+    timeout은 각 구간 프로세스에 적용된다.
+    """
+    start = time.time()
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+    if info is None:
+        try:
+            info = probe_media(input_path, ffmpeg_path)
+        except ProbeError as e:
+            return ConversionResult(input_path, output_path, False, str(e), time.time() - start)
+    sample_rate = output_sample_rate(info)
+    plan = plan_segments(info.duration, sample_rate, segments)
+    if len(plan) == 1:
+        return encode_file(ffmpeg_path, input_path, output_path, bitrate, progress_callback, cancel_event,
+                           timeout=timeout)
+
+    work_dir = Path(tempfile.mkdtemp(prefix=f'.{output_path.stem}.', dir=output_path.parent))
+    # 구간 하나가 실패하면 나머지 구간만 멈추도록 호출자의 cancel_event와 분리
+    abort = threading.Event()
+    progress = [0.0] * len(plan)
+    progress_lock = threading.Lock()
+
+    def run(index):
+        start_frame, end_frame = plan[index]
+        part_path = work_dir / f'{index:04d}.mp3'
+
+        def report(seconds):
+            if cancel_event is not None and cancel_event.is_set():
+                abort.set()
+            if progress_callback:
+                with progress_lock:
+                    progress[index] = seconds
+                    total = sum(progress)
+                progress_callback(total)
+
+        cmd = build_segment_command(ffmpeg_path, input_path, part_path, sample_rate,
+                                    start_frame, end_frame, bitrate)
+        result = run_ffmpeg(cmd, input_path, part_path, report, abort, timeout)
+        if not result.ok:
+            abort.set()
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(plan)) as executor:
+            part_results = list(executor.map(run, range(len(plan))))
+        failed = [r for r in part_results if not r.ok]
+        if failed:
+            # 다른 구간 실패로 취소된 구간보다 실제 원인을 보고
+            cause = next((r for r in failed if r.error_code != ERROR_CANCELLED), failed[0])
+            result = ConversionResult(input_path, output_path, False, cause.error, time.time() - start)
+            result.error_code = cause.error_code
+            result.stderr_tail = cause.stderr_tail
+            return result
+        parts = []
+        for (start_frame, end_frame), result in zip(plan, part_results):
+            skip = start_frame - max(start_frame - PRE_ROLL_FRAMES, 0)
+            keep = end_frame - start_frame if end_frame is not None else None
+            parts.append((result.output_path, skip, keep))
+        try:
+            join_segments(parts, output_path)
+        except (OSError, ValueError) as e:
+            return ConversionResult(input_path, output_path, False, f'구간 연결 실패: {e}', time.time() - start)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return ConversionResult(input_path, output_path, True, '', time.time() - start, info.duration)
+
+
+def benchmark(input_path, segments=None, bitrate=DEFAULT_BITRATE, ffmpeg_path=None):
+    """단일 인코딩과 구간 병렬 인코딩의 소요 시간/출력 길이 비교"""
+    ffmpeg_path = ffmpeg_path or find_ffmpeg()
+    segments = segments or os.cpu_count() or 1
+    input_path = Path(input_path)
+    info = probe_media(input_path, ffmpeg_path)
+    work_dir = Path(tempfile.mkdtemp(prefix='mp4tomp3-bench-'))
+    try:
+        single = encode_file(ffmpeg_path, input_path, work_dir / 'single.mp3', bitrate)
+        split = encode_segmented(ffmpeg_path, input_path, work_dir / 'segmented.mp3', segments, bitrate, info=info)
+        print(f"입력: {input_path.name} ({info.duration:.1f}초)")
+        for name, result in (('단일', single), (f'{segments}구간', split)):
+            if not result.ok:
+                print(f"  {name}: 실패 - {result.error}")
+                continue
+            duration = probe_media(result.output_path, ffmpeg_path).duration
+            print(f"  {name}: {result.elapsed:.2f}초 ({info.duration / result.elapsed:.1f}배속), "
+                  f"출력 길이 {duration:.3f}초")
+        if single.ok and split.ok:
+            print(f"  속도 향상: {single.elapsed / split.elapsed:.2f}배")
+            error = verify_output(split.output_path, info.duration, ffmpeg_path)
+            if error:
+                print(f"  검증 실패: {error}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("사용법: python segment_encoder.py <입력 파일> [구간 수]")
+        sys.exit(2)
+    benchmark(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
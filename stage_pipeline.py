@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+단계별 작업 파이프라인 - 단계마다 작업자 스레드 풀을 두고 크기 제한 큐로 잇는다.
+
+프로브 → 인코딩 → 음성 인식처럼 자원이 다른 단계를 한 작업자가 차례로 처리하면, 긴 전사가
+도는 동안 인코더가 놀고 인코딩하는 동안 모델이 논다. 파이프라인에서는 인코딩 단계가 다음
+파일로 넘어가는 동안 STT 단계가 앞 파일을 전사한다. 다음 단계 큐가 가득 차면 앞 단계 작업자가
+put에서 기다리므로(역압) 전사 대기 중인 PCM 같은 중간 결과가 메모리에 무한정 쌓이지 않는다.
+"""
+
+import time
+import queue
+import threading
+
+# 작업자 종료 신호
+_STOP = object()
+
+
+class Stage:
+    """파이프라인 단계 하나
+
+    func(item) → 다음 단계로 넘기면 True, 이 단계에서 끝났으면 False.
+    capacity는 이 단계 입력 큐 크기 (0이면 제한 없음).
+    """
+
+    def __init__(self, name, func, workers=1, capacity=0):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(capacity)
+        self.running = 0
+        # 통계 (초): 처리, 입력 대기, 다음 단계 큐가 차서 기다린 시간
+        self.processed = 0
+        self.busy = 0.0
+        self.idle = 0.0
+        self.blocked = 0.0
+        self.peak_queue = 0
+
+
+class Pipeline:
+    """Stage 목록을 잇는 파이프라인
+
+    항목이 어느 단계에서 끝나든(func가 False를 반환하거나 마지막 단계를 지나거나 예외) on_done(item)이
+    한 번 호출된다. 예외는 on_error(item, exc)를 먼저 부른다. on_done이 예외를 올리면 on_error로
+    넘긴다. 두 콜백 모두 작업자 스레드에서 실행된다.
+    """
+
+    def __init__(self, stages, on_done, on_error=None, name='pipeline'):
+        self.stages = stages
+        self.on_done = on_done
+        self.on_error = on_error
+        self.name = name
+        self.lock = threading.Lock()
+        self.threads = []
+        self.closed = False
+
+    def start(self):
+        for index, stage in enumerate(self.stages):
+            stage.running = stage.workers
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,), daemon=True,
+                                          name=f"{self.name}-{stage.name}-{n}")
+                thread.start()
+                self.threads.append(thread)
+        return self
+
+    def submit(self, item):
+        """첫 단계에 항목 넣기 (첫 단계 큐가 가득 차면 기다림)"""
+        if self.closed:
+            raise RuntimeError('닫힌 파이프라인입니다')
+        first = self.stages[0]
+        first.queue.put(item)
+        first.peak_queue = max(first.peak_queue, first.queue.qsize())
+
+    def close(self):
+        """더 넣을 항목이 없음 - 남은 항목을 모두 처리하면 작업자가 끝난다"""
+        if self.closed:
+            return
+        self.closed = True
+        for _ in range(self.stages[0].workers):
+            self.stages[0].queue.put(_STOP)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+    def run(self, items):
+        """items를 모두 넣고 끝날 때까지 기다림"""
+        self.start()
+        try:
+            for item in items:
+                self.submit(item)
+        finally:
+            self.close()
+            self.join()
+
+    def _work(self, index):
+        stage = self.stages[index]
+        following = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            waited = time.monotonic()
+            item = stage.queue.get()
+            started = time.monotonic()
+            if item is _STOP:
+                break
+            try:
+                forward = stage.func(item)
+            except Exception as e:
+                forward = False
+                self._fail(item, e)
+            finished = time.monotonic()
+            if forward and following is not None:
+                following.queue.put(item)
+                following.peak_queue = max(following.peak_queue, following.queue.qsize())
+            else:
+                try:
+                    self.on_done(item)
+                except Exception as e:
+                    # 작업자가 죽으면 다음 단계에 종료 신호가 가지 않아 join()이 끝나지 않는다
+                    self._fail(item, e)
+            with self.lock:
+                stage.processed += 1
+                stage.idle += started - waited
+                stage.busy += finished - started
+                stage.blocked += time.monotonic() - finished
+        with self.lock:
+            stage.running -= 1
+            last = stage.running == 0
+        # 이 단계의 마지막 작업자가 끝나면 다음 단계 작업자들에게 종료 신호
+        if last and following is not None:
+            for _ in range(following.workers):
+                following.queue.put(_STOP)
+
+    def _fail(self, item, error):
+        """항목 실패 처리 - on_error가 다시 예외를 올려도 작업자는 계속 돈다"""
+        if not self.on_error:
+            print(f"{self.name}: 처리 실패: {error}")
+            return
+        try:
+            self.on_error(item, error)
+        except Exception as e:
+            print(f"{self.name}: 실패 처리 중 오류: {e}")
+
+    def summary(self):
+        """단계별 처리 수, 바쁜/대기/막힌 시간 (역압이 어디서 걸리는지 보기 위한 로그)"""
+        parts = []
+        with self.lock:
+            for stage in self.stages:
+                parts.append(f"{stage.name}×{stage.workers}: {stage.processed}개, 처리 {stage.busy:.1f}s, "
+                             f"대기 {stage.idle:.1f}s, 막힘 {stage.blocked:.1f}s, 큐 최대 {stage.peak_queue}")
+        return '파이프라인 ' + ' | '.join(parts)
@@ -0,0 +1,96 @@
+"""vad_chunker 분할 계획 - 합성 신호로 자르는 위치 확인"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vad_chunker import (SAMPLE_RATE, FRAME_SECONDS, MIN_CHUNK_SECONDS, MAX_CHUNK_SECONDS, frame_levels,
+                         speech_mask, plan_chunks)
+
+
+def speech_like(seconds, rng, modulated=True):
+    """음절 리듬(4Hz)으로 진폭이 흔들리는 유성음 비슷한 신호 (modulated=False면 일정한 진폭)"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.2 + 0.15 * np.sin(2 * np.pi * 4 * t) if modulated else 0.2
+    return (envelope * np.sin(2 * np.pi * 180 * t) + rng.normal(0, 0.01, len(t))).astype(np.float32)
+
+
+def with_pauses(total_seconds, speech_seconds=6.5, pause_seconds=0.5, modulated=True, room_noise=0.0):
+    """speech_seconds 발화와 pause_seconds 쉼(약한 잡음)을 번갈아 이은 신호 → (PCM, 쉼 구간 목록(초))
+
+    room_noise는 전체에 더하는 배경 잡음의 표준편차 (0.01이면 약 -40dBFS)
+    """
+    rng = np.random.default_rng(0)
+    parts = []
+    pauses = []
+    position = 0.0
+    while position < total_seconds:
+        parts.append(speech_like(speech_seconds, rng, modulated))
+        position += speech_seconds
+        parts.append(rng.normal(0, 1e-3, int(pause_seconds * SAMPLE_RATE)).astype(np.float32))
+        pauses.append((position, position + pause_seconds))
+        position += pause_seconds
+    audio = np.concatenate(parts)
+    if room_noise:
+        audio += rng.normal(0, room_noise, len(audio)).astype(np.float32)
+    return audio, pauses
+
+
+def assert_covers(chunks, total):
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == total
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+
+
+SIGNALS = [
+    pytest.param(True, 0.0, id='modulated'),
+    pytest.param(False, 0.0, id='steady'),
+    # 쉼이 -40dBFS 배경 잡음으로 채워진 방 - 고정 문턱(-50dBFS 부근)이면 전부 말소리가 된다
+    pytest.param(True, 0.01, id='modulated-noisy-room'),
+    pytest.param(False, 0.01, id='steady-noisy-room'),
+]
+
+
+@pytest.mark.parametrize('modulated,room_noise', SIGNALS)
+def test_short_pauses_are_detected_as_silence(modulated, room_noise):
+    # 쉼이 프레임의 7% 정도뿐인 연속 발화에서도 발화 프레임은 말소리로 판정
+    audio, _ = with_pauses(120, modulated=modulated, room_noise=room_noise)
+    fraction = speech_mask(frame_levels(audio)).mean()
+    assert 0.85 < fraction < 0.97
+
+
+@pytest.mark.parametrize('modulated,room_noise', SIGNALS)
+def test_cuts_fall_inside_pauses(modulated, room_noise):
+    audio, pauses = with_pauses(300, modulated=modulated, room_noise=room_noise)
+    chunks = plan_chunks(audio)
+    assert_covers(chunks, len(audio))
+    frame = FRAME_SECONDS
+    for _, end in chunks[:-1]:
+        cut = end / SAMPLE_RATE
+        assert any(start - frame <= cut <= stop + frame for start, stop in pauses), cut
+    for start, end in chunks[:-1]:
+        assert MIN_CHUNK_SECONDS <= (end - start) / SAMPLE_RATE <= MAX_CHUNK_SECONDS
+
+
+def test_continuous_speech_cuts_at_quietest_frame():
+    # 쉼이 없으면 고정 30초가 아니라 창 안에서 가장 조용한 프레임(진폭 골)에서 자른다
+    rng = np.random.default_rng(1)
+    audio = speech_like(200, rng)
+    levels = frame_levels(audio)
+    chunks = plan_chunks(audio)
+    assert_covers(chunks, len(audio))
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    for start, end in chunks[:-1]:
+        first = start // frame + int(MIN_CHUNK_SECONDS / FRAME_SECONDS)
+        window = levels[first:start // frame + int(MAX_CHUNK_SECONDS / FRAME_SECONDS)]
+        assert levels[end // frame] == window.min()
+
+
+def test_silence_only_audio_still_covers_everything():
+    audio = np.zeros(200 * SAMPLE_RATE, dtype=np.float32)
+    chunks = plan_chunks(audio)
+    assert_covers(chunks, len(audio))
+    assert all((end - start) / SAMPLE_RATE <= MAX_CHUNK_SECONDS for start, end in chunks)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+전사 결과 캐시 (SQLite, ~/.mp4tomp3/transcripts.db)
+
+키는 파일 경로가 아니라 디코딩한 오디오의 지문 + 모델 이름 + 모델 파일 해시 + 언어/디코딩
+옵션이다. 같은 MP4를 다시 내보내거나 폴더를 다시 골라도 오디오가 같으면 Whisper를 다시
+돌리지 않고 저장된 텍스트/구간을 돌려준다.
+
+저장된 텍스트/구간 크기 합계가 한도(config.json의 transcript_cache_mb)를 넘으면 가장 오래
+쓰지 않은 항목부터 지운다.
+"""
+
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+from conversion_cache import params_key
+
+DEFAULT_DB_PATH = Path.home() / '.mp4tomp3' / 'transcripts.db'
+DEFAULT_QUOTA_MB = 500
+# 지문 계산 때 한 번에 해시하는 샘플 수
+HASH_BLOCK_SAMPLES = 1 << 22
+
+
+def audio_fingerprint(audio):
+    """PCM 배열(float32) → 내용 지문 (디코딩한 샘플 자체를 해시하므로 컨테이너/메타데이터와 무관)"""
+    import numpy as np
+
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    digest = hashlib.sha256(f'f32:{len(audio)}:'.encode())
+    view = memoryview(audio).cast('B')
+    step = HASH_BLOCK_SAMPLES * 4
+    for offset in range(0, len(view), step):
+        digest.update(view[offset:offset + step])
+    return digest.hexdigest()
+
+
+def compact_segments(segments):
+    """Whisper 구간 dict에서 시작/끝/텍스트만 남김 (토큰 등은 저장하지 않음)"""
+    return [{'start': s['start'], 'end': s['end'], 'text': s['text']} for s in segments or []]
+
+
+class TranscriptCache:
+    """오디오 지문 + 모델 + 옵션 → 전사 텍스트/구간"""
+
+    def __init__(self, db_path=None, quota_mb=DEFAULT_QUOTA_MB):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = int(quota_mb * (1 << 20))
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        # 지운 항목의 페이지를 파일 크기에서 돌려받기 위해 (테이블을 만들기 전에 설정해야 한다)
+        self.conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS transcripts (
+                audio_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                model_hash TEXT NOT NULL,
+                options TEXT NOT NULL,
+                text TEXT NOT NULL,
+                segments TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (audio_hash, model, model_hash, options)
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS transcripts_accessed ON transcripts (accessed_at)')
+        self.conn.commit()
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def lookup(self, audio_hash, model, model_hash, options):
+        """저장된 {'text', 'segments'} 또는 None (적중하면 최근 사용 시각 갱신)"""
+        key = (audio_hash, model, model_hash, params_key(options))
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT text, segments FROM transcripts "
+                "WHERE audio_hash = ? AND model = ? AND model_hash = ? AND options = ?", key
+            ).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute(
+                "UPDATE transcripts SET accessed_at = ? "
+                "WHERE audio_hash = ? AND model = ? AND model_hash = ? AND options = ?", (time.time(),) + key
+            )
+            self.conn.commit()
+        return {'text': row[0], 'segments': json.loads(row[1])}
+
+    def record(self, audio_hash, model, model_hash, options, text, segments=None):
+        """전사 결과 저장 후 한도를 넘으면 오래 쓰지 않은 항목부터 삭제"""
+        segments_json = json.dumps(compact_segments(segments), ensure_ascii=False, separators=(',', ':'))
+        size = len(text.encode('utf-8')) + len(segments_json.encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO transcripts (audio_hash, model, model_hash, options, text, segments, "
+                "size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (audio_hash, model, model_hash, params_key(options), text, segments_json, size, now, now)
+            )
+            self._evict_over_quota()
+            self.conn.commit()
+
+    def _evict_over_quota(self):
+        """크기 합계가 한도 안으로 들어올 때까지 가장 오래 쓰지 않은 항목 삭제 (lock을 잡은 상태에서 호출)"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.quota_bytes:
+            return
+        evicted = 0
+        rows = self.conn.execute("SELECT rowid, size FROM transcripts ORDER BY accessed_at").fetchall()
+        for rowid, size in rows:
+            if total <= self.quota_bytes:
+                break
+            self.conn.execute("DELETE FROM transcripts WHERE rowid = ?", (rowid,))
+            total -= size
+            evicted += 1
+        self.evictions += evicted
+        self.conn.execute('PRAGMA incremental_vacuum')
+
+    def transcriber(self, transcribe, model, model_hash, language='ko', mode='serial', refresh=False, **options):
+        """transcribe(audio, language, **options) → dict 함수를 캐시로 감싼 PCM 배열 → 텍스트 함수
+
+        mode는 전사 방식(serial, chunked)으로 결과가 달라지므로 키에 넣는다. refresh면 캐시를
+        읽지 않고 다시 전사해 덮어쓴다 (BatchConverter.transcriber용).
+        """
+        key_options = dict(options, language=language, mode=mode)
+
+        def cached_transcribe(audio):
+            audio_hash = audio_fingerprint(audio)
+            if not refresh:
+                cached = self.lookup(audio_hash, model, model_hash, key_options)
+                if cached is not None:
+                    return cached['text']
+            else:
+                self.misses += 1
+            result = transcribe(audio, language, **options)
+            text = result.get('text', '').strip()
+            try:
+                self.record(audio_hash, model, model_hash, key_options, text, result.get('segments'))
+            except sqlite3.Error as e:
+                print(f"전사 캐시 기록 실패: {e}")
+            return text
+
+        return cached_transcribe
+
+    def stats(self):
+        with self.lock:
+            count, total = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts").fetchone()
+        return {'entries': count, 'size_mb': total / (1 << 20), 'quota_mb': self.quota_bytes / (1 << 20),
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def summary(self):
+        stats = self.stats()
+        return (f"전사 캐시: 적중 {stats['hits']}회, 새로 전사 {stats['misses']}회, "
+                f"{stats['entries']}개 ({stats['size_mb']:.1f}/{stats['quota_mb']:.0f}MB), "
+                f"내림 {stats['evictions']}개")
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM transcripts")
+            self.conn.execute('PRAGMA incremental_vacuum')
+            self.conn.commit()
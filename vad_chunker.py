@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+VAD 기반 분할 전사 - 긴 녹음을 무음 구간에서 잘라 여러 프로세스에서 동시에 전사한다.
+
+model.transcribe(audio)는 3시간짜리 강의도 한 프로세스에서 30초 창을 차례로 디코딩한다.
+여기서는 16kHz PCM의 프레임 에너지로 말소리/무음을 가르고(간단한 VAD), 30초 이상 쌓인 뒤
+처음 만나는 무음 가운데에서 자른다. 조각은 모델을 한 번씩만 올린 작업자 프로세스들이 나눠
+전사하고, 조각 시작 시각만큼 구간 시간을 밀어 하나의 전사 결과로 잇는다.
+
+무음에서 자르므로 단어가 잘리지 않고, 조각이 30초 이상이라 Whisper가 앞뒤 문맥을 잃는
+경계가 많지 않다. 무음이 오래 없으면 MAX_CHUNK_SECONDS 안에서 가장 조용한 프레임에서 자른다.
+
+벤치마크 (직렬 전사와 소요 시간/단어 오류율 비교):
+    python vad_chunker.py speech.wav --minutes 20 --model tiny
+"""
+
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Whisper 입력 PCM 샘플레이트
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+MIN_CHUNK_SECONDS = 30.0
+MAX_CHUNK_SECONDS = 90.0
+# 이보다 짧은 무음은 말 사이 쉼으로 보고 자르지 않음
+MIN_SILENCE_SECONDS = 0.3
+# 긴 무음은 가운데가 아니라 시작 후 이만큼에서 자름 (다음 조각이 긴 무음으로 시작하지 않도록)
+SILENCE_PAD_SECONDS = 1.0
+# 잡음 바닥보다 이만큼 크면 말소리 (dB)
+SPEECH_MARGIN_DB = 12.0
+# 잡음 바닥은 하위 2% 프레임 레벨, 말소리 레벨은 중앙값 - 둘이 이만큼 떨어져 있을 때만 쉼과
+# 말소리가 갈린다고 본다 (아니면 쉼이 거의 없는 연속 발화라 백분위수가 말소리에 걸린 것)
+NOISE_PERCENTILE = 2
+MIN_SEPARATION_DB = 15.0
+# 이보다 조용하면 잡음 바닥과 상관없이 무음 (dBFS, 문턱의 하한)
+SILENCE_FLOOR_DB = -50.0
+# 이보다 짧은 오디오는 나누지 않고 작업자 하나에서 전사
+CHUNKED_MIN_SECONDS = 2 * MIN_CHUNK_SECONDS
+
+
+def frame_levels(audio, sample_rate=SAMPLE_RATE, frame_seconds=FRAME_SECONDS):
+    """프레임별 RMS 레벨(dBFS) 배열 - 마지막 자투리 프레임은 버린다"""
+    frame = max(1, int(sample_rate * frame_seconds))
+    count = len(audio) // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = np.asarray(audio[:count * frame], dtype=np.float32).reshape(count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def speech_mask(levels):
+    """프레임 레벨 → 말소리 프레임 여부 (레벨 분포에서 추정한 잡음 바닥 기준의 적응형 문턱)
+
+    문턱은 잡음 바닥 + SPEECH_MARGIN_DB이되 잡음 바닥과 말소리 레벨의 중간을 넘지 않는다.
+    둘이 갈리지 않으면 SILENCE_FLOOR_DB보다 큰 프레임을 모두 말소리로 본다.
+    """
+    if len(levels) == 0:
+        return np.zeros(0, dtype=bool)
+    noise_floor = np.percentile(levels, NOISE_PERCENTILE)
+    speech_level = np.median(levels)
+    if speech_level - noise_floor < MIN_SEPARATION_DB:
+        return levels > SILENCE_FLOOR_DB
+    threshold = min(noise_floor + SPEECH_MARGIN_DB, (noise_floor + speech_level) / 2)
+    return levels > max(threshold, SILENCE_FLOOR_DB)
+
+
+def silence_runs(mask, min_frames):
+    """min_frames 이상 이어지는 무음 구간들 [(시작 프레임, 끝 프레임), ...]"""
+    runs = []
+    run_start = None
+    for index, speech in enumerate(np.append(mask, True)):
+        if not speech and run_start is None:
+            run_start = index
+        elif speech and run_start is not None:
+            if index - run_start >= min_frames:
+                runs.append((run_start, index))
+            run_start = None
+    return runs
+
+
+def plan_chunks(audio, sample_rate=SAMPLE_RATE, min_chunk=MIN_CHUNK_SECONDS, max_chunk=MAX_CHUNK_SECONDS):
+    """오디오를 나눌 [(시작 샘플, 끝 샘플), ...] - 빈틈 없이 전체를 덮는다
+
+    조각은 min_chunk초 이상 쌓인 뒤 처음 만나는 무음에서 자른다. max_chunk초 안에
+    무음이 없으면(또는 VAD가 전부 말소리/전부 무음으로 판정하면) 그 범위에서 가장 조용한
+    프레임에서 자르고, 남은 길이가 max_chunk초 이하면 마지막 조각으로 둔다.
+    """
+    total = len(audio)
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    levels = frame_levels(audio, sample_rate)
+    mask = speech_mask(levels)
+    # 전부 말소리거나 전부 무음이면 VAD가 구분하지 못한 것 - 창 안에서 가장 조용한 프레임에서 자른다
+    silences = []
+    if 0 < mask.sum() < len(mask):
+        silences = silence_runs(mask, max(1, int(MIN_SILENCE_SECONDS / FRAME_SECONDS)))
+    min_frames = int(min_chunk * sample_rate) // frame
+    max_frames = int(max_chunk * sample_rate) // frame
+    pad_frames = int(SILENCE_PAD_SECONDS / FRAME_SECONDS)
+
+    chunks = []
+    start = 0
+    silence_index = 0
+    while total - start * frame > max_chunk * sample_rate:
+        while silence_index < len(silences) and silences[silence_index][1] <= start + min_frames:
+            silence_index += 1
+        # 무음 가운데(긴 무음은 시작 후 pad_frames)에서 자르되, min_chunk보다 앞이면 min_chunk 지점에서
+        cut = None
+        if silence_index < len(silences):
+            run_start, run_end = silences[silence_index]
+            cut = max(run_start + min((run_end - run_start) // 2, pad_frames), start + min_frames)
+        if cut is None or cut > start + max_frames:
+            window = levels[start + min_frames:start + max_frames]
+            cut = start + min_frames + int(np.argmin(window))
+        chunks.append((start * frame, cut * frame))
+        start = cut
+    chunks.append((start * frame, total))
+    return chunks
+
+
+def stitch(pieces):
+    """[(시작 초, 전사 결과 dict), ...] → 시간을 맞춘 하나의 전사 결과 dict"""
+    texts = []
+    segments = []
+    for offset, result in pieces:
+        text = result.get('text', '').strip()
+        if text:
+            texts.append(text)
+        for segment in result.get('segments', []):
+            segments.append({
+                'id': len(segments),
+                'start': round(segment['start'] + offset, 3),
+                'end': round(segment['end'] + offset, 3),
+                'text': segment['text'],
+            })
+    return {'text': ' '.join(texts), 'segments': segments}
+
+
+# 작업자 프로세스의 모델 (프로세스마다 한 번만 로드)
+_worker_model = None
+
+
+def _init_worker(model_name, threads):
+    global _worker_model
+    try:
+        import torch
+        # 작업자끼리 코어를 나눠 쓰도록 (기본값은 프로세스마다 전체 코어)
+        torch.set_num_threads(max(1, threads))
+    except ImportError:
+        pass
+    from whisper_manager import WhisperManager
+    _worker_model = WhisperManager().load_model(model_name)
+
+
+def _transcribe_chunk(audio, language, options):
+    result = _worker_model.transcribe(audio, language=language, fp16=False, **options)
+    return {
+        'text': result.get('text', ''),
+        'segments': [{'start': s['start'], 'end': s['end'], 'text': s['text']} for s in result.get('segments', [])],
+    }
+
+
+def default_chunk_workers(model_name, manager=None):
+    """메모리와 코어가 허락하는 작업자 프로세스 수 (최소 1)"""
+    from whisper_pool import available_memory_mb, replica_memory_mb, DEFAULT_RESERVE_MB
+
+    cores = max(1, (os.cpu_count() or 1) // 2)
+    if manager is None:
+        from whisper_manager import WhisperManager
+        manager = WhisperManager()
+    available = available_memory_mb()
+    if available is None:
+        return 1
+    return max(1, min(cores, int((available - DEFAULT_RESERVE_MB) // replica_memory_mb(manager, model_name))))
+
+
+class ChunkedTranscriber:
+    """작업자 프로세스마다 모델을 하나씩 올려 두고 조각을 나눠 전사한다
+
+    여러 파일이 동시에 전사를 요청해도 같은 작업자 풀을 나눠 쓴다.
+    """
+
+    def __init__(self, model_name, workers=None, manager=None, min_chunk=MIN_CHUNK_SECONDS,
+                 max_chunk=MAX_CHUNK_SECONDS):
+        self.model_name = model_name
+        self.workers = max(1, workers or default_chunk_workers(model_name, manager))
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.executor = None
+        # 통계
+        self.files = 0
+        self.chunks = 0
+        self.audio_seconds = 0.0
+        self.elapsed = 0.0
+
+    def start(self):
+        """작업자를 띄우고 모델을 올림 (모델 로드 오류를 배치 시작 전에 알리기 위해 하나는 기다린다)"""
+        if self.executor is None:
+            threads = (os.cpu_count() or 1) // self.workers
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                initargs=(self.model_name, threads))
+            self.executor.submit(int).result()
+        return self
+
+    def transcribe(self, audio, language='ko', **options):
+        """PCM 배열 → {'text', 'segments'} (구간 시간은 원본 기준 초)"""
+        self.start()
+        started = time.monotonic()
+        if len(audio) < CHUNKED_MIN_SECONDS * SAMPLE_RATE:
+            chunks = [(0, len(audio))]
+        else:
+            chunks = plan_chunks(audio, SAMPLE_RATE, self.min_chunk, self.max_chunk)
+        futures = [self.executor.submit(_transcribe_chunk, audio[start:end], language, options)
+                   for start, end in chunks]
+        result = stitch([(start / SAMPLE_RATE, future.result()) for (start, _), future in zip(chunks, futures)])
+        self.files += 1
+        self.chunks += len(chunks)
+        self.audio_seconds += len(audio) / SAMPLE_RATE
+        self.elapsed += time.monotonic() - started
+        return result
+
+    def transcriber(self, language='ko'):
+        """PCM 배열 → 텍스트 함수 (BatchConverter.transcriber용)"""
+        def transcribe(audio):
+            return self.transcribe(audio, language)['text'].strip()
+
+        return transcribe
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def summary(self):
+        text = f"Whisper {self.model_name} 분할 전사: 작업자 {self.workers}개, 파일 {self.files}개, 조각 {self.chunks}개"
+        if self.elapsed:
+            text += f", {self.audio_seconds / self.elapsed:.1f}배속"
+        return text
+
+
+def word_error_rate(reference, hypothesis):
+    """단어 단위 편집 거리 / 참조 단어 수 (대소문자와 문장 부호는 무시)"""
+    ref = re.findall(r'\w+', reference.lower())
+    hyp = re.findall(r'\w+', hypothesis.lower())
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, other in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def make_fixture(clip, seconds, seed=0):
+    """짧은 음성 clip을 0.3~2초 무음(약한 잡음)을 사이에 두고 seconds초가 될 때까지 이어 붙임 → (PCM, 반복 수)"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    length = 0
+    repeats = 0
+    while length < seconds * SAMPLE_RATE:
+        gap = rng.normal(0, 1e-3, int(rng.uniform(0.3, 2.0) * SAMPLE_RATE)).astype(np.float32)
+        parts.extend((clip, gap))
+        length += len(clip) + len(gap)
+        repeats += 1
+    return np.concatenate(parts), repeats
+
+
+def benchmark(clip_path, minutes=20.0, model_name='tiny', workers=None, language='ko', reference=None):
+    """합성 픽스처에서 직렬 전사와 분할 병렬 전사의 소요 시간/단어 오류율 비교"""
+    from whisper_manager import WhisperManager
+    from batch_converter import find_ffmpeg
+    import whisper
+
+    ffmpeg_path = find_ffmpeg()
+    if ffmpeg_path:
+        # whisper.load_audio는 PATH의 ffmpeg를 쓴다
+        os.environ['PATH'] = os.path.dirname(ffmpeg_path) + os.pathsep + os.environ.get('PATH', '')
+    clip = whisper.load_audio(clip_path)
+    audio, repeats = make_fixture(clip, minutes * 60)
+    print(f"픽스처: {os.path.basename(clip_path)} × {repeats} = {len(audio) / SAMPLE_RATE / 60:.1f}분")
+
+    model = WhisperManager().load_model(model_name)
+    start = time.time()
+    serial = model.transcribe(audio, language=language, fp16=False)['text'].strip()
+    serial_elapsed = time.time() - start
+    del model
+
+    chunked = ChunkedTranscriber(model_name, workers).start()
+    try:
+        start = time.time()
+        parallel = chunked.transcribe(audio, language)['text'].strip()
+        parallel_elapsed = time.time() - start
+    finally:
+        chunked.close()
+
+    print(f"  직렬: {serial_elapsed:.1f}초")
+    print(f"  분할 ({chunked.workers}작업자, 조각 {chunked.chunks}개): {parallel_elapsed:.1f}초 "
+          f"({serial_elapsed / parallel_elapsed:.2f}배)")
+    print(f"  직렬 대비 단어 차이율: {word_error_rate(serial, parallel):.3f}")
+    if reference:
+        # 참조 문장을 반복 수만큼 이어 붙인 것이 정답
+        expected = ' '.join([reference] * repeats)
+        print(f"  WER 직렬: {word_error_rate(expected, serial):.3f}, 분할: {word_error_rate(expected, parallel):.3f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='VAD 분할 전사 벤치마크')
+    parser.add_argument('clip', help='픽스처를 만들 짧은 음성 파일 (몇 초~수십 초)')
+    parser.add_argument('--minutes', type=float, default=20.0, help='픽스처 길이 (기본: 20분)')
+    parser.add_argument('--model', default='tiny', help='Whisper 모델 (기본: tiny)')
+    parser.add_argument('--workers', type=int, help='작업자 프로세스 수 (기본: 메모리/코어 기준)')
+    parser.add_argument('--language', default='ko', help='언어 (기본: ko)')
+    parser.add_argument('--reference', help='clip의 정답 문장 (주면 정답 대비 WER도 출력)')
+    args = parser.parse_args()
+    if not os.path.exists(args.clip):
+        print(f"파일이 없습니다: {args.clip}")
+        sys.exit(2)
+    benchmark(args.clip, args.minutes, args.model, args.workers, args.language, args.reference)
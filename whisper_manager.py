@@ -6,21 +6,41 @@ Whisper 모델 관리자 - 선택적 다운로드 방식
 import os
 import sys
 import json
+import time
 import hashlib
+import threading
 import urllib.request
+from collections import OrderedDict
 from pathlib import Path
 import subprocess
 
+# 배치가 끝난 뒤에도 메모리에 남겨 두는 모델들의 상주 메모리 합계 한도(MB)와 유휴 제한 시간(초)
+# (config.json의 resident_budget_mb, resident_idle_seconds로 변경 - 한도를 정하지 않으면 전체 메모리의
+# RESIDENT_BUDGET_FRACTION, 최대 DEFAULT_RESIDENT_BUDGET_MB. 더 크게 두려면 config.json에서 올린다)
+DEFAULT_RESIDENT_BUDGET_MB = 4000
+RESIDENT_BUDGET_FRACTION = 0.25
+DEFAULT_RESIDENT_IDLE_SECONDS = 600
+
+
+def default_resident_budget_mb():
+    """전체 메모리의 일부 (다른 프로그램이 쓸 메모리를 남기도록 DEFAULT_RESIDENT_BUDGET_MB를 넘지 않음)"""
+    from whisper_pool import total_memory_mb
+    total = total_memory_mb()
+    if total is None:
+        return DEFAULT_RESIDENT_BUDGET_MB
+    return min(int(total * RESIDENT_BUDGET_FRACTION), DEFAULT_RESIDENT_BUDGET_MB)
+
+
 class WhisperManager:
     """경량 Whisper 관리 시스템"""
     
-    # 모델 크기 정보 (실제 다운로드 크기)
+    # 모델 크기 정보 (실제 다운로드 크기, memory는 로드한 모델 상주 메모리 기본 추정치 MB)
     MODEL_SIZES = {
-        'tiny': {'size': 39, 'accuracy': '기본', 'speed': '최고속'},
-        'base': {'size': 74, 'accuracy': '양호', 'speed': '빠름'},
-        'small': {'size': 244, 'accuracy': '좋음', 'speed': '보통'},
-        'medium': {'size': 769, 'accuracy': '우수', 'speed': '느림'},
-        'large': {'size': 1550, 'accuracy': '최고', 'speed': '매우 느림'}
+        'tiny': {'size': 39, 'memory': 1000, 'accuracy': '기본', 'speed': '최고속'},
+        'base': {'size': 74, 'memory': 1000, 'accuracy': '양호', 'speed': '빠름'},
+        'small': {'size': 244, 'memory': 2000, 'accuracy': '좋음', 'speed': '보통'},
+        'medium': {'size': 769, 'memory': 5000, 'accuracy': '우수', 'speed': '느림'},
+        'large': {'size': 1550, 'memory': 10000, 'accuracy': '최고', 'speed': '매우 느림'}
     }
     
     def __init__(self):
@@ -31,6 +51,18 @@ class WhisperManager:
         
         self.config_file = self.app_dir / 'config.json'
         self.load_config()
+        
+        # 상주 모델 등록부: 반납된(쉬는) 모델을 최근 사용 순으로 보관 - {이름: [(모델, 반납 시각), ...]}
+        self.resident = OrderedDict()
+        self.resident_lock = threading.Lock()
+        self.resident_budget_mb = self.config.get('resident_budget_mb') or default_resident_budget_mb()
+        self.resident_idle_seconds = self.config.get('resident_idle_seconds', DEFAULT_RESIDENT_IDLE_SECONDS)
+        self._sweeper = None
+        # 통계
+        self.model_hits = 0
+        self.model_misses = 0
+        self.model_load_seconds = 0.0
+        self.model_evictions = 0
     
     def load_config(self):
         """설정 파일 로드"""
@@ -200,6 +232,14 @@ class WhisperManager:
         }
         return hashes.get(model_name, '')
     
+    def model_file_hash(self, model_name):
+        """모델 파일 지문 (전사 캐시 키) - 로컬 파일이 없으면 Whisper 공식 파일의 SHA256"""
+        model_file = self.models_dir / f"{model_name}.pt"
+        if model_file.exists():
+            from fingerprint import fingerprint
+            return fingerprint(model_file)
+        return self._get_model_hash(model_name) or model_name
+    
     def get_available_models(self):
         """설치된 모델 목록"""
         return self.config['installed_models']
@@ -216,6 +256,113 @@ class WhisperManager:
             # 자동 다운로드 (Whisper 기본)
             return whisper.load_model(model_name)
     
+    def is_resident(self, model_name):
+        """쉬는 상주 복사본이 있는지 (있으면 checkout_model이 바로 돌려준다)"""
+        with self.resident_lock:
+            return bool(self.resident.get(model_name))
+    
+    def checkout_model(self, model_name='tiny'):
+        """모델 빌리기 - 상주 복사본이 있으면 그것을(적중), 없으면 새로 로드(실패)"""
+        with self.resident_lock:
+            copies = self.resident.get(model_name)
+            if copies:
+                model, _ = copies.pop()
+                if not copies:
+                    del self.resident[model_name]
+                self.model_hits += 1
+                return model
+            self.model_misses += 1
+        start = time.monotonic()
+        model = self.load_model(model_name)
+        elapsed = time.monotonic() - start
+        with self.resident_lock:
+            self.model_load_seconds += elapsed
+        return model
+    
+    def checkin_model(self, model_name, model):
+        """다 쓴 모델 반납 - 메모리 한도 안에서 상주시키고, 넘으면 가장 오래 안 쓴 모델부터 내린다
+
+        방금 반납한 모델 하나는 한도를 넘더라도 남긴다 (다음 배치의 재로드를 막는 것이 목적이므로).
+        """
+        with self.resident_lock:
+            self.resident.setdefault(model_name, []).append((model, time.monotonic()))
+            self.resident.move_to_end(model_name)
+            self._evict_over_budget()
+            if self.resident and self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep_idle, name='whisper-resident', daemon=True)
+                self._sweeper.start()
+    
+    def _resident_mb(self):
+        return sum(self.model_memory_mb(name) * len(copies) for name, copies in self.resident.items())
+    
+    def _evict_over_budget(self):
+        """한도를 넘는 동안 LRU 모델부터 복사본 하나씩 내림 - 마지막 하나는 남긴다 (resident_lock을 잡은 상태에서 호출)"""
+        while sum(map(len, self.resident.values())) > 1 and self._resident_mb() > self.resident_budget_mb:
+            name, copies = next(iter(self.resident.items()))
+            copies.pop(0)
+            self.model_evictions += 1
+            if not copies:
+                del self.resident[name]
+    
+    def _sweep_idle(self):
+        """유휴 제한 시간이 지난 상주 모델을 내리는 스레드 (상주 모델이 없으면 끝남)"""
+        interval = max(1.0, min(self.resident_idle_seconds / 4, 60.0))
+        while True:
+            time.sleep(interval)
+            with self.resident_lock:
+                deadline = time.monotonic() - self.resident_idle_seconds
+                for name in list(self.resident):
+                    copies = self.resident[name]
+                    kept = [(model, used) for model, used in copies if used > deadline]
+                    self.model_evictions += len(copies) - len(kept)
+                    if kept:
+                        self.resident[name] = kept
+                    else:
+                        del self.resident[name]
+                if not self.resident:
+                    self._sweeper = None
+                    return
+    
+    def unload_models(self):
+        """상주 모델을 모두 내림"""
+        with self.resident_lock:
+            self.model_evictions += sum(len(copies) for copies in self.resident.values())
+            self.resident.clear()
+    
+    def residency_stats(self):
+        """상주 모델 통계 dict"""
+        with self.resident_lock:
+            return {
+                'resident': {name: len(copies) for name, copies in self.resident.items()},
+                'resident_mb': self._resident_mb(),
+                'hits': self.model_hits,
+                'misses': self.model_misses,
+                'load_seconds': self.model_load_seconds,
+                'evictions': self.model_evictions,
+            }
+    
+    def residency_summary(self):
+        stats = self.residency_stats()
+        loaded = ', '.join(f"{name}×{count}" for name, count in stats['resident'].items()) or '없음'
+        return (f"상주 모델: {loaded} ({stats['resident_mb']:.0f}/{self.resident_budget_mb}MB), "
+                f"적중 {stats['hits']}회, 로드 {stats['misses']}회 ({stats['load_seconds']:.1f}s), "
+                f"내림 {stats['evictions']}회")
+    
+    def model_memory_mb(self, model_name):
+        """로드한 모델 하나의 상주 메모리(MB) - 측정값이 있으면 측정값, 없으면 기본 추정치"""
+        measured = self.config.get('model_memory', {}).get(model_name)
+        if measured:
+            return measured
+        return self.MODEL_SIZES.get(model_name, {}).get('memory', 2000)
+    
+    def record_model_memory(self, model_name, memory_mb):
+        """측정한 상주 메모리 저장 (급격히 줄지 않도록 이전 값과 평균, 새 측정값보다는 작아지지 않음)"""
+        memory = self.config.setdefault('model_memory', {})
+        previous = memory.get(model_name)
+        memory[model_name] = round(max(memory_mb, (previous + memory_mb) / 2) if previous else memory_mb)
+        self.save_config()
+        return memory[model_name]
+    
     def estimate_space_needed(self, model_name='tiny'):
         """필요한 디스크 공간 계산"""
         model_info = self.MODEL_SIZES.get(model_name, {})
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Whisper 모델 복제본 풀 - 메모리 기반 입장 제어
+
+모델 하나로는 전사가 한 번에 하나씩만 돌므로 STT 작업자를 늘리려면 복제본을 더 올려야 한다.
+그런데 medium/large는 전사 중 상주 메모리가 디스크 크기의 몇 배라 복제본을 무턱대고 늘리면
+스왑이나 OOM killer를 만난다. 풀은 복제본을 하나 더 올리기 전에 사용 가능 메모리가
+(모델 상주 메모리 추정치 + 여유분)보다 많은지 확인하고, 모자라면 새로 올리지 않고
+기존 복제본이 비기를 기다린다.
+
+상주 메모리는 배치를 시작하기 전(다른 작업이 없을 때) 첫 복제본을 올리며 늘어난 RSS로 측정해
+WhisperManager 설정(~/.mp4tomp3/config.json)에 모델별로 저장한다. 전사 중에는 디코딩 버퍼가
+더해지므로 복제본 하나에 그 (1 + TRANSCRIBE_GROWTH)배를 잡는다. 전사 중 RSS는 다른 파일의
+PCM/인코딩 버퍼와 섞이므로 측정에 쓰지 않는다.
+"""
+
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# 복제본을 올린 뒤에도 남겨 둘 메모리 (MB)
+DEFAULT_RESERVE_MB = 1024
+DEFAULT_MAX_REPLICAS = max(1, (os.cpu_count() or 1) // 4)
+# 메모리가 모자라 기다리는 동안 다시 확인하는 간격 (초)
+RECHECK_INTERVAL = 2.0
+# 전사 중 디코딩 버퍼로 늘어나는 메모리 (로드한 모델 상주 메모리 대비 비율)
+TRANSCRIBE_GROWTH = 0.5
+
+
+def _psutil():
+    try:
+        import psutil
+        return psutil
+    except ImportError:
+        return None
+
+
+def current_rss_mb():
+    """현재 프로세스 상주 메모리(MB) - 알 수 없으면 None"""
+    psutil = _psutil()
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1 << 20)
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def available_memory_mb():
+    """새로 할당할 수 있는 메모리(MB) - 알 수 없으면 None"""
+    psutil = _psutil()
+    if psutil is not None:
+        return psutil.virtual_memory().available / (1 << 20)
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def total_memory_mb():
+    """설치된 전체 메모리(MB) - 알 수 없으면 None"""
+    psutil = _psutil()
+    if psutil is not None:
+        return psutil.virtual_memory().total / (1 << 20)
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def replica_memory_mb(manager, model_name):
+    """전사 중인 복제본 하나가 쓰는 메모리 추정치 (MB)"""
+    return manager.model_memory_mb(model_name) * (1 + TRANSCRIBE_GROWTH)
+
+
+class WhisperModelPool:
+    """같은 모델 복제본들을 빌려 주는 풀 - 메모리가 허락할 때만 복제본을 늘린다"""
+
+    def __init__(self, manager, model_name, max_replicas=None, reserve_mb=DEFAULT_RESERVE_MB):
+        # manager: WhisperManager (checkout_model/checkin_model, model_memory_mb, record_model_memory)
+        self.manager = manager
+        self.model_name = model_name
+        self.max_replicas = max(1, max_replicas or DEFAULT_MAX_REPLICAS)
+        self.reserve_mb = reserve_mb
+        self.condition = threading.Condition()
+        self.replicas = []
+        self.idle = deque()
+        self.loading = 0
+        self.busy = 0
+        # 통계: 복제본을 늘리지 못해(메모리/최대 수) 기다린 횟수, 최대 동시 사용 복제본 수
+        self.queued = 0
+        self.peak_busy = 0
+
+    @property
+    def estimate_mb(self):
+        return self.manager.model_memory_mb(self.model_name)
+
+    def load_first(self):
+        """첫 복제본을 미리 올림 (모델 로드 오류를 배치 시작 전에 알리기 위해)
+
+        다른 작업이 돌기 전이므로 여기서 로드 전후 RSS 차이로 모델 상주 메모리를 잰다.
+        """
+        with self.condition:
+            if self.replicas or self.loading:
+                return
+            self.loading += 1
+        self._add_replica(measure=True)
+        with self.condition:
+            self.idle.append(self.replicas[-1])
+            self.condition.notify()
+
+    def _add_replica(self, measure=False):
+        """복제본 하나 로드 (loading을 미리 올린 상태에서 호출)"""
+        # 이전 배치에서 남은 상주 모델은 이미 메모리에 있어 RSS 증가로 잴 수 없다
+        base_rss = current_rss_mb() if measure and not self.manager.is_resident(self.model_name) else None
+        try:
+            model = self.manager.checkout_model(self.model_name)
+        except Exception:
+            with self.condition:
+                self.loading -= 1
+                self.condition.notify_all()
+            raise
+        if base_rss is not None:
+            rss = current_rss_mb()
+            if rss is not None and rss > base_rss:
+                try:
+                    self.manager.record_model_memory(self.model_name, rss - base_rss)
+                except OSError as e:
+                    print(f"모델 메모리 기록 실패: {e}")
+        with self.condition:
+            self.loading -= 1
+            self.replicas.append(model)
+        return model
+
+    def _can_add(self):
+        """복제본을 하나 더 올려도 되는지 (condition을 잡은 상태에서 호출)"""
+        count = len(self.replicas) + self.loading
+        if count == 0:
+            # 하나는 항상 허용 (추정치가 사용 가능 메모리보다 커도 전사는 해야 한다)
+            return True
+        if count >= self.max_replicas:
+            return False
+        available = available_memory_mb()
+        if available is None:
+            # 메모리를 알 수 없는 환경에서는 복제본 하나만
+            return False
+        estimate = self.estimate_mb
+        # 로드 중인 복제본은 아직 메모리를 다 쓰지 않았고, 전사 중인 복제본은 디코딩 버퍼만큼 더 늘 수 있다
+        growth = estimate * TRANSCRIBE_GROWTH
+        needed = (estimate + growth) * (self.loading + 1) + growth * self.busy + self.reserve_mb
+        return available >= needed
+
+    def acquire(self):
+        """쉬는 복제본을 빌림 - 없으면 메모리가 허락할 때 새로 올리고, 아니면 기다린다"""
+        waited = False
+        with self.condition:
+            while not self.idle:
+                if self._can_add():
+                    self.loading += 1
+                    break
+                if not waited:
+                    waited = True
+                    self.queued += 1
+                self.condition.wait(RECHECK_INTERVAL)
+            else:
+                model = self.idle.popleft()
+                self._mark_busy()
+                return model
+        model = self._add_replica()
+        with self.condition:
+            self._mark_busy()
+        return model
+
+    def _mark_busy(self):
+        self.busy += 1
+        self.peak_busy = max(self.peak_busy, self.busy)
+
+    def release(self, model):
+        with self.condition:
+            self.busy -= 1
+            self.idle.append(model)
+            self.condition.notify()
+
+    @contextmanager
+    def model(self):
+        model = self.acquire()
+        try:
+            yield model
+        finally:
+            self.release(model)
+
+    def transcribe(self, audio, language='ko', **options):
+        """PCM 배열 → Whisper 전사 결과 dict (text, segments)"""
+        with self.model() as model:
+            return model.transcribe(audio, language=language, fp16=False, **options)
+
+    def transcriber(self, language='ko'):
+        """PCM 배열 → 텍스트 함수 (BatchConverter.transcriber용)"""
+        def transcribe(audio):
+            return self.transcribe(audio, language).get('text', '').strip()
+
+        return transcribe
+
+    def close(self):
+        """복제본을 관리자에게 반납 (다음 배치를 위해 메모리 한도 안에서 상주)"""
+        with self.condition:
+            replicas = list(self.replicas)
+            self.replicas.clear()
+            self.idle.clear()
+        for model in replicas:
+            self.manager.checkin_model(self.model_name, model)
+
+    def summary(self):
+        text = (f"Whisper {self.model_name}: 복제본 {len(self.replicas)}개 (최대 {self.max_replicas}), "
+                f"동시 전사 최대 {self.peak_busy}개, 모델당 메모리 {self.estimate_mb:.0f}MB")
+        if self.queued:
+            text += f", 복제본을 늘릴 수 없어 대기 {self.queued}회"
+        return text